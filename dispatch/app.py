@@ -1,19 +1,30 @@
 import os
 import json
 import requests
-from flask import Flask, request, render_template, redirect, url_for, jsonify, make_response, Response
+from flask import Flask, request, render_template, redirect, url_for, jsonify, make_response, send_file
 from flask_executor import Executor
 from services import * # Import all service functions
 from services import add_feed as add_feed_function  # Import with alias to avoid name conflict
-from services.feed_service import refresh_all_feed_favicons  # Import refresh function
+from services.scheduler_service import start_scheduler
+from services.favicon_service import get_favicon_file, FAVICON_SIZE, FAVICON_SIZES
+from services.parse_service import MAX_ITEMS_PER_FEED
 from models import Session, RssFeed  # Import Session and RssFeed for test compatibility
-from datetime import datetime # Make sure datetime is imported
+from datetime import datetime, timedelta # Make sure datetime is imported
 
 app = Flask(__name__)
 executor = Executor(app)
 app.config["EXECUTOR_TYPE"] = "thread"
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/rss_database.db")
+SCHEDULER_ENABLED = os.getenv("DISPATCH_SCHEDULER_ENABLED", "true").lower() in ("1", "true", "yes")
+
+
+@app.before_request
+def start_background_scheduler():
+    """Start the background feed refresh scheduler on the first request."""
+    if SCHEDULER_ENABLED and not app.config.get("TESTING"):
+        start_scheduler()
+
 
 # Template filter for time delta - uses the service function for consistency
 @app.template_filter()
@@ -22,6 +33,24 @@ def entry_timedetla(input_datetime):
     return service_timedetla(input_datetime)
 
 
+# Display size of feed icons; templates request the 2x variant for high-density screens
+app.jinja_env.globals["favicon_size"] = FAVICON_SIZE
+
+
+@app.cli.command("rebuild-feed-stats")
+def rebuild_feed_stats_command():
+    """Recompute the per-feed unread and total counters from the entries."""
+    if rebuild_feed_stats() < 0:
+        raise SystemExit(1)
+
+
+@app.cli.command("rebuild-search-index")
+def rebuild_search_index_command():
+    """Re-index every entry for full-text search."""
+    if rebuild_search_index() < 0:
+        raise SystemExit(1)
+
+
 # Renamed from newindex, route changed from /new to /
 @app.route("/")
 def index():
@@ -32,9 +61,9 @@ def index():
 # Renamed from newentries, route changed from /newentries/<feed_id>
 @app.route("/entries/<feed_id>")
 def entries(feed_id):
-    page = int(request.args.get("page", default=1))
+    cursor = request.args.get("cursor")
     entries_per_page = 20
-    entries = get_feed_entries_by_feed_id(feed_id, page, entries_per_page)
+    entries, next_cursor = get_feed_entries_page(feed_id, cursor, entries_per_page)
 
     if feed_id == "all":
         feed = {"title": "All Feeds", "id": "all", "favicon_path": None}
@@ -45,22 +74,31 @@ def entries(feed_id):
     if request.headers.get('HX-Request'):
         # Return just the entry cards for HTMX requests
         if entries:
-            # Check if there might be more entries by seeing if we got a full page
-            has_more = len(entries) == entries_per_page
-            next_page = page + 1 if has_more else None
             return render_template('entry-cards-partial.html',
                                  entries=entries,
                                  feed=feed,
-                                 next_page=next_page)
+                                 next_cursor=next_cursor)
         else:
             # No more entries - return empty content
             return ""
 
     # Regular page load - return full page
-    has_more = len(entries) == entries_per_page
-    next_page = page + 1 if has_more else None
     return render_template("entries.html", entries=entries, feed=feed,
-                         theme=get_theme("default"), next_page=next_page)
+                         theme=get_theme("default"), next_cursor=next_cursor)
+
+@app.route("/search")
+def search():
+    query = request.args.get("q", "")
+    feed_id = request.args.get("feed_id", "all")
+    results = search_entries(query, feed_id)
+
+    # Search-as-you-type requests only swap in the results; restoring a pushed
+    # URL from history after a cache miss needs the whole page
+    if request.headers.get('HX-Request') and not request.headers.get('HX-History-Restore-Request'):
+        return render_template("search-results-partial.html", results=results, query=query)
+
+    return render_template("search.html", results=results, query=query, feed_id=feed_id,
+                         theme=get_theme("default"))
 
 # Renamed from newentry, route changed from /newentry/<entry_id>
 @app.route("/entry/<entry_id>")
@@ -194,7 +232,16 @@ def refresh(feed_id):
 @app.route("/settings")
 def settings():
     template = "settings.html" # Renamed from new-settings.html
-    return render_template(template, feeds=get_all_feeds(), theme=get_theme("default"))
+    return render_template(template, feeds=get_all_feeds(), paused_feeds=get_paused_feeds(),
+                           max_items_default=MAX_ITEMS_PER_FEED, theme=get_theme("default"))
+
+@app.route("/settings/health")
+def feed_health():
+    # Clamped so an out-of-range value can't overflow the date arithmetic
+    days = min(max(request.args.get("days", 7, type=int), 1), 365)
+    return render_template("feed-health.html", health=get_feed_health(days),
+                           daily_totals=get_daily_fetch_totals(max(days, 14)),
+                           days=days, theme=get_theme("default"))
 
 # --- Routes kept for settings functionality ---
 
@@ -212,13 +259,39 @@ def upload_opml():
         return "<div class='feedback-message error'>Please select an OPML file</div>"
 
     try:
-        # Submit background task to process OPML
-        executor.submit_stored("opml_import", add_feeds_from_opml, uploaded_file)
-        return "<div class='feedback-message success'>Processing OPML file... <em>Please refresh the page in a few moments to see the new feeds.</em></div>"
+        # Only one import runs at a time; clear out the last one once it has finished
+        previous_import = executor.futures._futures.get("opml_import")
+        if previous_import is not None:
+            if not previous_import.done():
+                return "<div class='feedback-message warning'>An OPML import is already running</div>"
+            executor.futures.pop("opml_import")
+
+        # Read the outlines while the upload is still open; the import itself runs in the background
+        feed_urls = [feed['url'] for feed in iter_opml_feeds(uploaded_file.stream)]
+        if not feed_urls:
+            return "<div class='feedback-message warning'>No feeds found in OPML file</div>"
+
+        executor.submit_stored("opml_import", import_feed_urls, feed_urls)
+        return ("<div class='feedback-message success'>Processing OPML file...</div>"
+                "<div hx-get='/opml_import_status' hx-trigger='load delay:1s' hx-swap='outerHTML'></div>")
     except Exception as e:
         return f"<div class='feedback-message error'>Error processing OPML file: {str(e)}</div>"
 
 
+@app.route("/opml_import_status")
+def opml_import_status():
+    progress = get_opml_import_progress()
+    summary = f"{progress['done']} of {progress['total']} feeds checked, {progress['failed']} failed"
+    if progress['state'] == 'running':
+        phase = progress['phase'] or 'working'
+        return (f"<div hx-get='/opml_import_status' hx-trigger='every 1s' hx-swap='outerHTML'>"
+                f"<progress value='{progress['done']}' max='{progress['total'] or 1}'></progress> "
+                f"{summary} ({phase})</div>")
+    return (f"<div class='feedback-message success'>Import finished: {progress['added']} feeds added, "
+            f"{progress['skipped']} already subscribed, {progress['failed']} failed. "
+            f"<em>Refresh the page to see the new feeds.</em></div>")
+
+
 @app.route("/add_feed", methods=["POST"])
 def add_feed_route():
     feed_url = request.form.get("feed_url", "").strip()
@@ -259,6 +332,25 @@ def delete_feed(feed_id):
     return "", 200
 
 
+@app.route("/unpause_feed/<int:feed_id>", methods=["POST"])
+def unpause_feed_route(feed_id):
+    # The paused feed's row is removed by hx-swap once it is back in rotation
+    if unpause_feed(feed_id):
+        return "", 200
+    return "<td colspan='3'>Error unpausing feed</td>", 500
+
+
+@app.route("/set_feed_max_items/<int:feed_id>", methods=["POST"])
+def set_feed_max_items_route(feed_id):
+    # An empty value puts the feed back on the global cap
+    max_items = request.form.get("max_items", "").strip()
+    if max_items and (not max_items.isdigit() or int(max_items) < 1):
+        return "<span class='feedback-message error'>Enter a whole number above 0</span>", 400
+    if set_feed_max_items(feed_id, max_items or None):
+        return "<span class='feedback-message success'>Saved</span>"
+    return "<span class='feedback-message error'>Error saving max items</span>", 500
+
+
 @app.route("/set_theme", methods=["POST"])
 def set_theme():
     theme_name = request.form["theme"]
@@ -305,7 +397,7 @@ def mark_all_read_route(feed_id):
         if feed_id != "all":
             feed_id = int(feed_id)
         
-        mark_feed_entries_as_read(feed_id, True)
+        updated = mark_feed_entries_as_read(feed_id, True)
         
         # Get feed name for better feedback
         if feed_id == "all":
@@ -314,12 +406,57 @@ def mark_all_read_route(feed_id):
             feed = get_feed_by_id(feed_id)
             feed_name = feed.title if feed else "Unknown Feed"
         
-        return f'<span style="color: #28a745;">✓ All entries in "{feed_name}" marked as read</span>'
+        return f'<span style="color: #28a745;">✓ All entries in "{feed_name}" marked as read ({updated} updated)</span>'
     except Exception as e:
         print(f"Error marking entries as read: {e}")
         return '<span style="color: #dc3545;">✗ Error marking entries as read</span>', 500
 
 
+def read_state_response(updated, read_status):
+    """Report how many entries changed: a status message for HTMX, JSON otherwise."""
+    if request.headers.get('HX-Request'):
+        state = "read" if read_status else "unread"
+        return f'<span style="color: #28a745;">✓ {updated} entries marked as {state}</span>'
+    return jsonify({"updated": updated})
+
+
+def requested_read_status():
+    """The read flag asked for by the form, read unless read=false is posted."""
+    return request.form.get("read", "true").lower() not in ("0", "false", "no")
+
+
+@app.route("/mark_read", methods=["POST"])
+def mark_read_route():
+    """Mark a batch of entries, e.g. the cards currently shown, in one request."""
+    try:
+        entry_ids = [int(entry_id) for entry_id in request.form.getlist("entry_id")]
+    except ValueError:
+        return "Invalid entry id", 400
+    read_status = requested_read_status()
+    return read_state_response(mark_entries_read(entry_ids, read_status), read_status)
+
+
+@app.route("/mark_read/<feed_id>/before", methods=["POST"])
+def mark_read_before_route(feed_id):
+    """Mark entries published before a timestamp, or older than a number of days."""
+    try:
+        if request.form.get("days"):
+            before = datetime.now() - timedelta(days=float(request.form["days"]))
+        else:
+            before = datetime.fromisoformat(request.form["before"])
+    except (KeyError, ValueError, OverflowError):
+        return "Provide before as an ISO timestamp or days as a number", 400
+    read_status = requested_read_status()
+    return read_state_response(mark_entries_read_before(before, feed_id, read_status), read_status)
+
+
+@app.route("/mark_read/<feed_id>/through/<int:entry_id>", methods=["POST"])
+def mark_read_through_route(feed_id, entry_id):
+    """Mark everything in a feed's list from the top down to an entry."""
+    read_status = requested_read_status()
+    return read_state_response(mark_entries_read_through(entry_id, feed_id, read_status), read_status)
+
+
 @app.route("/toggle_feed_pin_entries/<int:feed_id>", methods=["POST"])
 def toggle_feed_pin_entries_route(feed_id):
     """Toggle the pinned status of a feed from entries page."""
@@ -370,24 +507,42 @@ def fetch_full_article_route(entry_id):
 
 @app.route("/favicon/<int:feed_id>")
 def serve_favicon(feed_id):
-    """Serve favicon from database."""
+    """Serve a feed's favicon from the favicon store, normalized to the requested size."""
+    size = request.args.get('size', type=int)
+    if size not in FAVICON_SIZES:
+        size = FAVICON_SIZE
+
     session = Session()
     try:
-        feed = session.query(RssFeed).filter_by(id=feed_id).first()
-        if feed and feed.favicon_data:
-            response = Response(
-                feed.favicon_data,
-                mimetype=feed.favicon_mime_type or 'image/x-icon'
-            )
-            # Cache for 1 hour
-            response.headers['Cache-Control'] = 'public, max-age=3600'
-            return response
-        else:
-            # Return 404 if no favicon found
-            return '', 404
+        feed = (
+            session.query(RssFeed.title, RssFeed.favicon_hash, RssFeed.favicon_mime_type)
+            .filter_by(id=feed_id)
+            .first()
+        )
     finally:
         session.close()
 
+    if not feed or not feed.favicon_hash:
+        # Return 404 if no favicon found
+        return '', 404
+    path, mimetype = get_favicon_file(feed.favicon_hash, size, feed.favicon_mime_type, feed.title)
+    if not path:
+        return '', 404
+
+    # The icon's hash is its ETag, so unchanged icons revalidate with a 304
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        etag=f"{feed.favicon_hash}-{size}",
+        conditional=True,
+    )
+    if request.args.get('v') == feed.favicon_hash:
+        # Hash-versioned URLs never change content, so browsers need not revalidate them
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
+
 
 @app.route("/refresh_favicons", methods=["POST"])
 def refresh_favicons():
@@ -450,7 +605,12 @@ def refresh_status(task_id):
                 </div>
                 """
         else:
-            return '<p>⏳ Refresh in progress...</p>'
+            progress = get_favicon_refresh_progress()
+            if progress['state'] != 'running' or not progress['total']:
+                return '<p>⏳ Refresh in progress...</p>'
+            return (f"<p>⏳ Refresh in progress: {progress['done']} of {progress['total']} sites checked "
+                    f"({progress['updated']} updated, {progress['unchanged']} unchanged, "
+                    f"{progress['failed']} failed)</p>")
             
     except Exception as e:
         return f'<p>Error checking status: {str(e)}</p>'
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark read latency while a refresh is writing, under each SQLite storage profile.
+
+For every profile in models.storage_profile.STORAGE_PROFILES a fresh
+database is seeded with feeds and entries. A writer thread then commits
+batches of new entries the way the refresh writer does, while the main
+thread repeatedly loads the feed list and the first "All Feeds" page
+through the same service calls the pages use. Read latency percentiles
+and failed reads are reported per profile.
+
+Usage:
+    python3 benchmark_storage.py [--feeds 50] [--entries 200] [--seconds 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from models import Base, RssFeed, RssEntry
+from models.storage_profile import STORAGE_PROFILES, apply_storage_profile, read_pragmas
+from services import entry_service, feed_service
+from services.entry_service import get_feed_entries_page
+from services.feed_service import get_all_feeds
+from services.health_service import percentile
+from services.parse_service import search_text
+from services.search_service import index_entries
+from services.stats_service import ensure_feed_stats, record_entries_added
+
+# Modules whose Session the benchmarked reads go through
+READ_SERVICES = (feed_service, entry_service)
+
+
+@contextmanager
+def services_bound_to(Session):
+    """Point the services' sessions at the benchmark database for the duration."""
+    saved = [service.Session for service in READ_SERVICES]
+    for service in READ_SERVICES:
+        service.Session = Session
+    try:
+        yield
+    finally:
+        for service, original in zip(READ_SERVICES, saved):
+            service.Session = original
+
+
+def seed(Session, feeds, entries_per_feed):
+    """Create feeds, each with a run of entries published an hour apart."""
+    session = Session()
+    session.execute(insert(RssFeed), [
+        {'id': feed_id, 'url': f'https://feed{feed_id}.example/rss', 'title': f'Feed {feed_id}'}
+        for feed_id in range(1, feeds + 1)
+    ])
+    now = datetime.now()
+    session.execute(insert(RssEntry), [
+        {'feed_id': feed_id, 'title': f'Entry {n}', 'link': f'https://feed{feed_id}.example/{n}',
+         'description': 'x' * 2000, 'published': now - timedelta(hours=n), 'read': n % 3 == 0}
+        for feed_id in range(1, feeds + 1) for n in range(entries_per_feed)
+    ])
+    ensure_feed_stats(session)
+    session.commit()
+    session.close()
+
+
+def write_batches(Session, feeds, stop, counts):
+    """Commit batches of 50 new entries until told to stop, like the refresh writer."""
+    batch = 0
+    while not stop.is_set():
+        batch += 1
+        rows = [
+            {'feed_id': n % feeds + 1, 'title': f'New {batch}-{n}',
+             'link': f'https://new.example/{batch}/{n}', 'description': 'y' * 2000,
+             'published': datetime.now(), 'read': False,
+             'search_text': search_text(f'New {batch}-{n}', 'y' * 2000)}
+            for n in range(50)
+        ]
+        session = Session()
+        try:
+            # Same statements as entry_service._apply_feed_record: insert, counters, search index
+            entry_ids = session.execute(
+                insert(RssEntry).returning(RssEntry.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            rows_by_feed = defaultdict(list)
+            for row in rows:
+                rows_by_feed[row['feed_id']].append(row)
+            for feed_id, feed_rows in rows_by_feed.items():
+                record_entries_added(session, feed_id, feed_rows)
+            index_entries(session, [dict(row, id=entry_id) for row, entry_id in zip(rows, entry_ids)])
+            session.commit()
+            counts['batches'] += 1
+        except Exception:
+            session.rollback()
+            counts['errors'] += 1
+        finally:
+            session.close()
+
+
+def read_once():
+    """Load the feed list and the first "All Feeds" page, as the index and entries pages do."""
+    get_all_feeds()
+    get_feed_entries_page("all")
+
+
+def run_profile(profile, feeds, entries_per_feed, seconds):
+    """Benchmark one profile on a fresh database file and return its results."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        engine = create_engine(f"sqlite:///{os.path.join(temp_dir, 'bench.db')}")
+        apply_storage_profile(engine, profile)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        seed(Session, feeds, entries_per_feed)
+        with engine.connect() as connection:
+            pragmas = read_pragmas(connection)
+
+        stop = threading.Event()
+        write_counts = {'batches': 0, 'errors': 0}
+        writer = threading.Thread(target=write_batches, args=(Session, feeds, stop, write_counts))
+        writer.start()
+
+        latencies = []
+        read_errors = 0
+        deadline = time.monotonic() + seconds
+        with services_bound_to(Session):
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    read_once()
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except Exception:
+                    read_errors += 1
+
+        stop.set()
+        writer.join()
+        engine.dispose()
+
+    return {
+        'profile': profile,
+        'pragmas': pragmas,
+        'reads': len(latencies),
+        'read_errors': read_errors,
+        'p50_ms': percentile(latencies, 0.5),
+        'p95_ms': percentile(latencies, 0.95),
+        'max_ms': max(latencies) if latencies else None,
+        'write_batches': write_counts['batches'],
+        'write_errors': write_counts['errors'],
+    }
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--feeds", type=int, default=50, help="Feeds to seed")
+    arg_parser.add_argument("--entries", type=int, default=200, help="Entries to seed per feed")
+    arg_parser.add_argument("--seconds", type=float, default=5, help="How long to benchmark each profile")
+    args = arg_parser.parse_args()
+
+    print(f"Seeding {args.feeds} feeds x {args.entries} entries, {args.seconds:g}s per profile")
+    results = [
+        run_profile(profile, args.feeds, args.entries, args.seconds)
+        for profile in STORAGE_PROFILES
+    ]
+
+    print(f"\n{'profile':<10} {'reads':>7} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+          f"{'writes':>7} {'w.err':>6}")
+    for result in results:
+        print(f"{result['profile']:<10} {result['reads']:>7} {result['read_errors']:>7} "
+              f"{format_ms(result['p50_ms']):>8} {format_ms(result['p95_ms']):>8} "
+              f"{format_ms(result['max_ms']):>8} {result['write_batches']:>7} {result['write_errors']:>6}")
+    for result in results:
+        print(f"\n{result['profile']}: " + ", ".join(f"{name}={value}" for name, value in result['pragmas'].items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
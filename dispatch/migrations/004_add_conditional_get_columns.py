@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Migration 004: Add conditional GET validator columns to rss_feeds table.
+
+Stores the ETag and Last-Modified values returned by each feed so that
+refreshes can send them back and skip unchanged feeds on a 304 response.
+"""
+
+import os
+import sys
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Session
+
+# Migration metadata
+MIGRATION_ID = "004"
+MIGRATION_NAME = "add_conditional_get_columns"
+MIGRATION_DESCRIPTION = "Add etag and modified columns to rss_feeds table"
+
+NEW_COLUMNS = [
+    ("etag", "VARCHAR"),
+    ("modified", "VARCHAR"),
+]
+
+
+def run_migration():
+    """Run the migration - standardized interface for migration runner."""
+    session = Session()
+
+    try:
+        print(f"Starting migration {MIGRATION_ID}: {MIGRATION_DESCRIPTION}")
+
+        for column_name, column_type in NEW_COLUMNS:
+            try:
+                session.execute(text(f'ALTER TABLE rss_feeds ADD COLUMN {column_name} {column_type}'))
+                print(f"Added {column_name} column to rss_feeds")
+            except OperationalError as e:
+                if "duplicate column name" in str(e).lower():
+                    print(f"{column_name} column already exists")
+                elif "no such table" in str(e).lower():
+                    print("rss_feeds table doesn't exist yet - will be created by SQLAlchemy")
+                    return True
+                else:
+                    raise e
+
+        session.commit()
+        print(f"Migration {MIGRATION_ID} completed successfully")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        print(f"Migration {MIGRATION_ID} failed: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def main():
+    """Run the migration - legacy interface."""
+    try:
+        return run_migration()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
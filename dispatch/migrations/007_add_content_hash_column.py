@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Migration 007: Add content_hash column to rss_feeds table.
+
+Stores a digest of the last feed body that was parsed so refreshes can
+skip parsing when a server returns the same document again.
+"""
+
+import os
+import sys
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Session
+
+# Migration metadata
+MIGRATION_ID = "007"
+MIGRATION_NAME = "add_content_hash_column"
+MIGRATION_DESCRIPTION = "Add content_hash column to rss_feeds table"
+
+NEW_COLUMNS = [
+    ("content_hash", "VARCHAR(64)"),
+]
+
+
+def run_migration():
+    """Run the migration - standardized interface for migration runner."""
+    session = Session()
+
+    try:
+        print(f"Starting migration {MIGRATION_ID}: {MIGRATION_DESCRIPTION}")
+
+        for column_name, column_type in NEW_COLUMNS:
+            try:
+                session.execute(text(f'ALTER TABLE rss_feeds ADD COLUMN {column_name} {column_type}'))
+                print(f"Added {column_name} column to rss_feeds")
+            except OperationalError as e:
+                if "duplicate column name" in str(e).lower():
+                    print(f"{column_name} column already exists")
+                elif "no such table" in str(e).lower():
+                    print("rss_feeds table doesn't exist yet - will be created by SQLAlchemy")
+                    return True
+                else:
+                    raise e
+
+        session.commit()
+        print(f"Migration {MIGRATION_ID} completed successfully")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        print(f"Migration {MIGRATION_ID} failed: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def main():
+    """Run the migration - legacy interface."""
+    try:
+        return run_migration()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Migration 009: Move favicons out of rss_feeds into the favicon store.
+
+Adds the favicon_hash column, writes every favicon_data blob to the
+content-addressed favicon store on disk and records its hash, then clears
+favicon_data so feed rows no longer carry image bytes. Feeds are processed
+a batch at a time so the blobs are never all in memory at once.
+"""
+
+import os
+import sys
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Session
+from services.favicon_service import store_favicon
+
+# Migration metadata
+MIGRATION_ID = "009"
+MIGRATION_NAME = "move_favicons_to_store"
+MIGRATION_DESCRIPTION = "Move favicon blobs from rss_feeds into the on-disk favicon store"
+
+NEW_COLUMNS = [
+    ("favicon_hash", "VARCHAR(64)"),
+]
+
+BATCH_SIZE = 100
+
+
+def run_migration():
+    """Run the migration - standardized interface for migration runner."""
+    session = Session()
+
+    try:
+        print(f"Starting migration {MIGRATION_ID}: {MIGRATION_DESCRIPTION}")
+
+        for column_name, column_type in NEW_COLUMNS:
+            try:
+                session.execute(text(f'ALTER TABLE rss_feeds ADD COLUMN {column_name} {column_type}'))
+                print(f"Added {column_name} column to rss_feeds")
+            except OperationalError as e:
+                if "duplicate column name" in str(e).lower():
+                    print(f"{column_name} column already exists")
+                elif "no such table" in str(e).lower():
+                    print("rss_feeds table doesn't exist yet - will be created by SQLAlchemy")
+                    return True
+                else:
+                    raise e
+        session.commit()
+
+        moved = 0
+        while True:
+            rows = session.execute(text(
+                'SELECT id, favicon_data FROM rss_feeds WHERE favicon_data IS NOT NULL LIMIT :limit'
+            ), {'limit': BATCH_SIZE}).fetchall()
+            if not rows:
+                break
+            for feed_id, favicon_data in rows:
+                session.execute(
+                    text('UPDATE rss_feeds SET favicon_hash = :hash, favicon_data = NULL WHERE id = :id'),
+                    {'hash': store_favicon(bytes(favicon_data)), 'id': feed_id},
+                )
+            session.commit()
+            moved += len(rows)
+
+        print(f"Moved {moved} favicons to the favicon store")
+        print(f"Migration {MIGRATION_ID} completed successfully")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        print(f"Migration {MIGRATION_ID} failed: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def main():
+    """Run the migration - legacy interface."""
+    try:
+        return run_migration()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
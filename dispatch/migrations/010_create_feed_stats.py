@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Migration 010: Create the feed_stats table.
+
+Holds per-feed total, unread and read entry counts and the newest
+publication date, kept up to date as entries change so the feed list does
+not scan rss_entries. Existing feeds get their counters computed from
+their entries.
+"""
+
+import os
+import sys
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Session
+
+# Migration metadata
+MIGRATION_ID = "010"
+MIGRATION_NAME = "create_feed_stats"
+MIGRATION_DESCRIPTION = "Create feed_stats table of per-feed entry counters"
+
+
+def run_migration():
+    """Run the migration - standardized interface for migration runner."""
+    session = Session()
+
+    try:
+        print(f"Starting migration {MIGRATION_ID}: {MIGRATION_DESCRIPTION}")
+
+        session.execute(text(
+            'CREATE TABLE IF NOT EXISTS feed_stats ('
+            'feed_id INTEGER NOT NULL PRIMARY KEY REFERENCES rss_feeds (id), '
+            'total_count INTEGER NOT NULL, '
+            'unread_count INTEGER NOT NULL, '
+            'read_count INTEGER NOT NULL, '
+            'latest_published DATETIME)'
+        ))
+
+        try:
+            result = session.execute(text(
+                'INSERT OR IGNORE INTO feed_stats '
+                '(feed_id, total_count, unread_count, read_count, latest_published) '
+                'SELECT rss_feeds.id, COUNT(rss_entries.id), '
+                'COUNT(rss_entries.id) - COALESCE(SUM(CASE WHEN rss_entries.read = 1 THEN 1 ELSE 0 END), 0), '
+                'COALESCE(SUM(CASE WHEN rss_entries.read = 1 THEN 1 ELSE 0 END), 0), '
+                'MAX(rss_entries.published) '
+                'FROM rss_feeds LEFT OUTER JOIN rss_entries ON rss_entries.feed_id = rss_feeds.id '
+                'GROUP BY rss_feeds.id'
+            ))
+            print(f"Computed counters for {result.rowcount} feeds")
+        except OperationalError as e:
+            if "no such table" in str(e).lower():
+                print("rss_feeds table doesn't exist yet - will be created by SQLAlchemy")
+            else:
+                raise e
+
+        session.commit()
+        print(f"Migration {MIGRATION_ID} completed successfully")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        print(f"Migration {MIGRATION_ID} failed: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def main():
+    """Run the migration - legacy interface."""
+    try:
+        return run_migration()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
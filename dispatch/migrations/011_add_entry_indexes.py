@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Migration 011: Add indexes for the hot rss_entries queries.
+
+Entry lists filter by feed and sort newest first, the "All Feeds" list
+sorts every entry newest first, ingest probes (feed_id, link) and marking
+a feed read only touches unread entries. Without these indexes each of
+those queries scans the whole rss_entries table.
+"""
+
+import os
+import sys
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Session
+
+# Migration metadata
+MIGRATION_ID = "011"
+MIGRATION_NAME = "add_entry_indexes"
+MIGRATION_DESCRIPTION = "Add composite and partial indexes on rss_entries"
+
+NEW_INDEXES = [
+    ("ix_rss_entries_feed_published", "(feed_id, published DESC)"),
+    ("ix_rss_entries_published", "(published DESC)"),
+    ("ix_rss_entries_feed_link", "(feed_id, link)"),
+    ("ix_rss_entries_unread", "(feed_id) WHERE read IS NOT 1"),
+]
+
+
+def run_migration():
+    """Run the migration - standardized interface for migration runner."""
+    session = Session()
+
+    try:
+        print(f"Starting migration {MIGRATION_ID}: {MIGRATION_DESCRIPTION}")
+
+        for index_name, definition in NEW_INDEXES:
+            try:
+                session.execute(text(f'CREATE INDEX IF NOT EXISTS {index_name} ON rss_entries {definition}'))
+                print(f"Created index {index_name}")
+            except OperationalError as e:
+                if "no such table" in str(e).lower():
+                    print("rss_entries table doesn't exist yet - will be created by SQLAlchemy")
+                    return True
+                else:
+                    raise e
+
+        # Give the query planner fresh statistics for the new indexes
+        session.execute(text('ANALYZE rss_entries'))
+
+        session.commit()
+        print(f"Migration {MIGRATION_ID} completed successfully")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        print(f"Migration {MIGRATION_ID} failed: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def main():
+    """Run the migration - legacy interface."""
+    try:
+        return run_migration()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
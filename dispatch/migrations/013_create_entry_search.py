@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Migration 013: Create the entry_search full-text index.
+
+An FTS5 table over each entry's title and the plain text of its
+description and content, with a trigger that drops index rows when their
+entry is deleted. Existing entries are indexed in chunks, each committed
+on its own, so a large database is never held in one transaction.
+"""
+
+import os
+import sys
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+# Add the parent directory to the path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import Session, ENTRY_SEARCH_DDL
+from services.search_service import rebuild_search_index
+
+# Migration metadata
+MIGRATION_ID = "013"
+MIGRATION_NAME = "create_entry_search"
+MIGRATION_DESCRIPTION = "Create the entry_search FTS5 index and index existing entries"
+
+BATCH_SIZE = 500
+
+
+def run_migration():
+    """Run the migration - standardized interface for migration runner."""
+    session = Session()
+
+    try:
+        print(f"Starting migration {MIGRATION_ID}: {MIGRATION_DESCRIPTION}")
+
+        try:
+            for statement in ENTRY_SEARCH_DDL:
+                session.execute(text(statement))
+            session.commit()
+            print("Created entry_search index")
+        except OperationalError as e:
+            if "no such table" in str(e).lower():
+                session.rollback()
+                print("rss_entries table doesn't exist yet - will be created by SQLAlchemy")
+                return True
+            else:
+                raise e
+
+        if rebuild_search_index(BATCH_SIZE) < 0:
+            return False
+
+        print(f"Migration {MIGRATION_ID} completed successfully")
+        return True
+
+    except Exception as e:
+        session.rollback()
+        print(f"Migration {MIGRATION_ID} failed: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def main():
+    """Run the migration - legacy interface."""
+    try:
+        return run_migration()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -160,6 +160,22 @@ def create_migration_table():
         print(f"❌ Error creating migration table: {e}")
         return False
 
+def create_missing_tables():
+    """
+    Create any model tables the database doesn't have yet.
+
+    Tables added to the models after a database was first initialised are
+    not created by a migration; existing tables are left untouched.
+    """
+    try:
+        from models import Base, engine
+
+        Base.metadata.create_all(engine)
+        return True
+    except Exception as e:
+        print(f"❌ Error creating missing tables: {e}")
+        return False
+
 def is_migration_applied(migration_id):
     """
     Check if a migration has already been applied.
@@ -314,6 +330,9 @@ def run_migrations():
             print(f"❌ Migration {migration_id} failed with exception: {e}")
             return False
     
+    if not create_missing_tables():
+        return False
+
     print(f"\n🎉 Migration process completed!")
     print(f"   ✅ {success_count} migration(s) applied")
     print(f"   ⏭️  {skip_count} migration(s) skipped (already applied)")
@@ -8,7 +8,17 @@ from .model import (
     Base,
     RssFeed,
     RssEntry,
+    FeedFetchLog,
+    FeedStats,
+    EntryReadOverride,
+    FaviconHost,
     Settings,
+    read_watermark_covers,
+    entry_read_state,
+    join_read_state,
+    watermark_covers_new_entry,
+    ENTRY_SEARCH_TABLE,
+    ENTRY_SEARCH_DDL,
     engine,
     Session,
     init_database,
@@ -19,7 +29,17 @@ __all__ = [
     'Base',
     'RssFeed', 
     'RssEntry',
+    'FeedFetchLog',
+    'FeedStats',
+    'EntryReadOverride',
+    'FaviconHost',
     'Settings',
+    'read_watermark_covers',
+    'entry_read_state',
+    'join_read_state',
+    'watermark_covers_new_entry',
+    'ENTRY_SEARCH_TABLE',
+    'ENTRY_SEARCH_DDL',
     'engine',
     'Session',
     'init_database',
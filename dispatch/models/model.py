@@ -7,14 +7,24 @@ from sqlalchemy import (
     Text,
     ForeignKey,
     Boolean,
+    Float,
     func,
     LargeBinary,
+    Index,
+    text,
+    and_,
+    or_,
+    case,
+    event,
+    DDL,
 )
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import sessionmaker, relationship, deferred
 import datetime
 import os
 
+from models.storage_profile import apply_storage_profile
+
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///data/rss_database.db")
 
@@ -30,19 +40,33 @@ class RssFeed(Base):
     link = Column(String)  # URL of the feed's website
     description = Column(Text)  # A brief description of the feed
     published = Column(DateTime)  # The publication date of the feed
-    favicon_path = Column(String)  # URL of the feed's favicon (deprecated, use favicon_data)
-    favicon_data = Column(LargeBinary)  # Binary data of the favicon
+    favicon_path = Column(String)  # URL of the feed's favicon (deprecated, use favicon_hash)
+    favicon_data = deferred(Column(LargeBinary))  # Binary data of the favicon (deprecated, moved to the favicon store)
+    favicon_hash = Column(String(64))  # SHA-256 of the favicon in the favicon store
     favicon_mime_type = Column(String(50))  # MIME type of the favicon
     last_updated = Column(DateTime, default=datetime.datetime.utcnow)
     last_new_article_found = Column(DateTime)  # When new articles were last found
     pinned = Column(Boolean, default=False)  # Whether the feed is pinned to the top
+    etag = Column(String)  # ETag validator from the last successful fetch
+    modified = Column(String)  # Last-Modified validator from the last successful fetch
+    next_fetch_at = Column(DateTime)  # When the scheduler should next refresh the feed
+    content_hash = Column(String(64))  # SHA-256 of the last feed body that was parsed
+    max_items = Column(Integer)  # Per-feed cap on items ingested per fetch (NULL uses the global cap)
+    ttl = Column(Integer)  # RSS <ttl> from the last parsed document, in minutes
+    consecutive_failures = Column(Integer, default=0)  # Failed refreshes since the last success
+    last_error = Column(Text)  # Error from the most recent failed refresh
+    last_success_at = Column(DateTime)  # When the feed last refreshed successfully
+    failing_since = Column(DateTime)  # Start of the current run of failures
+    paused = Column(Boolean, default=False)  # Excluded from refreshes after failing for too long
+    read_through_published = Column(DateTime)  # Read watermark: published date of the top entry marked read
+    read_through_id = Column(Integer)  # Read watermark: id of that entry (NULL means no watermark)
 
     entries = relationship("RssEntry", back_populates="feed")
 
     def get_unread_count(self, session):
         return (
-            session.query(func.count(RssEntry.id))
-            .filter_by(feed_id=self.id, read=False)
+            join_read_state(session.query(func.count(RssEntry.id)))
+            .filter(RssEntry.feed_id == self.id, entry_read_state() == False)
             .scalar()
         )
 
@@ -51,7 +75,11 @@ class RssFeed(Base):
         total_count = session.query(func.count(RssEntry.id)).filter_by(feed_id=self.id).scalar()
         if total_count == 0:
             return 0.0
-        read_count = session.query(func.count(RssEntry.id)).filter_by(feed_id=self.id, read=True).scalar()
+        read_count = (
+            join_read_state(session.query(func.count(RssEntry.id)))
+            .filter(RssEntry.feed_id == self.id, entry_read_state() == True)
+            .scalar()
+        )
         return read_count / total_count
 
 
@@ -71,6 +99,155 @@ class RssEntry(Base):
 
     feed = relationship("RssFeed", back_populates="entries")
 
+    __table_args__ = (
+        # Entry lists per feed, newest first, and the posting history used by the scheduler
+        Index("ix_rss_entries_feed_published", "feed_id", published.desc()),
+        # The "All Feeds" list, newest first
+        Index("ix_rss_entries_published", published.desc()),
+        # Known-link lookups while ingesting
+        Index("ix_rss_entries_feed_link", "feed_id", "link"),
+        # Entries still to be marked read, per feed
+        Index("ix_rss_entries_unread", "feed_id", sqlite_where=text("read IS NOT 1")),
+    )
+
+
+# Full-text search over entries: an FTS5 table whose rowid is the entry id,
+# holding the title and the plain text of the description and content.
+# services.search_service writes its rows as entries are added or updated;
+# the trigger drops them when entries are deleted. Matches rank by bm25 with
+# the title weighted highest.
+ENTRY_SEARCH_TABLE = "entry_search"
+ENTRY_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS entry_search USING fts5("
+    "title, description, content, tokenize = 'porter unicode61 remove_diacritics 2')",
+    "INSERT INTO entry_search (entry_search, rank) VALUES ('rank', 'bm25(10.0, 4.0, 1.0)')",
+    "CREATE TRIGGER IF NOT EXISTS rss_entries_search_delete AFTER DELETE ON rss_entries "
+    "BEGIN DELETE FROM entry_search WHERE rowid = old.id; END",
+)
+
+# FTS5 tables can't be mapped, so the index is created and dropped along with rss_entries
+for _statement in ENTRY_SEARCH_DDL:
+    event.listen(RssEntry.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(
+    RssEntry.__table__, "before_drop", DDL("DROP TABLE IF EXISTS entry_search").execute_if(dialect="sqlite")
+)
+
+class EntryReadOverride(Base):
+    __tablename__ = "entry_read_overrides"
+
+    entry_id = Column(Integer, ForeignKey("rss_entries.id"), primary_key=True)
+    feed_id = Column(Integer, ForeignKey("rss_feeds.id"), index=True)
+    read = Column(Boolean, nullable=False)  # Read state that wins over the feed's watermark and the entry's flag
+
+
+def read_watermark_covers():
+    """
+    SQL condition: the entry sits at or below its feed's read watermark.
+
+    Entry lists run newest first by published date, ties by id, undated
+    entries last. A feed's watermark is the entry that was at the top of
+    its list when it was marked all read; that entry and everything after
+    it in list order count as read. Needs rss_feeds joined to the entry.
+    """
+    return and_(
+        RssFeed.read_through_id.isnot(None),
+        or_(
+            and_(
+                RssFeed.read_through_published.isnot(None),
+                or_(
+                    RssEntry.published < RssFeed.read_through_published,
+                    and_(RssEntry.published == RssFeed.read_through_published,
+                         RssEntry.id >= RssFeed.read_through_id),
+                    RssEntry.published.is_(None),
+                ),
+            ),
+            and_(
+                RssFeed.read_through_published.is_(None),
+                RssEntry.published.is_(None),
+                RssEntry.id >= RssFeed.read_through_id,
+            ),
+        ),
+    )
+
+
+def entry_read_state():
+    """
+    SQL expression for whether an entry is read.
+
+    An override row wins; otherwise entries covered by the feed's watermark
+    are read, and the rest use their own read flag. Use with join_read_state.
+    """
+    return case(
+        (EntryReadOverride.entry_id.isnot(None), EntryReadOverride.read),
+        (read_watermark_covers(), True),
+        else_=func.coalesce(RssEntry.read, False),
+    )
+
+
+def join_read_state(query):
+    """Join what entry_read_state needs onto a query over rss_entries."""
+    return (
+        query.join(RssFeed, RssFeed.id == RssEntry.feed_id)
+        .outerjoin(EntryReadOverride, EntryReadOverride.entry_id == RssEntry.id)
+    )
+
+
+def watermark_covers_new_entry(feed, published):
+    """
+    Whether an entry about to be added would already be covered by a feed's watermark.
+
+    New entries get higher ids than the watermark entry, so on a published
+    date tie they sort below it. Time zones are ignored, as SQLite stores
+    dates without them.
+
+    Args:
+        feed: RssFeed, or any object with read_through_published and read_through_id
+        published: The new entry's publication date
+    """
+    if feed.read_through_id is None:
+        return False
+    if feed.read_through_published is None:
+        return published is None
+    return published is None or published.replace(tzinfo=None) <= feed.read_through_published.replace(tzinfo=None)
+
+
+class FeedFetchLog(Base):
+    __tablename__ = "feed_fetch_log"
+
+    id = Column(Integer, primary_key=True)
+    feed_id = Column(Integer, ForeignKey("rss_feeds.id"), index=True)
+    started_at = Column(DateTime, index=True)  # When the download started
+    connect_ms = Column(Float)  # DNS, TCP and TLS setup (NULL when a pooled connection was reused)
+    download_ms = Column(Float)  # Request sent to body received, including retries
+    parse_ms = Column(Float)  # Time spent in feedparser and building entry rows
+    db_ms = Column(Float)  # Time spent applying the result to the database
+    status = Column(Integer)  # HTTP status code, NULL if no response was received
+    bytes = Column(Integer)  # Size of the response body
+    entries_seen = Column(Integer)  # Entries kept from the parsed document
+    entries_added = Column(Integer)  # Entries that were new and stored
+    error = Column(Text)  # Why the refresh failed, if it did
+
+
+class FeedStats(Base):
+    __tablename__ = "feed_stats"
+
+    feed_id = Column(Integer, ForeignKey("rss_feeds.id"), primary_key=True)
+    total_count = Column(Integer, nullable=False, default=0)  # Entries stored for the feed
+    unread_count = Column(Integer, nullable=False, default=0)  # Entries not marked read
+    read_count = Column(Integer, nullable=False, default=0)  # Entries marked read
+    latest_published = Column(DateTime)  # Publication date of the newest entry
+
+
+class FaviconHost(Base):
+    __tablename__ = "favicon_hosts"
+
+    host = Column(String, primary_key=True)  # Site host the icon belongs to, e.g. example.com
+    icon_url = Column(String)  # Where the icon was found
+    etag = Column(String)  # ETag validator from the last icon download
+    last_modified = Column(String)  # Last-Modified validator from the last icon download
+    checked_at = Column(DateTime)  # When the icon was last checked
+
+
 class Settings(Base):
     __tablename__ = "settings"
 
@@ -91,6 +268,7 @@ class Settings(Base):
 
 # Create engine but don't create tables at import time
 engine = create_engine(DATABASE_URL)
+apply_storage_profile(engine)
 
 def init_database():
     """Initialize the database by creating all tables."""
@@ -0,0 +1,87 @@
+"""
+SQLite connection settings applied to every pooled connection.
+
+SQLite's defaults suit a single short-lived process: a rollback journal
+that blocks readers while a refresh commits, fsync on every commit and a
+small page cache. The "tuned" profile switches to write-ahead logging so
+readers never wait for the writer, waits on a busy lock instead of failing
+with "database is locked", and memory-maps the database file. Each pragma
+can be overridden with an environment variable, and the "default" profile
+leaves SQLite's own settings alone for comparison.
+"""
+
+import os
+
+from sqlalchemy import event
+
+
+SQLITE_JOURNAL_MODE = os.getenv("DISPATCH_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("DISPATCH_SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("DISPATCH_SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("DISPATCH_SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Negative values are in KiB rather than pages
+SQLITE_CACHE_SIZE = int(os.getenv("DISPATCH_SQLITE_CACHE_SIZE", "-65536"))
+SQLITE_TEMP_STORE = os.getenv("DISPATCH_SQLITE_TEMP_STORE", "MEMORY")
+SQLITE_FOREIGN_KEYS = os.getenv("DISPATCH_SQLITE_FOREIGN_KEYS", "true").lower() in ("1", "true", "yes")
+
+STORAGE_PROFILES = {
+    "tuned": {
+        "journal_mode": SQLITE_JOURNAL_MODE,
+        "synchronous": SQLITE_SYNCHRONOUS,
+        "busy_timeout": SQLITE_BUSY_TIMEOUT_MS,
+        "mmap_size": SQLITE_MMAP_SIZE,
+        "cache_size": SQLITE_CACHE_SIZE,
+        "temp_store": SQLITE_TEMP_STORE,
+        "foreign_keys": "ON" if SQLITE_FOREIGN_KEYS else "OFF",
+    },
+    "default": {},
+}
+
+STORAGE_PROFILE = os.getenv("DISPATCH_SQLITE_PROFILE", "tuned")
+
+
+def apply_storage_profile(engine, profile=None):
+    """
+    Run a profile's pragmas on every new connection the engine opens.
+
+    Args:
+        engine: SQLAlchemy engine; engines for other databases are left alone
+        profile: Name of a profile in STORAGE_PROFILES (defaults to STORAGE_PROFILE)
+
+    Returns:
+        dict: The pragmas that will be applied
+    """
+    if engine.dialect.name != "sqlite":
+        return {}
+
+    name = profile or STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        print(f"Unknown SQLite storage profile {name!r}, using SQLite defaults")
+        name = "default"
+    pragmas = STORAGE_PROFILES[name]
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma, value in pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        finally:
+            cursor.close()
+
+    return pragmas
+
+
+def read_pragmas(connection, names=None):
+    """
+    Read back the current value of each pragma on a connection.
+
+    Args:
+        connection: SQLAlchemy connection
+        names: Pragmas to read (defaults to those set by the tuned profile)
+
+    Returns:
+        dict: Pragma name to value
+    """
+    names = names or STORAGE_PROFILES["tuned"].keys()
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
@@ -4,6 +4,15 @@ Services package for the RSS dispatch application.
 This package contains service modules that handle different aspects of the application:
 - feed_service: RSS feed management operations
 - entry_service: RSS entry processing and management
+- http_service: Shared pooled HTTP client with timeouts and retries
+- fetch_service: Concurrent asynchronous feed downloads
+- parse_service: Feed parsing in worker processes
+- writer_service: Single database writer thread with grouped commits
+- health_service: Feed health reporting from the refresh log
+- stats_service: Per-feed entry counters maintained alongside entry changes
+- read_state_service: Marking entries read or unread in bulk, and the per-feed read watermark
+- search_service: Full-text search over entries with SQLite FTS5
+- favicon_service: Favicon store and concurrent favicon refresh grouped by host
 - opml_service: OPML import/export functionality
 - theme_service: Theme management and configuration
 - content_service: Content formatting and processing utilities
@@ -15,8 +24,10 @@ from .feed_service import (
     remove_feed,
     get_all_feeds,
     get_feed_by_id,
-    get_favicon_url,
     toggle_feed_pin,
+    set_feed_max_items,
+    get_paused_feeds,
+    unpause_feed,
     get_feed_sort_preference,
     set_feed_sort_preference
 )
@@ -28,14 +39,50 @@ from .entry_service import (
     get_all_feed_entries,
     get_feed_entry_by_id,
     get_feed_entries_by_feed_id,
+    get_feed_entries_page,
     update_entry,
     get_remote_content,
     mark_entry_as_read,
     mark_feed_entries_as_read
 )
 
+from .fetch_service import (
+    fetch_feeds
+)
+
+from .health_service import (
+    get_feed_health,
+    get_daily_fetch_totals
+)
+
+from .stats_service import (
+    rebuild_feed_stats
+)
+
+from .read_state_service import (
+    mark_entries_read,
+    mark_entries_read_before,
+    mark_entries_read_through,
+    mark_feed_read
+)
+
+from .search_service import (
+    search_entries,
+    rebuild_search_index
+)
+
+from .favicon_service import (
+    get_favicon_url,
+    refresh_all_feed_favicons,
+    refresh_favicons_for_feeds,
+    get_favicon_refresh_progress
+)
+
 from .opml_service import (
     add_feeds_from_opml,
+    iter_opml_feeds,
+    import_feed_urls,
+    get_opml_import_progress,
     export_feeds_to_opml
 )
 
@@ -63,8 +110,10 @@ __all__ = [
     'remove_feed',
     'get_all_feeds',
     'get_feed_by_id',
-    'get_favicon_url',
     'toggle_feed_pin',
+    'set_feed_max_items',
+    'get_paused_feeds',
+    'unpause_feed',
     'get_feed_sort_preference',
     'set_feed_sort_preference',
     
@@ -75,13 +124,43 @@ __all__ = [
     'get_all_feed_entries',
     'get_feed_entry_by_id',
     'get_feed_entries_by_feed_id',
+    'get_feed_entries_page',
     'update_entry',
     'get_remote_content',
     'mark_entry_as_read',
     'mark_feed_entries_as_read',
     
+    # Fetch service
+    'fetch_feeds',
+    
+    # Health service
+    'get_feed_health',
+    'get_daily_fetch_totals',
+    
+    # Stats service
+    'rebuild_feed_stats',
+    
+    # Read state service
+    'mark_entries_read',
+    'mark_entries_read_before',
+    'mark_entries_read_through',
+    'mark_feed_read',
+    
+    # Search service
+    'search_entries',
+    'rebuild_search_index',
+    
+    # Favicon service
+    'get_favicon_url',
+    'refresh_all_feed_favicons',
+    'refresh_favicons_for_feeds',
+    'get_favicon_refresh_progress',
+    
     # OPML service
     'add_feeds_from_opml',
+    'iter_opml_feeds',
+    'import_feed_urls',
+    'get_opml_import_progress',
     'export_feeds_to_opml',
     
     # Theme service
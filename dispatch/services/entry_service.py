@@ -1,115 +1,274 @@
-import feedparser
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin
-from models import RssFeed, RssEntry, Session
-from sqlalchemy import desc
+from models import RssFeed, RssEntry, FeedFetchLog, EntryReadOverride, Session, entry_read_state, join_read_state
+from sqlalchemy import desc, insert, or_
 from dateutil import parser
 from datetime import datetime, timedelta
 from readabilipy import simple_json_from_html_string
+import base64
 import concurrent.futures
-from functools import partial
+from collections import namedtuple
+import os
+import threading
+import time
+from .fetch_service import fetch_feed, fetch_feeds
+from .http_service import http_get
+from .parse_service import parse_feed_body, create_parse_executor, search_text
+from .stats_service import record_entries_added, record_entry_published
+from .read_state_service import mark_entries_read, mark_feed_read
+from .search_service import index_entries
+from .scheduler_service import compute_next_fetch_at, record_fetch_failure, record_fetch_success
+from .writer_service import BatchWriter
+
+
+LINK_LOOKUP_CHUNK_SIZE = 500
+# Newest-first feeds stop being ingested after this many already-known items in a row (0 disables)
+STOP_AFTER_KNOWN_ITEMS = int(os.getenv("DISPATCH_STOP_AFTER_KNOWN_ITEMS", "10"))
+# Rows checked per lookup while scanning a newest-first feed for known items
+KNOWN_SCAN_CHUNK_SIZE = 50
+
+# Held while a refresh-all is running so the scheduler and the UI never overlap
+_refresh_all_lock = threading.Lock()
+
+# What an entry card in a list shows; list queries load only these columns
+EntryCard = namedtuple("EntryCard", ["id", "feed_id", "title", "published", "read"])
+# The read flag resolves through the feed's read watermark and any override, so
+# list queries select from join_read_state(...)
+ENTRY_CARD_COLUMNS = (
+    RssEntry.id, RssEntry.feed_id, RssEntry.title, RssEntry.published, entry_read_state().label("read")
+)
+
+
+def get_existing_entry_links(session, feed_id, links):
+    """
+    Find which of the given links are already stored for a feed.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed
+        links: Iterable of candidate entry links
+
+    Returns:
+        set: Links that already exist for the feed
+    """
+    links = list(links)
+    existing = set()
+    # Chunk the IN clause to stay under SQLite's bound-parameter limit
+    for start in range(0, len(links), LINK_LOOKUP_CHUNK_SIZE):
+        chunk = links[start:start + LINK_LOOKUP_CHUNK_SIZE]
+        rows = session.query(RssEntry.link).filter(
+            RssEntry.feed_id == feed_id, RssEntry.link.in_(chunk)
+        )
+        existing.update(link for (link,) in rows)
+    return existing
 
 
-def add_rss_entries(feed_id):
+def select_new_rows(session, feed_id, rows, newest_first=False):
+    """
+    Pick the entry rows that are not stored for a feed yet.
+
+    For newest-first feeds the rows are scanned in document order and the
+    scan stops after STOP_AFTER_KNOWN_ITEMS known items in a row, since
+    everything after that point has been seen before. Other feeds are
+    checked with a single set-based lookup.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed
+        rows: Entry rows in document order
+        newest_first: Whether the rows are ordered newest first
+
+    Returns:
+        list: Rows whose links are not stored yet
+    """
+    if not newest_first or STOP_AFTER_KNOWN_ITEMS <= 0:
+        known_links = get_existing_entry_links(session, feed_id, (row['link'] for row in rows))
+        return [row for row in rows if row['link'] not in known_links]
+
+    new_rows = []
+    known_run = 0
+    for start in range(0, len(rows), KNOWN_SCAN_CHUNK_SIZE):
+        chunk = rows[start:start + KNOWN_SCAN_CHUNK_SIZE]
+        known_links = get_existing_entry_links(session, feed_id, (row['link'] for row in chunk))
+        for row in chunk:
+            if row['link'] not in known_links:
+                new_rows.append(row)
+                known_run = 0
+                continue
+            known_run += 1
+            if known_run >= STOP_AFTER_KNOWN_ITEMS:
+                return new_rows
+    return new_rows
+
+
+def apply_parsed_feed(session, feed_id, parsed):
+    """
+    Apply a parsed feed record to the database session without committing.
+
+    Stores the new validators, bulk-inserts the entries whose links are not
+    known yet and adds a feed_fetch_log row with the fetch timings. Called
+    on the writer thread, which commits in groups.
+
+    Args:
+        session: Database session owned by the writer
+        feed_id: The ID of the RSS feed
+        parsed: Parsed feed record from services.parse_service
+
+    Returns:
+        tuple: (success_flag, message)
+    """
+    started = time.perf_counter()
+    feed = session.query(RssFeed).filter_by(id=feed_id).first()
+
+    if not feed:
+        return False, f"Feed with ID {feed_id} not found"
+
+    success, message, entries_added = _apply_feed_record(session, feed, parsed)
+
+    metrics = parsed.get('metrics') or {}
+    session.add(FeedFetchLog(
+        feed_id=feed.id,
+        started_at=metrics.get('started_at') or datetime.now(),
+        connect_ms=metrics.get('connect_ms'),
+        download_ms=metrics.get('download_ms'),
+        parse_ms=metrics.get('parse_ms'),
+        db_ms=(time.perf_counter() - started) * 1000,
+        status=parsed['status'],
+        bytes=metrics.get('bytes'),
+        entries_seen=len(parsed['entries']),
+        entries_added=entries_added,
+        error=None if success else message,
+    ))
+    return success, message
+
+
+def _apply_feed_record(session, feed, parsed):
+    """Apply a parsed feed record to its feed, returning (success_flag, message, entries_added)."""
+    print(f"Processing feed: {feed.title}")
+
+    if parsed['error']:
+        print(f"{parsed['error']} for feed {feed.title}")
+        record_fetch_failure(feed, parsed['error'])
+        return False, parsed['error'], 0
+
+    if parsed['status'] == 304:
+        print(f"Feed not modified: {feed.title}")
+        record_fetch_success(feed)
+        feed.next_fetch_at = compute_next_fetch_at(session, feed.id, parsed['cache_headers'], feed.ttl)
+        return True, "Not modified", 0
+
+    if parsed['status'] is not None and parsed['status'] >= 400:
+        print(f"HTTP error {parsed['status']} for feed {feed.title}")
+        record_fetch_failure(feed, f"HTTP error {parsed['status']}")
+        return False, f"HTTP error {parsed['status']}", 0
+
+    record_fetch_success(feed)
+
+    # Remember the validators for the next conditional request
+    feed.etag = parsed['etag']
+    feed.modified = parsed['modified']
+
+    if parsed['unchanged']:
+        print(f"Feed content unchanged: {feed.title}")
+        # The body wasn't parsed, so schedule with the <ttl> kept from when it last was
+        feed.next_fetch_at = compute_next_fetch_at(session, feed.id, parsed['cache_headers'], feed.ttl)
+        return True, "Not modified (same content)", 0
+
+    feed.content_hash = parsed['content_hash']
+    feed.ttl = _parse_ttl(parsed['ttl'])
+
+    # Look up which links are already stored, then one bulk insert
+    new_rows = select_new_rows(session, feed.id, parsed['entries'], parsed['newest_first'])
+
+    if new_rows:
+        entry_ids = session.execute(
+            insert(RssEntry).returning(RssEntry.id, sort_by_parameter_order=True), new_rows
+        ).scalars().all()
+        record_entries_added(session, feed.id, new_rows)
+        index_entries(session, [dict(row, id=entry_id) for row, entry_id in zip(new_rows, entry_ids)])
+    entries_added = len(new_rows)
+
+    # Schedule from the posting history including the entries just added
+    feed.next_fetch_at = compute_next_fetch_at(session, feed.id, parsed['cache_headers'], feed.ttl)
+
+    # Note: last_new_article_found is now calculated dynamically based on latest entry published date
+
+    print(f"Added {entries_added} new entries for feed: {feed.title}")
+    return True, f"Added {entries_added} entries", entries_added
+
+
+def _parse_ttl(ttl):
+    """Return an RSS <ttl> as whole minutes, or None when it is missing or malformed."""
+    try:
+        return int(ttl) if ttl else None
+    except (TypeError, ValueError):
+        return None
+
+
+# All refresh results are written by this one thread so refreshes never contend for the SQLite write lock
+_feed_writer = BatchWriter(apply_parsed_feed, lambda: Session(), name="feed-writer")
+
+
+def submit_parsed_feed(feed_id, parsed):
+    """
+    Queue a parsed feed record for the writer thread.
+
+    Args:
+        feed_id: The ID of the RSS feed
+        parsed: Parsed feed record from services.parse_service
+
+    Returns:
+        concurrent.futures.Future: Resolves to (success_flag, message) once committed
+    """
+    return _feed_writer.submit(feed_id, parsed)
+
+
+def store_parsed_feed(feed_id, parsed):
+    """
+    Write a parsed feed record to the database and wait for the commit.
+
+    Args:
+        feed_id: The ID of the RSS feed
+        parsed: Parsed feed record from services.parse_service
+
+    Returns:
+        tuple: (success_flag, message)
+    """
+    try:
+        return submit_parsed_feed(feed_id, parsed).result()
+    except Exception as e:
+        print(f"Error processing feed {feed_id}: {e}")
+        return False, f"Error: {e}"
+
+
+def add_rss_entries(feed_id, fetch_result=None):
     """
     Fetches and adds RSS entries for a specific feed to the database.
     Attempts to process feeds even if parsing exceptions occur.
 
     Args:
         feed_id: The ID of the RSS feed to process
+        fetch_result: Optional response already downloaded by the fetch engine;
+                      when omitted the feed is downloaded here
 
     Returns:
         tuple: (success_flag, message)
     """
-    session = Session()
-    try:
+    if fetch_result is None:
+        session = Session()
         feed = session.query(RssFeed).filter_by(id=feed_id).first()
-        
         if not feed:
             session.close()
             return False, f"Feed with ID {feed_id} not found"
-
-        print(f"Processing feed: {feed.title}")
-        
-        try:
-            parsed_feed = feedparser.parse(feed.url)
-            
-            if hasattr(parsed_feed, 'status') and parsed_feed.status >= 400:
-                print(f"HTTP error {parsed_feed.status} for feed {feed.title}")
-                session.close()
-                return False, f"HTTP error {parsed_feed.status}"
-                
-        except Exception as parse_error:
-            print(f"Parse error for feed {feed.title}: {parse_error}")
-            session.close()
-            return False, f"Parse error: {parse_error}"
-
-        entries_added = 0
-        
-        for entry in parsed_feed.entries:
-            try:
-                # Check if entry already exists
-                existing_entry = session.query(RssEntry).filter_by(
-                    feed_id=feed_id, link=entry.link
-                ).first()
-                
-                if existing_entry:
-                    continue
-
-                # Parse published date
-                published_date = None
-                if hasattr(entry, 'published'):
-                    try:
-                        published_date = parser.parse(entry.published)
-                    except Exception as date_error:
-                        print(f"Date parse error for entry {entry.title}: {date_error}")
-                        published_date = datetime.now()
-                else:
-                    published_date = datetime.now()
-
-                # Get description/summary
-                description = ""
-                if hasattr(entry, 'summary'):
-                    description = entry.summary
-                elif hasattr(entry, 'description'):
-                    description = entry.description
-
-                # Get author
-                author = ""
-                if hasattr(entry, 'author'):
-                    author = entry.author
-
-                # Create new entry
-                rss_entry = RssEntry(
-                    feed_id=feed_id,
-                    title=entry.title,
-                    link=entry.link,
-                    description=description,
-                    published=published_date,
-                    author=author,
-                )
-                
-                session.add(rss_entry)
-                entries_added += 1
-                
-            except Exception as entry_error:
-                print(f"Error processing entry {getattr(entry, 'title', 'Unknown')}: {entry_error}")
-                continue
-
-        # Note: last_new_article_found is now calculated dynamically based on latest entry published date
-        
-        session.commit()
-        print(f"Added {entries_added} new entries for feed: {feed.title}")
-        
+        # Send back the validators from the last fetch so unchanged feeds answer 304
+        feed_info = {'id': feed.id, 'url': feed.url, 'etag': feed.etag, 'modified': feed.modified}
+        known_hash, max_items = feed.content_hash, feed.max_items
         session.close()
-        return True, f"Added {entries_added} entries"
-        
-    except Exception as e:
-        session.rollback()
-        session.close()
-        print(f"Error processing feed {feed_id}: {e}")
-        return False, f"Error: {e}"
+        fetch_result = fetch_feed(feed_info)
+    else:
+        known_hash, max_items = None, None
+
+    return store_parsed_feed(feed_id, parse_feed_body(fetch_result, known_hash, max_items))
 
 
 def add_rss_entries_for_feed(feed_id):
@@ -126,51 +285,86 @@ def add_rss_entries_for_feed(feed_id):
     return add_rss_entries(feed_id)
 
 
-def add_rss_entries_for_all_feeds(max_workers=10):
+def add_rss_entries_for_all_feeds(parse_workers=None, due_only=True):
     """
-    Process all RSS feeds in parallel, adding new entries to the database.
+    Process RSS feeds, adding new entries to the database.
+
+    The refresh runs as a pipeline: the async fetch engine downloads every
+    feed concurrently, each response body is handed to a pool of parser
+    processes as soon as it arrives, and the compact entry records they
+    return are queued for the single writer thread, which commits them in
+    groups. Only one refresh-all runs at a time.
 
     Args:
-        max_workers: Maximum number of worker threads to use for parallel processing
+        parse_workers: Number of parser processes (defaults to the CPU count,
+                       configurable with DISPATCH_PARSE_WORKERS; 0 parses in-process)
+        due_only: Only refresh feeds whose next_fetch_at has passed; otherwise
+                  refresh every feed except those still backing off after failures.
+                  Paused feeds are never refreshed here.
 
     Returns:
         list: Results of processing each feed (success/failure status and messages)
     """
+    if not _refresh_all_lock.acquire(blocking=False):
+        print("Refresh of all feeds already in progress")
+        return []
+    try:
+        return _refresh_feeds(parse_workers, due_only)
+    finally:
+        _refresh_all_lock.release()
+
+
+def _refresh_feeds(parse_workers, due_only):
+    """Run the fetch, parse and write pipeline for add_rss_entries_for_all_feeds."""
     print("Adding feed items in parallel")
     
+    now = datetime.now()
     session = Session()
-    feeds = session.query(RssFeed).all()
-    feed_ids = [feed.id for feed in feeds]
+    query = session.query(RssFeed).filter(RssFeed.paused.isnot(True))
+    if due_only:
+        query = query.filter(or_(RssFeed.next_fetch_at.is_(None), RssFeed.next_fetch_at <= now))
+    else:
+        # Even a full refresh leaves failing feeds alone until their backoff has passed
+        query = query.filter(or_(
+            RssFeed.consecutive_failures.is_(None),
+            RssFeed.consecutive_failures == 0,
+            RssFeed.next_fetch_at.is_(None),
+            RssFeed.next_fetch_at <= now,
+        ))
+    feeds = [
+        {'id': feed.id, 'url': feed.url, 'etag': feed.etag, 'modified': feed.modified,
+         'content_hash': feed.content_hash, 'max_items': feed.max_items}
+        for feed in query.all()
+    ]
     session.close()
+    feeds_by_id = {feed['id']: feed for feed in feeds}
     
-    if not feed_ids:
-        print("No feeds found to process")
+    if not feeds:
+        print("No feeds due for refresh")
         return []
 
-    print(f"Processing {len(feed_ids)} feeds with {max_workers} workers")
+    print(f"Fetching {len(feeds)} feeds")
     
     results = []
-    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Create partial function with the add_rss_entries function
-        process_func = partial(add_rss_entries)
-        
-        # Submit all tasks
-        future_to_feed_id = {
-            executor.submit(process_func, feed_id): feed_id 
-            for feed_id in feed_ids
-        }
+    with create_parse_executor(parse_workers) as parse_executor:
+        future_to_feed_id = {}
+
+        def submit_fetched(fetch_result):
+            feed = feeds_by_id[fetch_result['feed_id']]
+            future = parse_executor.submit(
+                parse_feed_body, fetch_result, feed['content_hash'], feed['max_items']
+            )
+            future_to_feed_id[future] = fetch_result['feed_id']
+
+        # Downloads run concurrently; parsing starts as each response arrives
+        fetch_feeds(feeds, on_result=submit_fetched)
         
-        # Collect results as they complete
+        # Queue results for the writer as the parsers finish; it commits them in groups
+        write_future_to_feed_id = {}
         for future in concurrent.futures.as_completed(future_to_feed_id):
             feed_id = future_to_feed_id[future]
             try:
-                success, message = future.result()
-                results.append({
-                    'feed_id': feed_id,
-                    'success': success,
-                    'message': message
-                })
-                print(f"Feed {feed_id}: {message}")
+                write_future_to_feed_id[submit_parsed_feed(feed_id, future.result())] = feed_id
             except Exception as exc:
                 print(f"Feed {feed_id} generated an exception: {exc}")
                 results.append({
@@ -178,9 +372,27 @@ def add_rss_entries_for_all_feeds(max_workers=10):
                     'success': False,
                     'message': f"Exception: {exc}"
                 })
+
+    for write_future in concurrent.futures.as_completed(write_future_to_feed_id):
+        feed_id = write_future_to_feed_id[write_future]
+        try:
+            success, message = write_future.result()
+            results.append({
+                'feed_id': feed_id,
+                'success': success,
+                'message': message
+            })
+            print(f"Feed {feed_id}: {message}")
+        except Exception as exc:
+            print(f"Feed {feed_id} generated an exception: {exc}")
+            results.append({
+                'feed_id': feed_id,
+                'success': False,
+                'message': f"Exception: {exc}"
+            })
     
     successful_feeds = sum(1 for result in results if result['success'])
-    print(f"Completed processing {len(feed_ids)} feeds. {successful_feeds} successful.")
+    print(f"Completed processing {len(feeds)} feeds. {successful_feeds} successful.")
     
     return results
 
@@ -213,9 +425,26 @@ def update_entry(entry_id, article):
         # Update the RssEntry object with the fetched content
         entry.content = article["content"]
         if not entry.published and "published" in article:
+            feed = session.query(RssFeed).filter_by(id=entry.feed_id).first()
+            if feed.read_through_id is not None:
+                # A new date can move the entry across the feed's watermark;
+                # pin its current read state so it doesn't change underneath the reader
+                read = (
+                    join_read_state(session.query(entry_read_state()))
+                    .filter(RssEntry.id == entry.id)
+                    .scalar()
+                )
+                session.execute(
+                    insert(EntryReadOverride).prefix_with("OR IGNORE"),
+                    [{"entry_id": entry.id, "feed_id": entry.feed_id, "read": bool(read)}],
+                )
             entry.published = parser.parse(article["published"])
+            record_entry_published(session, entry.feed_id, entry.published)
         if not entry.author and "author" in article:
             entry.author = article["author"]
+        index_entries(session, [{
+            "id": entry.id, "search_text": search_text(entry.title, entry.description, entry.content),
+        }])
 
         session.commit()
         session.close()
@@ -227,7 +456,7 @@ def update_entry(entry_id, article):
 
 def get_remote_content(url, entry_id):
     try:
-        response = requests.get(url)
+        response = http_get(url)
         response.raise_for_status()
         article = simple_json_from_html_string(response.text, use_readability=True)
         entry = get_feed_entry_by_id(entry_id)
@@ -254,7 +483,7 @@ def get_remote_content(url, entry_id):
 def get_feed_entries_by_feed_id(feed_id, page=1, entries_per_page=10):
     session = Session()
 
-    query = session.query(RssEntry)
+    query = join_read_state(session.query(*ENTRY_CARD_COLUMNS))
 
     if feed_id == "all":
         query = (
@@ -264,46 +493,132 @@ def get_feed_entries_by_feed_id(feed_id, page=1, entries_per_page=10):
         )
     else:
         query = (
-            query.filter_by(feed_id=feed_id)
+            query.filter(RssEntry.feed_id == feed_id)
             .order_by(desc(RssEntry.published))
             .limit(entries_per_page)
             .offset((page - 1) * entries_per_page)
         )
 
-    entries = query.all()
+    entries = [EntryCard(*row) for row in query.all()]
     session.close()
     return entries
 
 
-def mark_entry_as_read(entry_id, read_status=True):
-    session = Session()
-    entry = session.query(RssEntry).filter_by(id=entry_id).first()
+def encode_entry_cursor(entry):
+    """
+    Build the opaque cursor that continues an entry list after an entry.
 
-    if entry:
-        entry.read = read_status
-        session.commit()
-        session.close()
-        print(
-            f"RSS Entry with ID {entry_id} marked as {'read' if read_status else 'unread'}."
-        )
-    else:
-        session.close()
-        print(f"RSS Entry with ID {entry_id} not found.")
+    Args:
+        entry: The last entry shown
 
+    Returns:
+        str: URL-safe cursor holding the entry's published date and id
+    """
+    published = entry.published.isoformat() if entry.published else ""
+    return base64.urlsafe_b64encode(f"{published}|{entry.id}".encode()).decode().rstrip("=")
+
+
+def decode_entry_cursor(cursor):
+    """
+    Read a cursor built by encode_entry_cursor.
+
+    Args:
+        cursor: The cursor string
+
+    Returns:
+        tuple: (published, entry_id), where published is None for undated entries
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        published, entry_id = raw.split("|")
+        return (datetime.fromisoformat(published) if published else None), int(entry_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"Invalid entry cursor: {cursor!r}") from e
+
+
+def get_feed_entries_page(feed_id, cursor=None, entries_per_page=20):
+    """
+    Get one page of a feed's entries, newest first, continuing from a cursor.
+
+    Pages are keyed on (published, id) rather than an offset, so every page
+    is an index range lookup however deep the scroll goes, and entries that
+    arrive mid-scroll never shift later pages. Dated entries come first,
+    newest first, followed by undated ones; ties are broken by id.
+
+    Args:
+        feed_id: The ID of the RSS feed, or "all" for every feed
+        cursor: Cursor from the previous page (None for the first page)
+        entries_per_page: Maximum number of entries to return
+
+    Returns:
+        tuple: (entries, next_cursor) where entries are EntryCard rows and
+        next_cursor is None on the last page
+    """
+    if cursor:
+        try:
+            after_published, after_id = decode_entry_cursor(cursor)
+        except ValueError as e:
+            print(e)
+            return [], None
 
-def mark_feed_entries_as_read(feed_id, read_status=True):
     session = Session()
-    if feed_id == "all":
-        rss_entries = session.query(RssEntry)
-    else:
-        rss_entries = session.query(RssEntry).filter_by(feed_id=feed_id).all()
+    try:
+        query = join_read_state(session.query(*ENTRY_CARD_COLUMNS))
+        if feed_id != "all":
+            query = query.filter(RssEntry.feed_id == feed_id)
+
+        # One extra row tells whether another page follows
+        limit = entries_per_page + 1
+        entries = []
+        if not cursor or after_published is not None:
+            dated = query.filter(RssEntry.published.isnot(None))
+            if cursor:
+                dated = dated.filter(
+                    RssEntry.published <= after_published,
+                    or_(RssEntry.published < after_published, RssEntry.id > after_id),
+                )
+            entries = dated.order_by(desc(RssEntry.published), RssEntry.id).limit(limit).all()
+        if len(entries) < limit:
+            undated = query.filter(RssEntry.published.is_(None))
+            if cursor and after_published is None:
+                undated = undated.filter(RssEntry.id > after_id)
+            entries += undated.order_by(RssEntry.id).limit(limit - len(entries)).all()
+    finally:
+        session.close()
 
-    for entry in rss_entries:
-        entry.read = read_status
+    entries = [EntryCard(*row) for row in entries]
+    if len(entries) > entries_per_page:
+        entries = entries[:entries_per_page]
+        return entries, encode_entry_cursor(entries[-1])
+    return entries, None
 
-    session.commit()
-    session.close()
 
-    print(
-        f"All RSS entries for feed ID {feed_id} marked as {'read' if read_status else 'unread'}."
-    )
\ No newline at end of file
+def mark_entry_as_read(entry_id, read_status=True):
+    """
+    Mark a single entry as read or unread.
+
+    Args:
+        entry_id: The ID of the RSS entry
+        read_status: True to mark read, False to mark unread
+
+    Returns:
+        int: 1 if the entry's read state changed, otherwise 0
+    """
+    return mark_entries_read([entry_id], read_status)
+
+
+def mark_feed_entries_as_read(feed_id, read_status=True):
+    """
+    Mark every entry of a feed, or of all feeds, as read or unread.
+
+    Args:
+        feed_id: The ID of the RSS feed, or "all" for every feed
+        read_status: True to mark read, False to mark unread
+
+    Returns:
+        int: Number of entries whose read flag changed
+    """
+    return mark_feed_read(feed_id, read_status)
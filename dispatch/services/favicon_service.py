@@ -0,0 +1,519 @@
+"""
+Favicon discovery, storage and refresh.
+
+Icons are kept in a content-addressed store on disk: each distinct icon is
+written once under its SHA-256 hash and feeds only hold the hash, so feed
+queries never load image bytes and the same icon shared by many feeds is
+stored once. Next to the icon as downloaded, the store holds small square
+PNGs at the display size and twice that, which is what the pages actually
+load; icons that cannot be decoded are shown as a generated letter tile.
+
+Feeds on the same site share an icon, so a refresh groups feeds by host
+and resolves each host's icon once, fetching hosts concurrently. The icon
+URL and its cache validators are remembered per host, so later refreshes
+skip the homepage and send a conditional request that usually comes back
+304 Not Modified. Everything that changed is written in one transaction
+at the end.
+"""
+
+import io
+import os
+import hashlib
+import mimetypes
+import threading
+import concurrent.futures
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlparse, urljoin
+
+import requests
+from bs4 import BeautifulSoup
+from sqlalchemy import insert
+
+from models import RssFeed, FaviconHost, Session
+from .http_service import http_get
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+except ImportError:  # Without Pillow icons are served as downloaded
+    Image = None
+
+
+# Favicons are tiny; anything bigger is not worth storing
+FAVICON_MAX_BYTES = 512 * 1024
+FAVICON_WORKERS = int(os.getenv("DISPATCH_FAVICON_WORKERS", "8"))
+FAVICON_DIR = os.path.abspath(os.getenv("DISPATCH_FAVICON_DIR", os.path.join("data", "favicons")))
+# Icons are normalized to the display size and a 2x variant for high-density screens
+FAVICON_SIZE = int(os.getenv("DISPATCH_FAVICON_SIZE", "32"))
+FAVICON_SIZES = (FAVICON_SIZE, FAVICON_SIZE * 2)
+
+# Letter tile backgrounds, picked by a hash of the label
+TILE_COLOURS = ('#5c6bc0', '#26a69a', '#ef6c00', '#8d6e63', '#ab47bc', '#42a5f5', '#d4a000', '#ec407a')
+
+_refresh_progress = {
+    'state': 'idle',
+    'total': 0,
+    'done': 0,
+    'updated': 0,
+    'unchanged': 0,
+    'failed': 0,
+}
+_refresh_progress_lock = threading.Lock()
+
+
+def favicon_file_path(favicon_hash, size=None):
+    """
+    Path of a stored icon.
+
+    Args:
+        favicon_hash: SHA-256 hex digest of the icon as downloaded
+        size: Pixel size of a normalized variant, or None for the icon as downloaded
+
+    Returns:
+        str: FAVICON_DIR/<first two hex digits>/<hash>, or <hash>.<size>.png for a variant
+    """
+    name = favicon_hash if size is None else f"{favicon_hash}.{size}.png"
+    return os.path.join(FAVICON_DIR, favicon_hash[:2], name)
+
+
+def _write_store_file(path, data):
+    """Write a file into the store atomically."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write under a temporary name first so a half-written icon is never served
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, 'wb') as icon_file:
+        icon_file.write(data)
+    os.replace(temp_path, path)
+
+
+def store_favicon(data):
+    """
+    Save icon bytes in the favicon store, once per distinct icon, along with
+    its normalized variants when the icon can be decoded.
+
+    Args:
+        data: Icon bytes
+
+    Returns:
+        str: SHA-256 hex digest naming the stored icon
+    """
+    favicon_hash = hashlib.sha256(data).hexdigest()
+    path = favicon_file_path(favicon_hash)
+    if not os.path.exists(path):
+        _write_store_file(path, data)
+    for size in FAVICON_SIZES:
+        variant_path = favicon_file_path(favicon_hash, size)
+        if os.path.exists(variant_path):
+            continue
+        variant = normalize_favicon(data, size)
+        if variant is None:
+            break
+        _write_store_file(variant_path, variant)
+    return favicon_hash
+
+
+def normalize_favicon(data, size):
+    """
+    Decode an icon and render it as a square PNG of the given size.
+
+    Multi-resolution .ico files use the smallest embedded image that is at
+    least the target size. Non-square icons are centred on a transparent
+    background.
+
+    Args:
+        data: Icon bytes as downloaded
+        size: Width and height of the result in pixels
+
+    Returns:
+        bytes: PNG data, or None if Pillow is missing or the icon cannot be decoded
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.format == 'ICO':
+                embedded = sorted(image.info.get('sizes') or [image.size])
+                image.size = next((dims for dims in embedded if min(dims) >= size), embedded[-1])
+            image = image.convert('RGBA')
+    except Exception as e:
+        print(f"Could not decode favicon: {e}")
+        return None
+
+    scale = size / max(image.size)
+    resized = image.resize(
+        (max(1, round(image.width * scale)), max(1, round(image.height * scale))),
+        Image.Resampling.LANCZOS,
+    )
+    canvas = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    canvas.paste(resized, ((size - resized.width) // 2, (size - resized.height) // 2), resized)
+    output = io.BytesIO()
+    canvas.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def letter_tile(label, size):
+    """
+    Render a square tile showing the first letter of a label.
+
+    Args:
+        label: Text the tile stands for, usually the feed title
+        size: Width and height of the tile in pixels
+
+    Returns:
+        bytes: PNG data, or None if Pillow is missing
+    """
+    if Image is None:
+        return None
+    label = label or '?'
+    letter = next((char for char in label if char.isalnum()), '?').upper()
+    colour = TILE_COLOURS[hashlib.sha256(label.encode('utf-8')).digest()[0] % len(TILE_COLOURS)]
+
+    tile = Image.new('RGBA', (size, size), colour)
+    draw = ImageDraw.Draw(tile)
+    font = ImageFont.load_default(size=round(size * 0.6))
+    left, top, right, bottom = draw.textbbox((0, 0), letter, font=font)
+    draw.text(((size - (right - left)) / 2 - left, (size - (bottom - top)) / 2 - top),
+              letter, fill='white', font=font)
+
+    output = io.BytesIO()
+    tile.save(output, format='PNG', optimize=True)
+    return output.getvalue()
+
+
+def get_favicon_file(favicon_hash, size, mime_type=None, label=None):
+    """
+    Find the file to serve for a stored icon at a display size.
+
+    Missing variants are rendered on first use, so icons stored before they
+    were normalized (or before the display size changed) catch up lazily.
+    Icons that cannot be decoded get a letter tile instead, except SVGs,
+    which scale on their own and are served as they are.
+
+    Args:
+        favicon_hash: SHA-256 hex digest of the icon as downloaded
+        size: Requested size, one of FAVICON_SIZES
+        mime_type: MIME type of the icon as downloaded
+        label: Text for the letter tile fallback
+
+    Returns:
+        tuple: (path, mime_type), or (None, None) if nothing can be served
+    """
+    variant_path = favicon_file_path(favicon_hash, size)
+    if os.path.exists(variant_path):
+        return variant_path, 'image/png'
+
+    # Feeds sharing an undecodable icon each get a tile of their own title
+    tile_path = _letter_tile_path(favicon_hash, size, label)
+    if os.path.exists(tile_path):
+        return tile_path, 'image/png'
+
+    original_path = favicon_file_path(favicon_hash)
+    if not os.path.exists(original_path):
+        return None, None
+    if Image is None or mime_type == 'image/svg+xml':
+        return original_path, mime_type or 'image/x-icon'
+
+    with open(original_path, 'rb') as icon_file:
+        variant = normalize_favicon(icon_file.read(), size)
+    if variant is None:
+        _write_store_file(tile_path, letter_tile(label, size))
+        return tile_path, 'image/png'
+    _write_store_file(variant_path, variant)
+    return variant_path, 'image/png'
+
+
+def _letter_tile_path(favicon_hash, size, label):
+    """Path of the letter tile standing in for an undecodable icon, keyed by the tile's label."""
+    label_hash = hashlib.sha256((label or '').encode('utf-8')).hexdigest()[:16]
+    return os.path.join(FAVICON_DIR, favicon_hash[:2], f"{favicon_hash}.{size}.{label_hash}.tile.png")
+
+
+def get_favicon_url(feed_url):
+    if "http" not in feed_url:
+        feed_url = "http://" + feed_url
+
+    try:
+        page = http_get(feed_url)
+        soup = BeautifulSoup(page.text, features="lxml")
+
+        icon_link = soup.find("link", rel="shortcut icon")
+        if icon_link is None:
+            icon_link = soup.find("link", rel="icon")
+
+        if icon_link is None:
+            # Try default favicon location
+            parsed_url = urlparse(feed_url)
+            return f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
+
+        favicon_url = icon_link.get("href")
+        if favicon_url and not favicon_url.startswith('http'):
+            # Make relative URLs absolute
+            parsed_url = urlparse(feed_url)
+            if favicon_url.startswith('//'):
+                favicon_url = f"{parsed_url.scheme}:{favicon_url}"
+            elif favicon_url.startswith('/'):
+                favicon_url = f"{parsed_url.scheme}://{parsed_url.netloc}{favicon_url}"
+            else:
+                favicon_url = urljoin(feed_url, favicon_url)
+        
+        return favicon_url
+    except Exception as e:
+        print(f"Error getting favicon URL: {e}")
+        return None
+
+
+def guess_favicon_mime_type(content_type, favicon_url):
+    """
+    Work out the MIME type of a downloaded favicon.
+
+    Args:
+        content_type: Content-Type header of the response (may be empty)
+        favicon_url: URL the icon was downloaded from
+
+    Returns:
+        str: MIME type, defaulting to image/x-icon
+    """
+    if content_type:
+        return content_type.split(';')[0].strip()
+
+    # Guess MIME type from URL or content
+    mime_type, _ = mimetypes.guess_type(favicon_url)
+    if not mime_type:
+        if favicon_url.lower().endswith('.ico'):
+            mime_type = 'image/x-icon'
+        elif favicon_url.lower().endswith('.png'):
+            mime_type = 'image/png'
+        elif favicon_url.lower().endswith('.jpg') or favicon_url.lower().endswith('.jpeg'):
+            mime_type = 'image/jpeg'
+        elif favicon_url.lower().endswith('.svg'):
+            mime_type = 'image/svg+xml'
+        else:
+            mime_type = 'image/x-icon'  # Default fallback
+    return mime_type
+
+
+def download_and_store_favicon(feed_url):
+    """Download a site's favicon into the favicon store and return its hash and MIME type."""
+    favicon_url = get_favicon_url(feed_url)
+    if not favicon_url:
+        return None, None
+    
+    try:
+        favicon_response = http_get(favicon_url, max_bytes=FAVICON_MAX_BYTES)
+        if favicon_response.status_code == 200:
+            mime_type = guess_favicon_mime_type(favicon_response.headers.get('content-type', ''), favicon_url)
+            return store_favicon(favicon_response.content), mime_type
+    except Exception as e:
+        print(f"Error downloading favicon from {favicon_url}: {e}")
+    
+    return None, None
+
+
+def get_favicon_refresh_progress():
+    """
+    Get the progress of the current (or last) favicon refresh.
+
+    Returns:
+        dict: state ('idle', 'running' or 'done'), total and done (counted in
+        hosts), and how many hosts were updated, unchanged or failed
+    """
+    with _refresh_progress_lock:
+        return dict(_refresh_progress)
+
+
+def _count_host(outcome):
+    """Record one finished host in the refresh progress."""
+    with _refresh_progress_lock:
+        _refresh_progress['done'] += 1
+        _refresh_progress[outcome] += 1
+
+
+def favicon_host(site_url):
+    """
+    Host whose icon a feed uses.
+
+    Args:
+        site_url: Homepage or feed URL
+
+    Returns:
+        str: Lower-cased host name (with port, if any)
+    """
+    if "http" not in site_url:
+        site_url = "http://" + site_url
+    return urlparse(site_url).netloc.lower()
+
+
+def _icon_result(icon_url, response):
+    """Build a fetch_host_favicon result from a 200 response."""
+    return {
+        'icon_url': icon_url,
+        'etag': response.headers.get('etag'),
+        'last_modified': response.headers.get('last-modified'),
+        'data': response.content,
+        'mime_type': guess_favicon_mime_type(response.headers.get('content-type', ''), icon_url),
+        'not_modified': False,
+    }
+
+
+def fetch_host_favicon(site_url, icon_url=None, etag=None, last_modified=None):
+    """
+    Resolve and download the icon for one host.
+
+    When the icon URL is already known it is requested directly, conditionally
+    if validators are given. The homepage is only fetched and parsed when there
+    is no known icon URL or the known one no longer works.
+
+    Args:
+        site_url: Homepage (or feed URL) of a feed on the host
+        icon_url: Icon URL remembered from the last refresh
+        etag: ETag of the remembered icon
+        last_modified: Last-Modified of the remembered icon
+
+    Returns:
+        dict: icon_url, etag, last_modified, data, mime_type and not_modified;
+        data is None unless a new icon was downloaded
+    """
+    if icon_url:
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            response = http_get(icon_url, headers=headers, max_bytes=FAVICON_MAX_BYTES)
+            if response.status_code == 304:
+                return {
+                    'icon_url': icon_url,
+                    'etag': etag,
+                    'last_modified': last_modified,
+                    'data': None,
+                    'mime_type': None,
+                    'not_modified': True,
+                }
+            if response.status_code == 200:
+                return _icon_result(icon_url, response)
+        except requests.exceptions.RequestException as e:
+            print(f"Error downloading favicon from {icon_url}: {e}")
+        # The remembered icon has gone away; look it up again below
+
+    result = {'icon_url': None, 'etag': None, 'last_modified': None,
+              'data': None, 'mime_type': None, 'not_modified': False}
+    discovered_url = get_favicon_url(site_url)
+    if not discovered_url or discovered_url == icon_url:
+        return result
+
+    try:
+        response = http_get(discovered_url, max_bytes=FAVICON_MAX_BYTES)
+        if response.status_code == 200:
+            return _icon_result(discovered_url, response)
+    except requests.exceptions.RequestException as e:
+        print(f"Error downloading favicon from {discovered_url}: {e}")
+    return result
+
+
+def refresh_favicons_for_feeds(feed_ids=None):
+    """
+    Refresh favicons, resolving each host's icon once.
+
+    Args:
+        feed_ids: IDs of the feeds to refresh; None refreshes every feed
+
+    Returns:
+        tuple: (feeds with an up-to-date favicon, feeds checked)
+    """
+    session = Session()
+    try:
+        query = session.query(
+            RssFeed.id, RssFeed.link, RssFeed.url, RssFeed.favicon_hash.is_(None).label('missing')
+        )
+        if feed_ids is not None:
+            query = query.filter(RssFeed.id.in_(list(feed_ids)))
+        feeds = query.all()
+
+        feeds_by_host = defaultdict(list)
+        site_urls = {}
+        missing_hosts = set()
+        for feed in feeds:
+            site_url = feed.link or feed.url
+            host = favicon_host(site_url)
+            feeds_by_host[host].append(feed.id)
+            site_urls.setdefault(host, site_url)
+            if feed.missing:
+                missing_hosts.add(host)
+
+        known = {
+            row.host: row
+            for row in session.query(FaviconHost).filter(FaviconHost.host.in_(list(feeds_by_host)))
+        }
+    finally:
+        session.close()
+
+    with _refresh_progress_lock:
+        _refresh_progress.update(state='running', total=len(feeds_by_host), done=0,
+                                 updated=0, unchanged=0, failed=0)
+
+    def refresh_host(host):
+        cached = known.get(host)
+        if cached is None:
+            result = fetch_host_favicon(site_urls[host])
+        elif host in missing_hosts:
+            # Some feed on this host has no icon yet, so the icon must be downloaded in full
+            result = fetch_host_favicon(site_urls[host], cached.icon_url)
+        else:
+            result = fetch_host_favicon(site_urls[host], cached.icon_url, cached.etag, cached.last_modified)
+
+        if result['data']:
+            _count_host('updated')
+        elif result['not_modified']:
+            _count_host('unchanged')
+        else:
+            _count_host('failed')
+        return host, result
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=FAVICON_WORKERS) as pool:
+            results = list(pool.map(refresh_host, feeds_by_host))
+
+        now = datetime.now()
+        current_count = 0
+        host_rows = []
+        session = Session()
+        try:
+            for host, result in results:
+                if result['data']:
+                    session.query(RssFeed).filter(RssFeed.id.in_(feeds_by_host[host])).update({
+                        'favicon_hash': store_favicon(result['data']),
+                        'favicon_mime_type': result['mime_type'],
+                    }, synchronize_session=False)
+                if result['data'] or result['not_modified']:
+                    current_count += len(feeds_by_host[host])
+                if result['icon_url']:
+                    host_rows.append({
+                        'host': host,
+                        'icon_url': result['icon_url'],
+                        'etag': result['etag'],
+                        'last_modified': result['last_modified'],
+                        'checked_at': now,
+                    })
+            if host_rows:
+                session.execute(insert(FaviconHost).prefix_with("OR REPLACE"), host_rows)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"Error storing favicons: {e}")
+            return 0, len(feeds)
+        finally:
+            session.close()
+    finally:
+        with _refresh_progress_lock:
+            _refresh_progress['state'] = 'done'
+
+    progress = get_favicon_refresh_progress()
+    print(f"Favicon refresh completed: {len(feeds)} feeds on {progress['total']} hosts, "
+          f"{progress['updated']} updated, {progress['unchanged']} unchanged, {progress['failed']} failed")
+    return current_count, len(feeds)
+
+
+def refresh_all_feed_favicons():
+    """Refresh favicons for all feeds."""
+    return refresh_favicons_for_feeds()
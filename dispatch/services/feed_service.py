@@ -1,82 +1,12 @@
 import feedparser
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urlparse, urljoin
-from models import RssFeed, RssEntry, Session, Settings
+from models import RssFeed, RssEntry, FeedFetchLog, FeedStats, EntryReadOverride, Session, Settings
 from sqlalchemy import func, desc, case
 import hashlib
 import os
-import mimetypes
-from datetime import datetime
-
-
-def get_favicon_url(feed_url):
-    if "http" not in feed_url:
-        feed_url = "http://" + feed_url
-
-    try:
-        page = requests.get(feed_url, timeout=10)
-        soup = BeautifulSoup(page.text, features="lxml")
-
-        icon_link = soup.find("link", rel="shortcut icon")
-        if icon_link is None:
-            icon_link = soup.find("link", rel="icon")
-
-        if icon_link is None:
-            # Try default favicon location
-            parsed_url = urlparse(feed_url)
-            return f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
-
-        favicon_url = icon_link.get("href")
-        if favicon_url and not favicon_url.startswith('http'):
-            # Make relative URLs absolute
-            parsed_url = urlparse(feed_url)
-            if favicon_url.startswith('//'):
-                favicon_url = f"{parsed_url.scheme}:{favicon_url}"
-            elif favicon_url.startswith('/'):
-                favicon_url = f"{parsed_url.scheme}://{parsed_url.netloc}{favicon_url}"
-            else:
-                favicon_url = urljoin(feed_url, favicon_url)
-        
-        return favicon_url
-    except Exception as e:
-        print(f"Error getting favicon URL: {e}")
-        return None
-
-
-def download_and_store_favicon(feed_url):
-    """Download favicon and return binary data and MIME type."""
-    favicon_url = get_favicon_url(feed_url)
-    if not favicon_url:
-        return None, None
-    
-    try:
-        favicon_response = requests.get(favicon_url, timeout=10)
-        if favicon_response.status_code == 200:
-            # Determine MIME type
-            content_type = favicon_response.headers.get('content-type', '')
-            if content_type:
-                mime_type = content_type.split(';')[0].strip()
-            else:
-                # Guess MIME type from URL or content
-                mime_type, _ = mimetypes.guess_type(favicon_url)
-                if not mime_type:
-                    if favicon_url.lower().endswith('.ico'):
-                        mime_type = 'image/x-icon'
-                    elif favicon_url.lower().endswith('.png'):
-                        mime_type = 'image/png'
-                    elif favicon_url.lower().endswith('.jpg') or favicon_url.lower().endswith('.jpeg'):
-                        mime_type = 'image/jpeg'
-                    elif favicon_url.lower().endswith('.svg'):
-                        mime_type = 'image/svg+xml'
-                    else:
-                        mime_type = 'image/x-icon'  # Default fallback
-            
-            return favicon_response.content, mime_type
-    except Exception as e:
-        print(f"Error downloading favicon from {favicon_url}: {e}")
-    
-    return None, None
+from .http_service import http_get
+from .fetch_service import FEED_MAX_BYTES
+from .favicon_service import download_and_store_favicon
+from .stats_service import ensure_feed_stats, delete_feed_stats
 
 
 def add_feed(feed_url):
@@ -89,10 +19,14 @@ def add_feed(feed_url):
             session.close()
             return
 
-        feed = feedparser.parse(feed_url)
+        response = http_get(feed_url, max_bytes=FEED_MAX_BYTES)
+        response.raise_for_status()
+        feed = feedparser.parse(response.content, response_headers={
+            name.lower(): value for name, value in response.headers.items()
+        })
 
-        # Download and store favicon in database
-        favicon_data, favicon_mime_type = download_and_store_favicon(feed.feed.link or feed_url)
+        # Download the favicon into the favicon store
+        favicon_hash, favicon_mime_type = download_and_store_favicon(feed.feed.link or feed_url)
 
         # Add the feed to the database
         rss_feed = RssFeed(
@@ -100,16 +34,19 @@ def add_feed(feed_url):
             title=feed.feed.title,
             link=feed.feed.link,
             description=feed.feed.description,
-            favicon_data=favicon_data,
+            favicon_hash=favicon_hash,
             favicon_mime_type=favicon_mime_type,
         )
 
         session.add(rss_feed)
+        session.flush()
+        # Give the feed its counters now so the feed list never has to write them
+        ensure_feed_stats(session, [rss_feed.id])
         session.commit()
         session.close()
         print(f"Feed added: {rss_feed.title}")
-        if favicon_data:
-            print(f"Favicon stored in database ({len(favicon_data)} bytes, {favicon_mime_type})")
+        if favicon_hash:
+            print(f"Favicon stored as {favicon_hash} ({favicon_mime_type})")
     except Exception as e:
         session.rollback()
         session.close()
@@ -126,13 +63,13 @@ def refresh_feed_favicon(feed_id):
             return False
 
         # Download new favicon
-        favicon_data, favicon_mime_type = download_and_store_favicon(feed.link or feed.url)
+        favicon_hash, favicon_mime_type = download_and_store_favicon(feed.link or feed.url)
         
-        if favicon_data:
-            feed.favicon_data = favicon_data
+        if favicon_hash:
+            feed.favicon_hash = favicon_hash
             feed.favicon_mime_type = favicon_mime_type
             session.commit()
-            print(f"Favicon refreshed for feed: {feed.title} ({len(favicon_data)} bytes, {favicon_mime_type})")
+            print(f"Favicon refreshed for feed: {feed.title} ({favicon_hash}, {favicon_mime_type})")
             return True
         else:
             print(f"Could not fetch favicon for feed: {feed.title}")
@@ -146,47 +83,17 @@ def refresh_feed_favicon(feed_id):
         session.close()
 
 
-def refresh_all_feed_favicons():
-    """Refresh favicons for all feeds."""
-    session = Session()
-    try:
-        feeds = session.query(RssFeed).all()
-        success_count = 0
-        
-        for feed in feeds:
-            print(f"Refreshing favicon for: {feed.title}")
-            
-            # Download new favicon
-            favicon_data, favicon_mime_type = download_and_store_favicon(feed.link or feed.url)
-            
-            if favicon_data:
-                feed.favicon_data = favicon_data
-                feed.favicon_mime_type = favicon_mime_type
-                success_count += 1
-                print(f"  ✓ Updated ({len(favicon_data)} bytes, {favicon_mime_type})")
-            else:
-                print(f"  ✗ Could not fetch favicon")
-        
-        session.commit()
-        print(f"Favicon refresh completed: {success_count}/{len(feeds)} feeds updated")
-        return success_count, len(feeds)
-        
-    except Exception as e:
-        session.rollback()
-        print(f"Error refreshing all favicons: {e}")
-        return 0, 0
-    finally:
-        session.close()
-
-
 def remove_feed(feed_id):
     session = Session()
 
     try:
         feed = session.query(RssFeed).filter_by(id=feed_id).first()
         if feed:
-            # Delete all associated entries
+            # Delete all associated entries and refresh history
+            session.query(EntryReadOverride).filter_by(feed_id=feed_id).delete()
             session.query(RssEntry).filter_by(feed_id=feed_id).delete()
+            session.query(FeedFetchLog).filter_by(feed_id=feed_id).delete()
+            delete_feed_stats(session, feed_id)
             session.delete(feed)
             session.commit()
 
@@ -202,56 +109,57 @@ def remove_feed(feed_id):
 
 
 def get_all_feeds(sort_by="title"):
+    """
+    Get every feed for the feed list with its unread count, latest article
+    date and read frequency, plus an "All Feeds" entry first.
+
+    The per-feed figures are read from the feed_stats counters, so the
+    list costs one lookup per feed rather than a scan of the entries, and
+    every sort order is applied in SQL with pinned feeds always first.
+
+    Args:
+        sort_by: "title", "last_updated" (newest article first) or
+                 "frequency_read" (highest share of read entries first)
+
+    Returns:
+        list: The "All Feeds" pseudo-feed followed by RssFeed objects
+    """
     session = Session()
-    total_unread_count = (
-        session.query(func.count(RssEntry.id)).filter(RssEntry.read == False).scalar()
-    )
-    print(total_unread_count)
+    try:
+        # Read-only: a feed without a stats row yet is listed with zero counts
+        unread_count = func.coalesce(FeedStats.unread_count, 0)
+        total_count = func.coalesce(FeedStats.total_count, 0)
+        read_frequency = case(
+            (total_count > 0, func.coalesce(FeedStats.read_count, 0) * 1.0 / total_count),
+            else_=0.0,
+        )
+
+        if sort_by == "last_updated":
+            # Most recent article first, feeds without articles last
+            order = [FeedStats.latest_published.is_(None), desc(FeedStats.latest_published)]
+        elif sort_by == "frequency_read":
+            order = [desc(read_frequency)]
+        else:
+            order = []
+
+        rows = (
+            session.query(RssFeed, unread_count, FeedStats.latest_published, read_frequency)
+            .outerjoin(FeedStats, FeedStats.feed_id == RssFeed.id)
+            .order_by(desc(RssFeed.pinned), *order, RssFeed.title)
+            .all()
+        )
+    finally:
+        session.close()
+
+    feeds = []
+    for feed, feed_unread_count, latest_published, feed_read_frequency in rows:
+        feed.unread_count = feed_unread_count
+        feed.last_new_article_found = latest_published
+        feed.read_frequency = feed_read_frequency
+        feeds.append(feed)
+
     all_feed = RssFeed(id="all", title="All Feeds")
-    
-    # Get feeds with sorting logic - pinned feeds always first
-    if sort_by == "title":
-        feeds = session.query(RssFeed).order_by(
-            desc(RssFeed.pinned),
-            RssFeed.title
-        ).all()
-    elif sort_by == "last_updated" or sort_by == "frequency_read":
-        # These will be calculated in Python since they require complex aggregation
-        feeds = session.query(RssFeed).order_by(desc(RssFeed.pinned)).all()
-    else:
-        feeds = session.query(RssFeed).order_by(
-            desc(RssFeed.pinned),
-            RssFeed.title
-        ).all()
-    
-    for feed in feeds:
-        feed.unread_count = feed.get_unread_count(session)
-        # Calculate the latest published date from entries for this feed
-        latest_entry = session.query(RssEntry).filter_by(feed_id=feed.id).order_by(desc(RssEntry.published)).first()
-        feed.last_new_article_found = latest_entry.published if latest_entry else None
-        # Calculate read frequency for sorting
-        feed.read_frequency = feed.get_read_frequency(session)
-    
-    # If sorting by frequency or last updated, do the final sort in Python
-    if sort_by == "frequency_read":
-        # Separate pinned and unpinned feeds
-        pinned_feeds = [f for f in feeds if f.pinned]
-        unpinned_feeds = [f for f in feeds if not f.pinned]
-        # Sort each group by read frequency
-        pinned_feeds.sort(key=lambda x: x.read_frequency, reverse=True)
-        unpinned_feeds.sort(key=lambda x: x.read_frequency, reverse=True)
-        feeds = pinned_feeds + unpinned_feeds
-    elif sort_by == "last_updated":
-        # Separate pinned and unpinned feeds
-        pinned_feeds = [f for f in feeds if f.pinned]
-        unpinned_feeds = [f for f in feeds if not f.pinned]
-        # Sort each group by most recent article published date (None values last)
-        pinned_feeds.sort(key=lambda x: x.last_new_article_found or datetime.min, reverse=True)
-        unpinned_feeds.sort(key=lambda x: x.last_new_article_found or datetime.min, reverse=True)
-        feeds = pinned_feeds + unpinned_feeds
-    
-    all_feed.unread_count = total_unread_count
-    session.close()
+    all_feed.unread_count = sum(feed.unread_count for feed in feeds)
     return [all_feed] + feeds
 
 
@@ -289,6 +197,64 @@ def toggle_feed_pin(feed_id):
         session.close()
 
 
+def set_feed_max_items(feed_id, max_items):
+    """Set the per-feed cap on items ingested per fetch; None falls back to the global cap."""
+    session = Session()
+    try:
+        feed = session.query(RssFeed).filter_by(id=feed_id).first()
+        if feed:
+            feed.max_items = int(max_items) if max_items else None
+            session.commit()
+            print(f"Feed '{feed.title}' max items set to: {feed.max_items or 'default'}")
+            return True
+        else:
+            print(f"Feed with ID {feed_id} not found.")
+            return False
+    except Exception as e:
+        session.rollback()
+        print(f"Error setting feed max items: {e}")
+        return False
+    finally:
+        session.close()
+
+
+def get_paused_feeds():
+    """Get feeds that were paused after failing for too long, most recently failing first."""
+    session = Session()
+    feeds = (
+        session.query(RssFeed)
+        .filter(RssFeed.paused.is_(True))
+        .order_by(desc(RssFeed.failing_since))
+        .all()
+    )
+    session.close()
+    return feeds
+
+
+def unpause_feed(feed_id):
+    """Unpause a feed and clear its failure history so it is refreshed on the next run."""
+    session = Session()
+    try:
+        feed = session.query(RssFeed).filter_by(id=feed_id).first()
+        if feed:
+            feed.paused = False
+            feed.consecutive_failures = 0
+            feed.failing_since = None
+            feed.next_fetch_at = None
+            session.commit()
+            print(f"Feed '{feed.title}' unpaused")
+            return True
+        else:
+            print(f"Feed with ID {feed_id} not found.")
+            return False
+    except Exception as e:
+        session.rollback()
+        print(f"Error unpausing feed: {e}")
+        return False
+    finally:
+        session.close()
+
+
 def get_feed_sort_preference():
     """Get the current feed sorting preference from settings."""
     session = Session()
@@ -0,0 +1,237 @@
+"""
+Asynchronous feed download engine.
+
+Downloads many feeds concurrently over one shared httpx client so that a
+refresh takes roughly as long as the slowest host rather than the sum of
+the slow hosts. Concurrency is capped globally and per host, connections
+are kept alive between requests and HTTP/2 is negotiated where the server
+supports it, so hosts serving many feeds multiplex them over one socket.
+Timeouts, the body size limit, retries and the User-Agent come from
+services.http_service so bulk and one-off fetches behave the same.
+"""
+
+import asyncio
+import os
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlparse
+
+import httpx
+import requests
+
+from .http_service import (
+    USER_AGENT,
+    CONNECT_TIMEOUT,
+    READ_TIMEOUT,
+    TOTAL_TIMEOUT,
+    MAX_RETRIES,
+    RETRY_BACKOFF,
+    RETRY_STATUSES,
+    http_get,
+)
+
+
+MAX_CONCURRENT_FETCHES = int(os.getenv("DISPATCH_MAX_CONCURRENT_FETCHES", "100"))
+MAX_FETCHES_PER_HOST = int(os.getenv("DISPATCH_MAX_FETCHES_PER_HOST", "4"))
+# Feed documents larger than this are rejected instead of being downloaded and parsed
+FEED_MAX_BYTES = int(os.getenv("DISPATCH_FEED_MAX_BYTES", str(5 * 1024 * 1024)))
+
+
+def _conditional_headers(feed):
+    """Build the conditional GET headers for a feed from its stored validators."""
+    headers = {}
+    if feed.get('etag'):
+        headers['If-None-Match'] = feed['etag']
+    if feed.get('modified'):
+        headers['If-Modified-Since'] = feed['modified']
+    return headers
+
+
+def _empty_result(feed):
+    """Build a fetch result for a feed with nothing downloaded yet."""
+    return {
+        'feed_id': feed['id'],
+        'url': feed['url'],
+        'status': None,
+        'headers': {},
+        'body': None,
+        'error': None,
+        'metrics': {
+            'started_at': None,
+            'connect_ms': None,
+            'download_ms': None,
+            'bytes': None,
+        },
+    }
+
+
+def _elapsed_ms(started):
+    """Milliseconds since a time.perf_counter() reading."""
+    return (time.perf_counter() - started) * 1000
+
+
+def _describe_error(error):
+    """Format an exception for the fetch result."""
+    return f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+
+
+def fetch_feed(feed):
+    """
+    Download a single feed through the shared HTTP session.
+
+    Args:
+        feed: Dict with 'id', 'url' and optional 'etag'/'modified' validators
+
+    Returns:
+        dict: Fetch result with feed_id, url, status, headers, body, error and metrics
+    """
+    result = _empty_result(feed)
+    result['metrics']['started_at'] = datetime.now()
+    started = time.perf_counter()
+    try:
+        response = http_get(feed['url'], headers=_conditional_headers(feed), max_bytes=FEED_MAX_BYTES)
+        result['status'] = response.status_code
+        result['headers'] = {name.lower(): value for name, value in response.headers.items()}
+        result['headers'].setdefault('content-location', response.url)
+        result['body'] = response.content
+        result['metrics']['bytes'] = len(response.content)
+    except requests.exceptions.RequestException as e:
+        result['error'] = _describe_error(e)
+    result['metrics']['download_ms'] = _elapsed_ms(started)
+    return result
+
+
+class _ResponseTooLarge(httpx.HTTPError):
+    """Raised when a streamed feed body exceeds FEED_MAX_BYTES."""
+
+
+async def _download(client, url, headers, metrics):
+    """Stream one response, enforcing the body size limit and timing connection setup."""
+    connect_started = {}
+
+    async def trace(event_name, info):
+        # httpcore reports DNS resolution and TCP connect together as connect_tcp
+        if event_name == 'connection.connect_tcp.started':
+            connect_started['at'] = time.perf_counter()
+        elif event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+            if 'at' in connect_started:
+                metrics['connect_ms'] = _elapsed_ms(connect_started['at'])
+
+    async with client.stream('GET', url, headers=headers, extensions={'trace': trace}) as response:
+        declared_length = response.headers.get('content-length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > FEED_MAX_BYTES:
+            raise _ResponseTooLarge(f"Response is {declared_length} bytes (limit {FEED_MAX_BYTES})")
+
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) > FEED_MAX_BYTES:
+                raise _ResponseTooLarge(f"Response exceeded {FEED_MAX_BYTES} bytes")
+        return response, bytes(body)
+
+
+async def _fetch_feed(client, feed, global_limit, host_limits):
+    """
+    Download a single feed while holding its host and global slots.
+
+    Args:
+        client: Shared httpx.AsyncClient
+        feed: Dict with 'id', 'url' and optional 'etag'/'modified' validators
+        global_limit: Semaphore capping total in-flight downloads
+        host_limits: Mapping of host name to a per-host semaphore
+
+    Returns:
+        dict: Fetch result with feed_id, url, status, headers, body, error and metrics
+    """
+    result = _empty_result(feed)
+    metrics = result['metrics']
+
+    host = urlparse(feed['url']).netloc
+    # Take the host slot first so feeds queued behind a busy host don't hold a global slot
+    async with host_limits[host]:
+        async with global_limit:
+            # Time only the work done holding the slots, not the wait for them
+            metrics['started_at'] = datetime.now()
+            started = time.perf_counter()
+            for attempt in range(MAX_RETRIES + 1):
+                try:
+                    response, body = await asyncio.wait_for(
+                        _download(client, feed['url'], _conditional_headers(feed), metrics),
+                        timeout=TOTAL_TIMEOUT,
+                    )
+                    result['status'] = response.status_code
+                    result['headers'] = dict(response.headers)
+                    result['headers'].setdefault('content-location', str(response.url))
+                    result['body'] = body
+                    result['error'] = None
+                    metrics['bytes'] = len(body)
+                    retryable = response.status_code in RETRY_STATUSES
+                except _ResponseTooLarge as e:
+                    result['error'] = _describe_error(e)
+                    break
+                except (httpx.HTTPError, asyncio.TimeoutError) as e:
+                    result['error'] = _describe_error(e)
+                    retryable = True
+
+                if not retryable or attempt == MAX_RETRIES:
+                    break
+                await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+            metrics['download_ms'] = _elapsed_ms(started)
+
+    return result
+
+
+async def fetch_feeds_async(feeds, on_result=None, max_concurrent=None, max_per_host=None, transport=None):
+    """
+    Download all feeds concurrently.
+
+    Args:
+        feeds: List of dicts with 'id', 'url' and optional 'etag'/'modified'
+        on_result: Optional callback invoked with each result as soon as it is downloaded
+        max_concurrent: Maximum number of downloads in flight overall
+        max_per_host: Maximum number of downloads in flight per host
+        transport: Optional httpx transport (used by tests)
+
+    Returns:
+        list: Fetch results in completion order (empty when on_result is given)
+    """
+    max_concurrent = max_concurrent or MAX_CONCURRENT_FETCHES
+    max_per_host = max_per_host or MAX_FETCHES_PER_HOST
+
+    global_limit = asyncio.Semaphore(max_concurrent)
+    host_limits = defaultdict(lambda: asyncio.Semaphore(max_per_host))
+    limits = httpx.Limits(max_connections=max_concurrent, max_keepalive_connections=max_concurrent)
+
+    results = []
+    async with httpx.AsyncClient(
+        http2=True,
+        follow_redirects=True,
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        headers={'User-Agent': USER_AGENT},
+        limits=limits,
+        transport=transport,
+    ) as client:
+        tasks = [
+            asyncio.create_task(_fetch_feed(client, feed, global_limit, host_limits))
+            for feed in feeds
+        ]
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if on_result:
+                # Hand the body straight on instead of keeping every download in memory
+                on_result(result)
+            else:
+                results.append(result)
+
+    return results
+
+
+def fetch_feeds(feeds, on_result=None, **kwargs):
+    """
+    Synchronous entry point for the fetch engine.
+
+    Runs the event loop in the calling thread, so it is safe to call from
+    background executor tasks. See fetch_feeds_async for the arguments.
+    """
+    return asyncio.run(fetch_feeds_async(feeds, on_result=on_result, **kwargs))
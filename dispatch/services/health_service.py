@@ -0,0 +1,159 @@
+"""
+Feed health reporting built on the per-fetch refresh log.
+
+Every refresh writes one feed_fetch_log row with its timings, status,
+size and outcome. This module turns those rows into the per-feed
+latency, error-rate and bandwidth figures shown on the feed health page,
+and prunes rows once they are older than the retention window.
+"""
+
+import os
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from models import RssFeed, FeedFetchLog, Session
+
+
+FETCH_LOG_RETENTION = timedelta(days=int(os.getenv("DISPATCH_FETCH_LOG_DAYS", "30")))
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of a list of numbers.
+
+    Args:
+        values: Numbers to summarize
+        fraction: Percentile as a fraction, e.g. 0.95
+
+    Returns:
+        float: The percentile value, or None for an empty list
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _total_ms(row):
+    """Wall-clock cost of one fetch: download, parse and database time."""
+    return sum(value or 0 for value in (row.download_ms, row.parse_ms, row.db_ms))
+
+
+def get_feed_health(days=7):
+    """
+    Summarize refresh performance per feed over a recent window.
+
+    Args:
+        days: How many days of the fetch log to include
+
+    Returns:
+        list: One dict per feed with feed_id, title, fetches, p50_ms, p95_ms,
+        error_rate, bytes, share (fraction of all refresh time) and last_error,
+        most expensive feeds first
+    """
+    since = datetime.now() - timedelta(days=days)
+    session = Session()
+    try:
+        rows = (
+            session.query(
+                FeedFetchLog.feed_id,
+                FeedFetchLog.started_at,
+                FeedFetchLog.download_ms,
+                FeedFetchLog.parse_ms,
+                FeedFetchLog.db_ms,
+                FeedFetchLog.bytes,
+                FeedFetchLog.error,
+            )
+            .filter(FeedFetchLog.started_at >= since)
+            .order_by(FeedFetchLog.started_at)
+            .all()
+        )
+        titles = dict(session.query(RssFeed.id, RssFeed.title).all())
+    finally:
+        session.close()
+
+    rows_by_feed = defaultdict(list)
+    for row in rows:
+        rows_by_feed[row.feed_id].append(row)
+
+    grand_total_ms = sum(_total_ms(row) for row in rows) or 1
+    health = []
+    for feed_id, feed_rows in rows_by_feed.items():
+        durations = [_total_ms(row) for row in feed_rows]
+        errors = [row for row in feed_rows if row.error]
+        health.append({
+            'feed_id': feed_id,
+            'title': titles.get(feed_id) or f"Feed {feed_id}",
+            'fetches': len(feed_rows),
+            'p50_ms': percentile(durations, 0.5),
+            'p95_ms': percentile(durations, 0.95),
+            'error_rate': len(errors) / len(feed_rows),
+            'bytes': sum(row.bytes or 0 for row in feed_rows),
+            'share': sum(durations) / grand_total_ms,
+            'last_error': errors[-1].error if errors else None,
+        })
+
+    health.sort(key=lambda item: item['share'], reverse=True)
+    return health
+
+
+def get_daily_fetch_totals(days=14):
+    """
+    Total fetches, errors and bytes per day.
+
+    Args:
+        days: How many days to include
+
+    Returns:
+        list: Dicts with day, fetches, errors and bytes, oldest day first
+    """
+    since = datetime.now() - timedelta(days=days)
+    day = func.date(FeedFetchLog.started_at)
+    session = Session()
+    try:
+        rows = (
+            session.query(
+                day.label('day'),
+                func.count(FeedFetchLog.id).label('fetches'),
+                func.count(FeedFetchLog.error).label('errors'),
+                func.coalesce(func.sum(FeedFetchLog.bytes), 0).label('bytes'),
+            )
+            .filter(FeedFetchLog.started_at >= since)
+            .group_by(day)
+            .order_by(day)
+            .all()
+        )
+    finally:
+        session.close()
+
+    return [
+        {'day': row.day, 'fetches': row.fetches, 'errors': row.errors, 'bytes': row.bytes}
+        for row in rows
+    ]
+
+
+def prune_fetch_log(now=None):
+    """
+    Delete fetch log rows older than the retention window.
+
+    Args:
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        int: Number of rows deleted
+    """
+    cutoff = (now or datetime.now()) - FETCH_LOG_RETENTION
+    session = Session()
+    try:
+        deleted = session.query(FeedFetchLog).filter(FeedFetchLog.started_at < cutoff).delete()
+        session.commit()
+        return deleted
+    except Exception as e:
+        session.rollback()
+        print(f"Error pruning fetch log: {e}")
+        return 0
+    finally:
+        session.close()
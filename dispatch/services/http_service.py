@@ -0,0 +1,124 @@
+"""
+Shared HTTP client for all outbound requests.
+
+Every one-off request (single feed refreshes, feed discovery, favicons and
+full-article fetches) goes through one pooled requests.Session so sockets
+are reused between calls. Each request has a connect timeout, a read
+timeout and an overall deadline, responses larger than the body limit are
+abandoned, idempotent requests are retried with exponential backoff and
+every request identifies itself with the same User-Agent. The settings
+here are also used by the asynchronous fetch engine.
+"""
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+USER_AGENT = os.getenv(
+    "DISPATCH_USER_AGENT",
+    "Dispatch/1.0 (+https://github.com/Josh-Tucker/dispatch)",
+)
+CONNECT_TIMEOUT = float(os.getenv("DISPATCH_HTTP_CONNECT_TIMEOUT", "10"))
+READ_TIMEOUT = float(os.getenv("DISPATCH_HTTP_READ_TIMEOUT", "30"))
+TOTAL_TIMEOUT = float(os.getenv("DISPATCH_HTTP_TOTAL_TIMEOUT", "60"))
+MAX_RESPONSE_BYTES = int(os.getenv("DISPATCH_HTTP_MAX_BYTES", str(10 * 1024 * 1024)))
+MAX_RETRIES = int(os.getenv("DISPATCH_HTTP_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("DISPATCH_HTTP_RETRY_BACKOFF", "0.5"))
+POOL_SIZE = int(os.getenv("DISPATCH_HTTP_POOL_SIZE", "20"))
+
+# Responses worth retrying: rate limiting and transient upstream failures
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+CHUNK_SIZE = 64 * 1024
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """Raised when a response body exceeds the configured size limit."""
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a request runs past its overall deadline."""
+
+
+def get_http_session():
+    """
+    Get the process-wide pooled HTTP session, creating it on first use.
+
+    Returns:
+        requests.Session: Session with connection pooling, retries and the Dispatch User-Agent
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=MAX_RETRIES,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers['User-Agent'] = USER_AGENT
+            _session = session
+        return _session
+
+
+def http_get(url, headers=None, max_bytes=None, timeout=None):
+    """
+    GET a URL through the shared session with hard limits.
+
+    The body is streamed so the size limit and overall deadline are enforced
+    while downloading rather than after the whole response has arrived.
+
+    Args:
+        url: URL to fetch
+        headers: Optional extra request headers
+        max_bytes: Maximum body size in bytes (defaults to MAX_RESPONSE_BYTES)
+        timeout: Overall deadline in seconds (defaults to TOTAL_TIMEOUT)
+
+    Returns:
+        requests.Response: Response with its body already read into .content
+
+    Raises:
+        requests.exceptions.RequestException: On connection errors, timeouts
+            (including DeadlineExceeded) and oversized bodies (ResponseTooLarge)
+    """
+    max_bytes = MAX_RESPONSE_BYTES if max_bytes is None else max_bytes
+    deadline = time.monotonic() + (TOTAL_TIMEOUT if timeout is None else timeout)
+
+    response = get_http_session().get(
+        url,
+        headers=headers,
+        timeout=(CONNECT_TIMEOUT, READ_TIMEOUT),
+        stream=True,
+    )
+    try:
+        declared_length = response.headers.get('content-length')
+        if declared_length and declared_length.isdigit() and int(declared_length) > max_bytes:
+            raise ResponseTooLarge(f"Response from {url} is {declared_length} bytes (limit {max_bytes})")
+
+        body = bytearray()
+        for chunk in response.iter_content(CHUNK_SIZE):
+            body.extend(chunk)
+            if len(body) > max_bytes:
+                raise ResponseTooLarge(f"Response from {url} exceeded {max_bytes} bytes")
+            if time.monotonic() > deadline:
+                raise DeadlineExceeded(f"Request to {url} exceeded its deadline")
+
+        # Hand back a normal response so callers can use .text, .content and raise_for_status
+        response._content = bytes(body)
+        return response
+    finally:
+        response.close()
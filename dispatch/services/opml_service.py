@@ -1,97 +1,281 @@
 import xml.etree.ElementTree as ET
-import opml
-import tempfile
-import os
-from .feed_service import add_feed
+import concurrent.futures
+import threading
+from datetime import datetime
+from sqlalchemy import insert
+from models import RssFeed, Session
+from .favicon_service import refresh_favicons_for_feeds
+from .fetch_service import fetch_feeds
+from .parse_service import parse_feed_metadata, create_parse_executor
+from .stats_service import ensure_feed_stats
+
+
+# Bytes of an uploaded OPML file parsed at a time
+OPML_READ_CHUNK_SIZE = 64 * 1024
+# Feed URLs looked up per existence query
+URL_LOOKUP_CHUNK_SIZE = 500
+# Error messages kept for the progress display
+MAX_PROGRESS_ERRORS = 20
+
+_import_progress = {
+    'state': 'idle',
+    'phase': None,
+    'total': 0,
+    'done': 0,
+    'failed': 0,
+    'added': 0,
+    'skipped': 0,
+    'errors': [],
+}
+_import_progress_lock = threading.Lock()
+
+
+def get_opml_import_progress():
+    """
+    Get the progress of the current (or last) OPML import.
+
+    Returns:
+        dict: state ('idle', 'running' or 'done'), phase, total, done,
+        failed, added, skipped and the first few error messages
+    """
+    with _import_progress_lock:
+        progress = dict(_import_progress)
+        progress['errors'] = list(_import_progress['errors'])
+        return progress
+
+
+def _update_import_progress(error=None, **changes):
+    """Apply changes to the import progress; numeric *_delta keys are added."""
+    with _import_progress_lock:
+        for key, value in changes.items():
+            if key.endswith('_delta'):
+                _import_progress[key[:-len('_delta')]] += value
+            else:
+                _import_progress[key] = value
+        if error and len(_import_progress['errors']) < MAX_PROGRESS_ERRORS:
+            _import_progress['errors'].append(error)
+
+
+def get_existing_feed_urls(session, urls):
+    """
+    Find which of the given feed URLs are already subscribed.
+
+    Args:
+        session: Database session
+        urls: Iterable of feed URLs
+
+    Returns:
+        set: URLs that already have a feed
+    """
+    urls = list(urls)
+    existing = set()
+    for start in range(0, len(urls), URL_LOOKUP_CHUNK_SIZE):
+        chunk = urls[start:start + URL_LOOKUP_CHUNK_SIZE]
+        existing.update(url for (url,) in session.query(RssFeed.url).filter(RssFeed.url.in_(chunk)))
+    return existing
+
+
+def import_feed_urls(feed_urls, parse_workers=None):
+    """
+    Subscribe to many feeds at once.
+
+    Already subscribed URLs are filtered out with one query per chunk, the
+    new feeds are downloaded concurrently by the fetch engine and parsed in
+    the parser pool, and every feed that worked is inserted in a single bulk
+    insert. Favicons are fetched afterwards so the feeds show up straight
+    away. Progress is published for get_opml_import_progress.
+
+    Args:
+        feed_urls: Feed URLs to subscribe to
+        parse_workers: Number of parser processes (see create_parse_executor)
+
+    Returns:
+        tuple: (success_count, total_count, error_messages)
+    """
+    urls = list(dict.fromkeys(url.strip() for url in feed_urls if url and url.strip()))
+    with _import_progress_lock:
+        _import_progress.update(state='running', phase='checking', total=len(urls), done=0,
+                                failed=0, added=0, skipped=0, errors=[])
+
+    error_messages = []
+    try:
+        session = Session()
+        existing_urls = get_existing_feed_urls(session, urls)
+        session.close()
+        new_urls = [url for url in urls if url not in existing_urls]
+        _update_import_progress(phase='fetching', done_delta=len(existing_urls), skipped_delta=len(existing_urls))
+
+        new_feeds = []
+        with create_parse_executor(parse_workers) as parse_executor:
+            futures = []
+
+            def record_metadata(future):
+                metadata = future.result()
+                if metadata['error']:
+                    message = f"Error adding feed {metadata['url']}: {metadata['error']}"
+                    print(message)
+                    error_messages.append(message)
+                    _update_import_progress(error=message, done_delta=1, failed_delta=1)
+                else:
+                    _update_import_progress(done_delta=1)
+
+            def submit_fetched(fetch_result):
+                future = parse_executor.submit(parse_feed_metadata, fetch_result)
+                future.add_done_callback(record_metadata)
+                futures.append(future)
+
+            fetch_feeds([{'id': url, 'url': url} for url in new_urls], on_result=submit_fetched)
+
+            for future in concurrent.futures.as_completed(futures):
+                metadata = future.result()
+                if not metadata['error']:
+                    new_feeds.append(metadata)
+
+        _update_import_progress(phase='saving')
+        new_feed_ids = _insert_feeds(new_feeds)
+        _update_import_progress(added=len(new_feed_ids))
+
+        # Favicons are cosmetic, so they are fetched once the feeds are already visible
+        _update_import_progress(phase='favicons')
+        refresh_favicons_for_feeds(new_feed_ids)
+    except Exception as e:
+        message = f"Error importing feeds: {e}"
+        print(message)
+        error_messages.append(message)
+        _update_import_progress(error=message)
+    finally:
+        _update_import_progress(state='done', phase=None)
+
+    progress = get_opml_import_progress()
+    success_count = progress['added']
+    print(f"OPML import complete: {success_count} added, {progress['skipped']} already subscribed, "
+          f"{progress['failed']} failed out of {len(urls)}")
+    return success_count, len(urls), error_messages
+
+
+def _insert_feeds(feeds):
+    """Bulk insert new feeds and return their IDs."""
+    if not feeds:
+        return []
+
+    now = datetime.now()
+    rows = [
+        {
+            'url': feed['url'],
+            'title': feed['title'],
+            'link': feed['link'],
+            'description': feed['description'],
+            'pinned': False,
+            'last_updated': now,
+        }
+        for feed in feeds
+    ]
+    session = Session()
+    try:
+        # OR IGNORE skips feeds someone subscribed to while the import was downloading
+        session.execute(insert(RssFeed).prefix_with("OR IGNORE"), rows)
+        urls = [row['url'] for row in rows]
+        feed_ids = []
+        for start in range(0, len(urls), URL_LOOKUP_CHUNK_SIZE):
+            chunk = urls[start:start + URL_LOOKUP_CHUNK_SIZE]
+            chunk_ids = [feed_id for (feed_id,) in session.query(RssFeed.id).filter(RssFeed.url.in_(chunk))]
+            # The new feeds get their counters in the same transaction, so the feed list never writes them
+            ensure_feed_stats(session, chunk_ids)
+            feed_ids.extend(chunk_ids)
+        session.commit()
+        return feed_ids
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def iter_opml_feeds(opml_file):
+    """
+    Stream feed records out of an OPML document.
+
+    The document is read in chunks and fed to an incremental XML parser, and
+    each outline is discarded once it has been handled, so memory use stays
+    flat however large the file is.
+
+    Args:
+        opml_file: Binary file object or file path containing OPML data
+
+    Yields:
+        dict: url, title and category (tuple of enclosing folder titles,
+        outermost first) for every outline with an xmlUrl
+
+    Raises:
+        xml.etree.ElementTree.ParseError: If the document is not well-formed XML
+    """
+    if not hasattr(opml_file, 'read'):
+        with open(opml_file, 'rb') as stream:
+            yield from iter_opml_feeds(stream)
+        return
+
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    elements = []
+    folders = []
+    first_chunk = True
+    while True:
+        chunk = opml_file.read(OPML_READ_CHUNK_SIZE)
+        if first_chunk:
+            # Some exporters write the byte order mark more than once
+            chunk = chunk.lstrip(b'\xef\xbb\xbf' if isinstance(chunk, bytes) else '\ufeff')
+            first_chunk = False
+        if chunk:
+            parser.feed(chunk)
+        else:
+            parser.close()
+
+        for event, element in parser.read_events():
+            if event == 'start':
+                elements.append(element)
+                if element.tag != 'outline':
+                    continue
+                url = (element.get('xmlUrl') or '').strip()
+                if url:
+                    yield {
+                        'url': url,
+                        'title': element.get('title') or element.get('text'),
+                        'category': tuple(folder for folder in folders if folder),
+                    }
+                # Outlines without a feed URL are folders for anything nested inside them
+                folders.append(None if url else (element.get('title') or element.get('text')))
+            else:
+                elements.pop()
+                if element.tag == 'outline':
+                    folders.pop()
+                # Drop finished outlines so the tree never grows
+                if elements:
+                    elements[-1].remove(element)
+
+        if not chunk:
+            return
 
 
 def add_feeds_from_opml(opml_file):
     """
-    Import feeds from an OPML file.
+    Import feeds from an OPML file (see iter_opml_feeds and import_feed_urls).
     
     Args:
-        opml_file: File object or file path containing OPML data
+        opml_file: Binary file object or file path containing OPML data
         
     Returns:
         tuple: (success_count, total_count, error_messages)
     """
-    
-    def extract_feeds_recursively(outline):
-        """Recursively extract feed URLs from nested OPML structure."""
-        feeds = []
-        
-        # Check if this outline has a feed URL
-        if hasattr(outline, 'xmlUrl') and outline.xmlUrl:
-            feeds.append(outline.xmlUrl)
-        
-        # Check for nested outlines using indexing
-        if len(outline) > 0:
-            for i in range(len(outline)):
-                sub_outline = outline[i]
-                feeds.extend(extract_feeds_recursively(sub_outline))
-        
-        return feeds
-    
-    # Handle file objects by writing to temporary file
-    if hasattr(opml_file, 'read'):
-        # It's a file-like object, read the content
-        content = opml_file.read()
-        if isinstance(content, bytes):
-            content = content.decode('utf-8')
-        
-        # Handle UTF-8 BOM (remove all BOM characters)
-        content = content.lstrip('\ufeff')
-        
-        # Write to temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.opml', delete=False, encoding='utf-8') as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
-        
-        try:
-            # Parse the temporary file
-            outline = opml.parse(temp_file_path)
-            feed_urls = extract_feeds_recursively(outline)
-        except Exception as e:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file_path)
-            except OSError:
-                pass
-            print(f"Error parsing OPML file: {e}")
-            return 0, 0, [f"Error parsing OPML file: {e}"]
-        finally:
-            # Clean up temporary file
-            try:
-                os.unlink(temp_file_path)
-            except OSError:
-                pass
-    else:
-        # It's a file path string
-        try:
-            outline = opml.parse(opml_file)
-            feed_urls = extract_feeds_recursively(outline)
-        except Exception as e:
-            print(f"Error parsing OPML file: {e}")
-            return 0, 0, [f"Error parsing OPML file: {e}"]
-    
-    # Add each feed
-    success_count = 0
-    error_messages = []
-    
-    for feed_url in feed_urls:
-        try:
-            add_feed(feed_url)
-            success_count += 1
-            print(f"Successfully added feed: {feed_url}")
-        except Exception as e:
-            error_msg = f"Error adding feed {feed_url}: {e}"
-            print(error_msg)
-            error_messages.append(error_msg)
-    
-    total_count = len(feed_urls)
-    print(f"OPML import complete: {success_count}/{total_count} feeds added successfully")
-    
-    return success_count, total_count, error_messages
+    try:
+        feed_urls = [feed['url'] for feed in iter_opml_feeds(opml_file)]
+    except (ET.ParseError, OSError) as e:
+        print(f"Error parsing OPML file: {e}")
+        return 0, 0, [f"Error parsing OPML file: {e}"]
+
+    if not feed_urls:
+        print("No feeds found in OPML file")
+        return 0, 0, []
+
+    return import_feed_urls(feed_urls)
 
 
 def export_feeds_to_opml():
@@ -0,0 +1,337 @@
+"""
+Feed parsing stage of the refresh pipeline.
+
+feedparser is CPU-heavy (HTML sanitizing, encoding detection, date
+normalization), so refresh-all runs it in a pool of worker processes.
+Everything here is importable without touching the database, and the
+records returned are plain dicts so they can be pickled back to the
+process that writes them.
+
+The plain text the search index stores for each new entry is extracted
+here too, so the HTML work stays off the single writer thread.
+
+Each downloaded body is fingerprinted before parsing. Many servers ignore
+conditional requests and keep returning the same document with a 200, so
+when the fingerprint matches the one stored for the feed the parse is
+skipped entirely.
+"""
+
+import os
+import time
+import hashlib
+import concurrent.futures
+from datetime import datetime
+
+import feedparser
+from bs4 import BeautifulSoup
+from dateutil import parser
+
+
+PARSE_WORKERS = int(os.getenv("DISPATCH_PARSE_WORKERS", str(os.cpu_count() or 1)))
+MAX_ITEMS_PER_FEED = int(os.getenv("DISPATCH_MAX_ITEMS_PER_FEED", "500"))
+
+# Response headers the scheduler uses to honor the publisher's caching policy
+CACHE_HEADERS = ('cache-control', 'expires', 'date')
+
+
+def plain_text(html):
+    """Text content of an HTML fragment, with tags, scripts and styles removed."""
+    if not html:
+        return ""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    return soup.get_text(" ", strip=True)
+
+
+def search_text(title, description=None, content=None):
+    """
+    Build the text an entry is indexed under for search.
+
+    Args:
+        title: Entry title
+        description: Description HTML
+        content: Full article HTML
+
+    Returns:
+        dict: 'title', 'description' and 'content' as plain text
+    """
+    return {
+        'title': title or "",
+        'description': plain_text(description),
+        'content': plain_text(content),
+    }
+
+
+def build_entry_row(feed_id, entry):
+    """
+    Build the column values for a new RssEntry from a parsed feed item.
+
+    Args:
+        feed_id: The ID of the RSS feed the entry belongs to
+        entry: A feedparser entry
+
+    Returns:
+        dict: Column values suitable for a bulk insert into rss_entries, plus
+        the entry's 'search_text' (see search_text)
+    """
+    # Parse published date
+    published_date = None
+    if hasattr(entry, 'published'):
+        try:
+            published_date = parser.parse(entry.published)
+        except Exception as date_error:
+            print(f"Date parse error for entry {entry.title}: {date_error}")
+            published_date = datetime.now()
+    else:
+        published_date = datetime.now()
+
+    # Get description/summary
+    description = ""
+    if hasattr(entry, 'summary'):
+        description = entry.summary
+    elif hasattr(entry, 'description'):
+        description = entry.description
+
+    # Get author
+    author = ""
+    if hasattr(entry, 'author'):
+        author = entry.author
+
+    return {
+        'feed_id': feed_id,
+        'title': entry.title,
+        'link': entry.link,
+        'description': description,
+        'published': published_date,
+        'author': author,
+        'read': False,
+        'search_text': search_text(entry.title, description),
+    }
+
+
+def extract_entry_rows(feed_id, entries, max_items=None):
+    """
+    Turn feedparser entries into entry rows, keeping the first occurrence of each link.
+
+    At most max_items rows are returned, always the most recently published
+    ones. Newest-first documents, the common case, stop being walked as soon
+    as the cap is reached; other documents are walked fully and trimmed.
+
+    Args:
+        feed_id: The ID of the RSS feed
+        entries: feedparser entries in document order
+        max_items: Maximum number of rows to return (defaults to MAX_ITEMS_PER_FEED)
+
+    Returns:
+        tuple: (rows, newest_first) where rows are entry row dicts in document
+        order (newest first when trimmed) and newest_first tells whether the
+        rows were published in non-increasing date order
+    """
+    max_items = max_items or MAX_ITEMS_PER_FEED
+    rows = []
+    seen_links = set()
+    newest_first = True
+    for entry in entries:
+        try:
+            if entry.link in seen_links:
+                continue
+            seen_links.add(entry.link)
+            row = build_entry_row(feed_id, entry)
+        except Exception as entry_error:
+            print(f"Error processing entry {getattr(entry, 'title', 'Unknown')}: {entry_error}")
+            continue
+
+        if rows and _published_key(row) > _published_key(rows[-1]):
+            newest_first = False
+        rows.append(row)
+        if newest_first and len(rows) >= max_items:
+            break
+
+    if len(rows) > max_items:
+        rows = sorted(rows, key=_published_key, reverse=True)[:max_items]
+    return rows, newest_first
+
+
+def _published_key(row):
+    """Sort key for entry rows by publish date, ignoring time zones."""
+    return row['published'].replace(tzinfo=None)
+
+
+def _empty_record(feed_id, status=None, error=None):
+    """Build a parsed feed record with no entries."""
+    return {
+        'feed_id': feed_id,
+        'status': status,
+        'etag': None,
+        'modified': None,
+        'cache_headers': {},
+        'ttl': None,
+        'entries': [],
+        'content_hash': None,
+        'unchanged': False,
+        'newest_first': False,
+        'metrics': {},
+        'error': error,
+    }
+
+
+def fingerprint_body(body):
+    """
+    Compute the content fingerprint of a raw feed body.
+
+    Args:
+        body: Response body bytes
+
+    Returns:
+        str: Hex SHA-256 digest of the body
+    """
+    return hashlib.sha256(body or b'').hexdigest()
+
+
+def summarize_parsed_feed(feed_id, parsed_feed, max_items=None):
+    """
+    Reduce a feedparser result to the compact record the writer needs.
+
+    Args:
+        feed_id: The ID of the RSS feed
+        parsed_feed: Result of feedparser.parse
+        max_items: Maximum number of entries to keep (see extract_entry_rows)
+
+    Returns:
+        dict: Parsed feed record with feed_id, status, etag, modified,
+        cache_headers, ttl, entries, newest_first and error
+    """
+    status = getattr(parsed_feed, 'status', None)
+    headers = parsed_feed.get('headers') or {}
+
+    record = _empty_record(feed_id, status)
+    record['etag'] = parsed_feed.get('etag')
+    record['modified'] = parsed_feed.get('modified')
+    record['cache_headers'] = {
+        name: headers[name] for name in CACHE_HEADERS if headers.get(name)
+    }
+    record['ttl'] = (parsed_feed.get('feed') or {}).get('ttl')
+    if status is None or status < 300:
+        record['entries'], record['newest_first'] = extract_entry_rows(feed_id, parsed_feed.entries, max_items)
+    return record
+
+
+def parse_feed_body(fetch_result, known_hash=None, max_items=None):
+    """
+    Parse a response downloaded by the fetch engine.
+
+    Runs inside a parser worker process, so it must not touch the database.
+
+    Args:
+        fetch_result: Result dict produced by services.fetch_service
+        known_hash: Fingerprint of the body parsed on the previous refresh;
+                    a matching body is not parsed again
+        max_items: Per-feed cap on entries kept (defaults to MAX_ITEMS_PER_FEED)
+
+    Returns:
+        dict: Parsed feed record (see summarize_parsed_feed), with
+        unchanged set when the body matched known_hash and metrics holding
+        the fetch timings plus parse_ms
+    """
+    started = time.perf_counter()
+    record = _parse_fetch_result(fetch_result, known_hash, max_items)
+    # Carry the fetch timings through to the writer, which logs them with the database time
+    record['metrics'] = dict(fetch_result.get('metrics') or {})
+    record['metrics']['parse_ms'] = (time.perf_counter() - started) * 1000
+    return record
+
+
+def _parse_fetch_result(fetch_result, known_hash, max_items):
+    """Build the parsed feed record for parse_feed_body."""
+    feed_id = fetch_result['feed_id']
+    headers = fetch_result['headers']
+
+    if fetch_result['error']:
+        return _empty_record(feed_id, error=f"Fetch error: {fetch_result['error']}")
+
+    status = fetch_result['status']
+    content_hash = fingerprint_body(fetch_result['body']) if 200 <= status < 300 else None
+    if content_hash and content_hash == known_hash:
+        record = _empty_record(feed_id, status)
+        record['etag'] = headers.get('etag')
+        record['modified'] = headers.get('last-modified')
+        record['cache_headers'] = {
+            name: headers[name] for name in CACHE_HEADERS if headers.get(name)
+        }
+        record['content_hash'] = content_hash
+        record['unchanged'] = True
+        return record
+
+    try:
+        if content_hash:
+            parsed_feed = feedparser.parse(fetch_result['body'], response_headers=headers)
+        else:
+            parsed_feed = feedparser.FeedParserDict(entries=[], headers=headers)
+        parsed_feed['status'] = status
+        parsed_feed['etag'] = headers.get('etag')
+        parsed_feed['modified'] = headers.get('last-modified')
+        record = summarize_parsed_feed(feed_id, parsed_feed, max_items)
+        record['content_hash'] = content_hash
+        return record
+    except Exception as parse_error:
+        return _empty_record(feed_id, status, f"Parse error: {parse_error}")
+
+
+def parse_feed_metadata(fetch_result):
+    """
+    Extract the feed-level details needed to subscribe to a downloaded feed.
+
+    Runs inside a parser worker process during bulk imports.
+
+    Args:
+        fetch_result: Result dict produced by services.fetch_service
+
+    Returns:
+        dict: url, title, link, description and error
+    """
+    metadata = {
+        'url': fetch_result['url'],
+        'title': None,
+        'link': None,
+        'description': None,
+        'error': None,
+    }
+
+    if fetch_result['error']:
+        metadata['error'] = f"Fetch error: {fetch_result['error']}"
+        return metadata
+    if not 200 <= fetch_result['status'] < 300:
+        metadata['error'] = f"HTTP error {fetch_result['status']}"
+        return metadata
+
+    try:
+        parsed_feed = feedparser.parse(fetch_result['body'], response_headers=fetch_result['headers'])
+        feed = parsed_feed.get('feed') or {}
+        if not feed.get('title') and not parsed_feed.entries:
+            metadata['error'] = "Not a valid feed"
+            return metadata
+        metadata['title'] = feed.get('title')
+        metadata['link'] = feed.get('link')
+        metadata['description'] = feed.get('description')
+    except Exception as parse_error:
+        metadata['error'] = f"Parse error: {parse_error}"
+    return metadata
+
+
+def create_parse_executor(workers=None):
+    """
+    Create the executor that runs parse_feed_body.
+
+    Args:
+        workers: Number of parser processes; defaults to PARSE_WORKERS (the CPU
+                 count unless DISPATCH_PARSE_WORKERS is set). Zero parses in-process
+                 on a single background thread.
+
+    Returns:
+        concurrent.futures.Executor: Executor to submit parse_feed_body to
+    """
+    workers = PARSE_WORKERS if workers is None else workers
+    if workers <= 0:
+        return concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    return concurrent.futures.ProcessPoolExecutor(max_workers=workers)
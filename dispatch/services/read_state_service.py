@@ -0,0 +1,221 @@
+"""
+Marking entries read or unread in bulk.
+
+An entry's read state comes from three places, in order of precedence: a
+row in entry_read_overrides, the feed's read watermark, and the entry's
+own read flag (see models.entry_read_state). Marking a whole feed read
+only moves its watermark to the entry at the top of its list, so it is a
+single-row write however many entries the feed has. Entries added later
+below the watermark are read from the start; entries above it are unread
+until marked.
+
+Marking selected entries is one UPDATE over the entries' flags, plus an
+override for entries below the watermark that are marked unread. Nothing
+is loaded into the session. Each function returns how many entries
+actually changed, and keeps the feed_stats counters in step within the
+same transaction.
+
+Selections follow the order entry lists are shown in: newest first by
+published date, ties by id, undated entries last.
+"""
+
+from sqlalchemy import and_, delete, desc, false, func, insert, or_, select, update
+
+from models import (
+    RssFeed, RssEntry, FeedStats, EntryReadOverride, Session,
+    entry_read_state, join_read_state, read_watermark_covers,
+)
+from .stats_service import ensure_feed_stats, record_read_changes, record_feed_read_state
+
+
+def _feed_filter(feed_id):
+    """Conditions limiting a selection to one feed, or nothing for "all"."""
+    return [] if feed_id in (None, "all") else [RssEntry.feed_id == feed_id]
+
+
+def _apply_read_state(conditions, read_status, description):
+    """
+    Set the read state of every entry matching the conditions.
+
+    Args:
+        conditions: SQLAlchemy filter expressions over rss_entries selecting the entries
+        read_status: True to mark read, False to mark unread
+        description: What was selected, for log messages
+
+    Returns:
+        int: Number of entries whose read state changed
+    """
+    conditions = list(conditions)
+    selected_ids = select(RssEntry.id).where(*conditions)
+    session = Session()
+    try:
+        # Creating any missing counters for the selected entries' feeds first also opens
+        # the write transaction, so the per-feed counts and the writes below see the same rows
+        ensure_feed_stats(session, select(RssEntry.feed_id).where(*conditions).distinct())
+        changed_by_feed = dict(
+            join_read_state(session.query(RssEntry.feed_id, func.count(RssEntry.id)))
+            .filter(*conditions, entry_read_state() != read_status)
+            .group_by(RssEntry.feed_id)
+            .all()
+        )
+        record_read_changes(session, changed_by_feed, read_status)
+
+        # Overrides would hide the new flag, so they go first
+        session.execute(delete(EntryReadOverride).where(EntryReadOverride.entry_id.in_(selected_ids)))
+        # "read IS NOT <literal>" skips entries already in that state and lets the partial unread index apply
+        session.execute(
+            update(RssEntry).where(*conditions, RssEntry.read.isnot(read_status)).values(read=read_status)
+        )
+        if not read_status:
+            # Entries below the watermark stay read unless overridden
+            session.execute(insert(EntryReadOverride).from_select(
+                ['entry_id', 'feed_id', 'read'],
+                select(RssEntry.id, RssEntry.feed_id, false())
+                .join(RssFeed, RssFeed.id == RssEntry.feed_id)
+                .where(*conditions, read_watermark_covers()),
+            ))
+        updated = sum(changed_by_feed.values())
+        session.commit()
+        print(f"Marked {updated} entries ({description}) as {'read' if read_status else 'unread'}")
+        return updated
+    except Exception as e:
+        session.rollback()
+        print(f"Error marking entries ({description}): {e}")
+        return 0
+    finally:
+        session.close()
+
+
+def mark_entries_read(entry_ids, read_status=True):
+    """
+    Mark a batch of entries, such as the cards visible on screen.
+
+    Args:
+        entry_ids: IDs of the entries
+        read_status: True to mark read, False to mark unread
+
+    Returns:
+        int: Number of entries whose read state changed
+    """
+    entry_ids = list(entry_ids)
+    if not entry_ids:
+        return 0
+    return _apply_read_state([RssEntry.id.in_(entry_ids)], read_status, f"{len(entry_ids)} ids")
+
+
+def mark_entries_read_before(before, feed_id="all", read_status=True):
+    """
+    Mark every entry published before a point in time.
+
+    Args:
+        before: Entries published strictly before this datetime are marked
+        feed_id: The ID of the RSS feed, or "all" for every feed
+        read_status: True to mark read, False to mark unread
+
+    Returns:
+        int: Number of entries whose read state changed
+    """
+    conditions = _feed_filter(feed_id) + [RssEntry.published < before]
+    return _apply_read_state(conditions, read_status, f"feed {feed_id} before {before}")
+
+
+def mark_entries_read_through(entry_id, feed_id="all", read_status=True):
+    """
+    Mark everything in a list from the top down to and including one entry.
+
+    Args:
+        entry_id: The entry the reader has reached
+        feed_id: The ID of the RSS feed whose list is shown, or "all"
+        read_status: True to mark read, False to mark unread
+
+    Returns:
+        int: Number of entries whose read state changed
+    """
+    session = Session()
+    try:
+        entry = session.query(RssEntry.id, RssEntry.published).filter_by(id=entry_id).first()
+    finally:
+        session.close()
+    if not entry:
+        print(f"RSS Entry with ID {entry_id} not found.")
+        return 0
+
+    if entry.published is None:
+        # Undated entries come last, so every dated entry is above this one
+        position = or_(
+            RssEntry.published.isnot(None),
+            and_(RssEntry.published.is_(None), RssEntry.id <= entry.id),
+        )
+    else:
+        position = or_(
+            RssEntry.published > entry.published,
+            and_(RssEntry.published == entry.published, RssEntry.id <= entry.id),
+        )
+    return _apply_read_state(
+        _feed_filter(feed_id) + [position], read_status, f"feed {feed_id} through entry {entry_id}"
+    )
+
+
+def _top_entry(column):
+    """Correlated subquery for a column of the entry at the top of a feed's list."""
+    return (
+        select(column)
+        .where(RssEntry.feed_id == RssFeed.id)
+        .order_by(desc(RssEntry.published), RssEntry.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def mark_feed_read(feed_id, read_status=True):
+    """
+    Mark every entry of a feed, or of all feeds.
+
+    Marking read moves the feed's watermark to the top of its list and
+    leaves the entries themselves untouched. Marking unread clears the
+    watermark and every entry's flag.
+
+    Args:
+        feed_id: The ID of the RSS feed, or "all" for every feed
+        read_status: True to mark read, False to mark unread
+
+    Returns:
+        int: Number of entries whose read state changed
+    """
+    feed_ids = None if feed_id in (None, "all") else [feed_id]
+    feed_filter = [] if feed_ids is None else [RssFeed.id == feed_id]
+    override_filter = [] if feed_ids is None else [EntryReadOverride.feed_id == feed_id]
+    session = Session()
+    try:
+        # The counters say how many entries are about to change
+        ensure_feed_stats(session, feed_ids)
+        stats_query = session.query(
+            func.coalesce(func.sum(FeedStats.unread_count if read_status else FeedStats.read_count), 0)
+        )
+        if feed_ids is not None:
+            stats_query = stats_query.filter(FeedStats.feed_id == feed_id)
+        updated = stats_query.scalar()
+
+        session.execute(delete(EntryReadOverride).where(*override_filter))
+        if read_status:
+            watermark = {
+                'read_through_published': _top_entry(RssEntry.published),
+                'read_through_id': _top_entry(RssEntry.id),
+            }
+        else:
+            watermark = {'read_through_published': None, 'read_through_id': None}
+            session.execute(
+                update(RssEntry).where(*_feed_filter(feed_id), RssEntry.read.isnot(False)).values(read=False)
+            )
+        session.execute(update(RssFeed).where(*feed_filter).values(**watermark))
+        # Every entry of the feed is now in the same state, so the counters can be set outright
+        record_feed_read_state(session, None if feed_ids is None else feed_id, read_status)
+        session.commit()
+        print(f"All RSS entries for feed ID {feed_id} marked as {'read' if read_status else 'unread'}.")
+        return updated
+    except Exception as e:
+        session.rollback()
+        print(f"Error marking entries for feed ID {feed_id}: {e}")
+        return 0
+    finally:
+        session.close()
@@ -0,0 +1,234 @@
+"""
+Adaptive per-feed refresh scheduling.
+
+Each feed stores next_fetch_at. After every fetch the next time is derived
+from how often the feed actually posts (the gaps between its recent entry
+publish dates), never sooner than the server asks for via Cache-Control,
+Expires or the RSS <ttl> element, and spread out with random jitter so
+feeds added together do not keep refreshing together. A background thread
+periodically refreshes whichever feeds are due.
+"""
+
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+
+from models import RssEntry
+
+
+MIN_REFRESH_INTERVAL = timedelta(minutes=int(os.getenv("DISPATCH_MIN_REFRESH_MINUTES", "15")))
+MAX_REFRESH_INTERVAL = timedelta(minutes=int(os.getenv("DISPATCH_MAX_REFRESH_MINUTES", "1440")))
+DEFAULT_REFRESH_INTERVAL = timedelta(minutes=int(os.getenv("DISPATCH_DEFAULT_REFRESH_MINUTES", "60")))
+REFRESH_JITTER = float(os.getenv("DISPATCH_REFRESH_JITTER", "0.1"))
+SCHEDULER_TICK_SECONDS = int(os.getenv("DISPATCH_SCHEDULER_TICK_SECONDS", "60"))
+AUTO_PAUSE_AFTER = timedelta(days=int(os.getenv("DISPATCH_AUTO_PAUSE_DAYS", "7")))
+
+# Number of recent entries used to estimate how often a feed posts
+CADENCE_SAMPLE_SIZE = 20
+# Refresh twice per observed posting interval so new posts are picked up promptly
+CADENCE_FRACTION = 0.5
+# Cap on the backoff exponent; the interval is clamped to MAX_REFRESH_INTERVAL well before this
+MAX_BACKOFF_EXPONENT = 16
+
+_scheduler_thread = None
+_scheduler_lock = threading.Lock()
+
+
+def get_posting_interval(session, feed_id):
+    """
+    Estimate how often a feed publishes from its recent entries.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed
+
+    Returns:
+        timedelta: Median gap between recent publish dates, or None if unknown
+    """
+    published = [
+        row.published
+        for row in session.query(RssEntry.published)
+        .filter(RssEntry.feed_id == feed_id, RssEntry.published.isnot(None))
+        .order_by(RssEntry.published.desc())
+        .limit(CADENCE_SAMPLE_SIZE)
+    ]
+    gaps = sorted(newer - older for newer, older in zip(published, published[1:]))
+    if not gaps:
+        return None
+
+    median_gap = gaps[len(gaps) // 2]
+    return median_gap if median_gap > timedelta(0) else None
+
+
+def get_server_refresh_hint(cache_headers=None, ttl=None):
+    """
+    Work out the minimum refresh interval requested by the publisher.
+
+    Args:
+        cache_headers: Dict with lower-case 'cache-control', 'expires' and 'date' headers
+        ttl: Value of the RSS <ttl> element, in minutes
+
+    Returns:
+        timedelta: The longest interval requested, or None if none was given
+    """
+    hints = []
+    cache_headers = cache_headers or {}
+
+    cache_control = cache_headers.get('cache-control') or ''
+    for directive in cache_control.split(','):
+        name, _, value = directive.strip().partition('=')
+        if name.lower() in ('max-age', 's-maxage'):
+            try:
+                hints.append(timedelta(seconds=int(value.strip('"'))))
+            except ValueError:
+                pass
+
+    if cache_headers.get('expires'):
+        try:
+            expires = parsedate_to_datetime(cache_headers['expires'])
+            date = parsedate_to_datetime(cache_headers['date']) if cache_headers.get('date') else None
+            if date is None:
+                date = datetime.now(expires.tzinfo)
+            hints.append(expires - date)
+        except (TypeError, ValueError):
+            pass
+
+    if ttl:
+        try:
+            hints.append(timedelta(minutes=int(ttl)))
+        except (TypeError, ValueError):
+            pass
+
+    hints = [hint for hint in hints if hint > timedelta(0)]
+    return max(hints) if hints else None
+
+
+def compute_next_fetch_at(session, feed_id, cache_headers=None, ttl=None, now=None):
+    """
+    Decide when a feed should next be refreshed.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed
+        cache_headers: Caching headers from the last response
+        ttl: RSS <ttl> from the last parsed document, in minutes
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        datetime: When the feed is next due
+    """
+    now = now or datetime.now()
+
+    posting_interval = get_posting_interval(session, feed_id)
+    interval = posting_interval * CADENCE_FRACTION if posting_interval else DEFAULT_REFRESH_INTERVAL
+
+    server_hint = get_server_refresh_hint(cache_headers, ttl)
+    if server_hint:
+        interval = max(interval, server_hint)
+
+    interval = min(max(interval, MIN_REFRESH_INTERVAL), MAX_REFRESH_INTERVAL)
+
+    # Jitter keeps feeds that were scheduled together from staying in lockstep
+    return now + _apply_jitter(interval)
+
+
+def _apply_jitter(interval):
+    """Spread an interval by REFRESH_JITTER in either direction."""
+    return interval * random.uniform(1 - REFRESH_JITTER, 1 + REFRESH_JITTER)
+
+
+def compute_failure_backoff(consecutive_failures, now=None):
+    """
+    Decide when a failing feed should be retried.
+
+    The wait doubles with every consecutive failure, starting from
+    MIN_REFRESH_INTERVAL and capped at MAX_REFRESH_INTERVAL.
+
+    Args:
+        consecutive_failures: Number of failed refreshes in a row (at least 1)
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        datetime: When the feed should next be tried
+    """
+    now = now or datetime.now()
+    exponent = min(max(consecutive_failures - 1, 0), MAX_BACKOFF_EXPONENT)
+    interval = min(MIN_REFRESH_INTERVAL * (2 ** exponent), MAX_REFRESH_INTERVAL)
+    return now + _apply_jitter(interval)
+
+
+def record_fetch_failure(feed, error, now=None):
+    """
+    Record a failed refresh on a feed, backing it off and pausing it if it has been failing too long.
+
+    Args:
+        feed: RssFeed attached to the caller's session
+        error: Description of the failure
+        now: Reference time (defaults to the current time)
+
+    Returns:
+        bool: True if the feed was paused by this failure
+    """
+    now = now or datetime.now()
+    feed.consecutive_failures = (feed.consecutive_failures or 0) + 1
+    feed.last_error = error
+    if feed.failing_since is None:
+        feed.failing_since = now
+    feed.next_fetch_at = compute_failure_backoff(feed.consecutive_failures, now)
+
+    if not feed.paused and now - feed.failing_since >= AUTO_PAUSE_AFTER:
+        feed.paused = True
+        print(f"Pausing feed {feed.title}: failing since {feed.failing_since} ({error})")
+        return True
+    return False
+
+
+def record_fetch_success(feed, now=None):
+    """
+    Clear a feed's failure state after a successful refresh.
+
+    A paused feed that refreshes successfully (e.g. refreshed by hand) is unpaused.
+
+    Args:
+        feed: RssFeed attached to the caller's session
+        now: Reference time (defaults to the current time)
+    """
+    feed.consecutive_failures = 0
+    feed.last_error = None
+    feed.failing_since = None
+    feed.paused = False
+    feed.last_success_at = now or datetime.now()
+
+
+def _scheduler_loop():
+    """Refresh due feeds forever, once per scheduler tick."""
+    from .entry_service import add_rss_entries_for_all_feeds
+    from .health_service import prune_fetch_log
+
+    while True:
+        try:
+            add_rss_entries_for_all_feeds(due_only=True)
+            prune_fetch_log()
+        except Exception as e:
+            print(f"Error in scheduled refresh: {e}")
+        time.sleep(SCHEDULER_TICK_SECONDS)
+
+
+def start_scheduler():
+    """
+    Start the background refresh scheduler if it is not already running.
+
+    Returns:
+        bool: True if a new scheduler thread was started
+    """
+    global _scheduler_thread
+    with _scheduler_lock:
+        if _scheduler_thread is not None and _scheduler_thread.is_alive():
+            return False
+        _scheduler_thread = threading.Thread(target=_scheduler_loop, name="feed-scheduler", daemon=True)
+        _scheduler_thread.start()
+        print(f"Feed refresh scheduler started (every {SCHEDULER_TICK_SECONDS}s)")
+        return True
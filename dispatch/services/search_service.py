@@ -0,0 +1,180 @@
+"""
+Full-text search over entries with SQLite FTS5.
+
+The entry_search table (see models.ENTRY_SEARCH_DDL) holds each entry's
+title and the plain text of its description and content, keyed by entry
+id. Rows are written in the same transaction as the entry itself: new
+entries from a refresh and articles fetched in full by update_entry. The
+plain text is extracted beforehand by parse_service.search_text, for new
+entries in the parser workers, so writing the index is only an insert. A
+trigger removes them when entries are deleted. rebuild_search_index()
+fills the table from scratch in chunks, for existing databases and if
+the index ever drifts.
+
+Searches run one MATCH against the index, ranked by bm25 with the title
+weighted highest, and return a highlighted snippet with each result.
+"""
+
+import os
+import re
+from collections import namedtuple
+
+from markupsafe import Markup, escape
+from sqlalchemy import column, func, literal_column, table, text
+
+from models import RssEntry, Session, ENTRY_SEARCH_TABLE, entry_read_state, join_read_state
+from .parse_service import search_text
+
+
+SEARCH_RESULTS_LIMIT = int(os.getenv("DISPATCH_SEARCH_RESULTS", "30"))
+SEARCH_INDEX_CHUNK_SIZE = 500
+SNIPPET_TOKENS = 16
+
+# Control characters mark matched terms in snippets, so the text can be
+# escaped before they are turned into <mark> tags
+_MATCH_START, _MATCH_END = "\x02", "\x03"
+
+SearchResult = namedtuple("SearchResult", ["id", "feed_id", "title", "published", "read", "snippet"])
+
+_search_table = table(ENTRY_SEARCH_TABLE, column("rowid"), column("rank"))
+# The table itself as a value, the first argument of FTS5's auxiliary functions
+_search_table_value = literal_column(ENTRY_SEARCH_TABLE)
+
+
+def index_entries(session, rows):
+    """
+    Add or replace entries in the search index.
+
+    Call in the same transaction as the insert or update of the entries.
+
+    Args:
+        session: Database session
+        rows: Entry rows (dicts with 'id' and 'search_text' from parse_service.search_text)
+
+    Returns:
+        int: Number of entries indexed
+    """
+    rows = [dict(row['search_text'], id=row['id']) for row in rows]
+    if rows:
+        session.execute(text(
+            f"INSERT OR REPLACE INTO {ENTRY_SEARCH_TABLE} (rowid, title, description, content) "
+            "VALUES (:id, :title, :description, :content)"
+        ), rows)
+    return len(rows)
+
+
+def build_match_query(query):
+    """
+    Turn what the user typed into an FTS5 query.
+
+    Every word must match. Words are quoted so FTS5 operators and stray
+    punctuation can't cause syntax errors, and the last word matches as a
+    prefix while it is still being typed.
+
+    Args:
+        query: The search box text
+
+    Returns:
+        str: FTS5 MATCH expression, or None if there is nothing to search for
+    """
+    words = re.findall(r"\w+", query or "")
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    if not query[-1].isspace():
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _highlight(snippet):
+    """Escape a snippet and turn its match markers into <mark> tags."""
+    return Markup(
+        str(escape(snippet or "")).replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>")
+    )
+
+
+def search_entries(query, feed_id="all", limit=SEARCH_RESULTS_LIMIT):
+    """
+    Find entries matching a search, best matches first.
+
+    Args:
+        query: The search box text
+        feed_id: The ID of the RSS feed to search, or "all" for every feed
+        limit: Maximum number of results
+
+    Returns:
+        list: SearchResult rows, whose snippet is HTML with <mark>ed matches
+    """
+    match_query = build_match_query(query)
+    if match_query is None:
+        return []
+
+    session = Session()
+    try:
+        snippet = func.snippet(_search_table_value, -1, _MATCH_START, _MATCH_END, "…", SNIPPET_TOKENS)
+        results = join_read_state(
+            session.query(
+                RssEntry.id, RssEntry.feed_id, RssEntry.title, RssEntry.published,
+                entry_read_state().label("read"), snippet,
+            )
+            .select_from(_search_table)
+            .join(RssEntry, RssEntry.id == _search_table.c.rowid)
+        ).filter(text(f"{ENTRY_SEARCH_TABLE} MATCH :match_query"))
+        if feed_id not in (None, "all"):
+            results = results.filter(RssEntry.feed_id == feed_id)
+        # FTS5 sorts by its configured bm25 rank itself, without a separate sort step
+        results = (
+            results.order_by(_search_table.c.rank)
+            .limit(limit)
+            .params(match_query=match_query)
+            .all()
+        )
+        return [SearchResult(*row[:5], _highlight(row[5])) for row in results]
+    except Exception as e:
+        print(f"Error searching entries for {query!r}: {e}")
+        return []
+    finally:
+        session.close()
+
+
+def rebuild_search_index(chunk_size=SEARCH_INDEX_CHUNK_SIZE):
+    """
+    Rebuild the search index from scratch, committing one chunk of entries at a time.
+
+    Args:
+        chunk_size: Number of entries to index per transaction
+
+    Returns:
+        int: Number of entries indexed, or -1 on error
+    """
+    session = Session()
+    try:
+        session.execute(text(f"DELETE FROM {ENTRY_SEARCH_TABLE}"))
+        session.commit()
+
+        indexed = 0
+        last_id = 0
+        while True:
+            rows = (
+                session.query(RssEntry.id, RssEntry.title, RssEntry.description, RssEntry.content)
+                .filter(RssEntry.id > last_id)
+                .order_by(RssEntry.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            indexed += index_entries(session, [
+                {'id': row.id, 'search_text': search_text(row.title, row.description, row.content)}
+                for row in rows
+            ])
+            session.commit()
+            last_id = rows[-1].id
+            print(f"Indexed {indexed} entries for search")
+        return indexed
+    except Exception as e:
+        session.rollback()
+        print(f"Error rebuilding search index: {e}")
+        return -1
+    finally:
+        session.close()
@@ -0,0 +1,213 @@
+"""
+Per-feed entry counters kept in the feed_stats table.
+
+The feed list needs every feed's unread, total and read counts and its
+newest article date. Working those out means scanning rss_entries on every
+page load, so instead one feed_stats row per feed is kept up to date in the
+same transaction as each change to the entries: new entries, read and
+unread changes, and feed removal. The helpers here take the caller's
+session and never commit.
+
+Feeds get their stats row when they are added, so listing the feeds only
+ever reads. A feed still without one gets it computed from its entries the
+first time its entries change, and rebuild_feed_stats() recomputes every
+row from scratch if the counters ever drift.
+"""
+
+from sqlalchemy import Select, and_, case, delete, exists, func, insert, or_, select, update
+
+from models import RssFeed, RssEntry, FeedStats, EntryReadOverride, Session, entry_read_state, watermark_covers_new_entry
+from .parse_service import _published_key
+
+
+def _counts_query(feed_ids=None):
+    """Select (feed_id, total, unread, read, latest) computed from the entries, one row per feed."""
+    # The outer join leaves one NULL entry row for a feed without entries, which must not count
+    is_read = and_(RssEntry.id.isnot(None), entry_read_state() == True)
+    read_count = func.coalesce(func.sum(case((is_read, 1), else_=0)), 0)
+    total_count = func.count(RssEntry.id)
+    query = (
+        select(
+            RssFeed.id,
+            total_count,
+            total_count - read_count,
+            read_count,
+            func.max(RssEntry.published),
+        )
+        .select_from(RssFeed)
+        .outerjoin(RssEntry, RssEntry.feed_id == RssFeed.id)
+        .outerjoin(EntryReadOverride, EntryReadOverride.entry_id == RssEntry.id)
+        .where(~exists().where(FeedStats.feed_id == RssFeed.id))
+        .group_by(RssFeed.id)
+    )
+    if feed_ids is not None:
+        query = query.where(RssFeed.id.in_(feed_ids if isinstance(feed_ids, Select) else list(feed_ids)))
+    return query
+
+
+def ensure_feed_stats(session, feed_ids=None):
+    """
+    Create stats rows, computed from the entries, for feeds that have none.
+
+    Args:
+        session: Database session
+        feed_ids: Feeds to check, as IDs or a SELECT of IDs (defaults to every feed)
+
+    Returns:
+        int: Number of stats rows created
+    """
+    statement = insert(FeedStats).from_select(
+        ['feed_id', 'total_count', 'unread_count', 'read_count', 'latest_published'],
+        _counts_query(feed_ids),
+    )
+    return session.execute(statement).rowcount
+
+
+def _newer(latest):
+    """Expression keeping the later of the stored latest_published and latest."""
+    return case(
+        (or_(FeedStats.latest_published.is_(None), FeedStats.latest_published < latest), latest),
+        else_=FeedStats.latest_published,
+    )
+
+
+def record_entries_added(session, feed_id, rows):
+    """
+    Count newly inserted entries in a feed's stats.
+
+    Call in the same transaction as the insert, after it has run.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed
+        rows: The inserted entry rows (dicts with 'read' and 'published')
+    """
+    if not rows:
+        return
+    if ensure_feed_stats(session, [feed_id]):
+        # The new row was computed from the entries, which already include these
+        return
+
+    # Entries that land below the feed's read watermark are already read
+    watermark = (
+        session.query(RssFeed.read_through_published, RssFeed.read_through_id)
+        .filter(RssFeed.id == feed_id)
+        .first()
+    )
+    read_count = sum(
+        1 for row in rows
+        if row.get('read') or (watermark and watermark_covers_new_entry(watermark, row.get('published')))
+    )
+    values = {
+        'total_count': FeedStats.total_count + len(rows),
+        'unread_count': FeedStats.unread_count + len(rows) - read_count,
+        'read_count': FeedStats.read_count + read_count,
+    }
+    dated = [row for row in rows if row.get('published')]
+    if dated:
+        # Undated items are stamped with a naive now(), parsed dates carry a time zone
+        values['latest_published'] = _newer(_published_key(max(dated, key=_published_key)))
+    session.execute(update(FeedStats).where(FeedStats.feed_id == feed_id).values(**values))
+
+
+def record_entry_published(session, feed_id, published):
+    """
+    Take an entry's newly set publication date into a feed's latest_published.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed
+        published: The entry's publication date
+    """
+    if published is None or ensure_feed_stats(session, [feed_id]):
+        return
+    session.execute(
+        update(FeedStats).where(FeedStats.feed_id == feed_id).values(latest_published=_newer(published))
+    )
+
+
+def record_read_changes(session, changed_by_feed, read_status):
+    """
+    Move entries between unread and read counts for several feeds.
+
+    Call before the entries are updated, with the number of entries per
+    feed whose read flag is about to change.
+
+    Args:
+        session: Database session
+        changed_by_feed: Dict of feed_id to number of entries changing
+        read_status: The entries' new read flag
+    """
+    changed_by_feed = {feed_id: count for feed_id, count in changed_by_feed.items() if count}
+    if not changed_by_feed:
+        return
+    ensure_feed_stats(session, changed_by_feed.keys())
+    for feed_id, count in changed_by_feed.items():
+        step = count if read_status else -count
+        session.execute(
+            update(FeedStats)
+            .where(FeedStats.feed_id == feed_id)
+            .values(
+                unread_count=FeedStats.unread_count - step,
+                read_count=FeedStats.read_count + step,
+            )
+        )
+
+
+def record_feed_read_state(session, feed_id, read_status):
+    """
+    Set a feed's counters after all of its entries became read or unread.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed, or None for every feed
+        read_status: The read flag every entry now has
+    """
+    ensure_feed_stats(session, None if feed_id is None else [feed_id])
+    statement = update(FeedStats)
+    if feed_id is not None:
+        statement = statement.where(FeedStats.feed_id == feed_id)
+    if read_status:
+        statement = statement.values(unread_count=0, read_count=FeedStats.total_count)
+    else:
+        statement = statement.values(unread_count=FeedStats.total_count, read_count=0)
+    session.execute(statement)
+
+
+def delete_feed_stats(session, feed_id):
+    """
+    Drop a feed's stats row, for when the feed is removed.
+
+    Args:
+        session: Database session
+        feed_id: The ID of the RSS feed
+    """
+    session.execute(delete(FeedStats).where(FeedStats.feed_id == feed_id))
+
+
+def rebuild_feed_stats(feed_ids=None):
+    """
+    Recompute stats rows from scratch from the entries.
+
+    Args:
+        feed_ids: Feeds to rebuild (defaults to every feed)
+
+    Returns:
+        int: Number of feeds rebuilt, or -1 on error
+    """
+    session = Session()
+    try:
+        statement = delete(FeedStats)
+        if feed_ids is not None:
+            statement = statement.where(FeedStats.feed_id.in_(list(feed_ids)))
+        session.execute(statement)
+        rebuilt = ensure_feed_stats(session, feed_ids)
+        session.commit()
+        print(f"Rebuilt feed stats for {rebuilt} feeds")
+        return rebuilt
+    except Exception as e:
+        session.rollback()
+        print(f"Error rebuilding feed stats: {e}")
+        return -1
+    finally:
+        session.close()
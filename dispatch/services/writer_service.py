@@ -0,0 +1,117 @@
+"""
+Single database writer for refresh results.
+
+SQLite allows one writer at a time, so having every refresh thread open
+its own session and commit makes them queue on the database lock (or fail
+with "database is locked"). Instead, producers hand their writes to one
+writer thread through a bounded queue. The writer groups whatever arrives
+within a short window, or up to a batch size, into a single transaction,
+so fetch and parse concurrency can grow without contending for the lock.
+"""
+
+import os
+import queue
+import threading
+import time
+import concurrent.futures
+
+
+WRITE_QUEUE_SIZE = int(os.getenv("DISPATCH_WRITE_QUEUE_SIZE", "256"))
+WRITE_BATCH_SIZE = int(os.getenv("DISPATCH_WRITE_BATCH_SIZE", "50"))
+WRITE_BATCH_SECONDS = float(os.getenv("DISPATCH_WRITE_BATCH_MS", "100")) / 1000
+
+
+class BatchWriter:
+    """
+    Serializes database writes onto one thread and commits them in groups.
+
+    Args:
+        apply: Function called as apply(session, *args) for each queued write;
+               it changes the session but must not commit
+        session_factory: Callable returning a new database session
+        queue_size: Maximum queued writes before submit blocks (defaults to WRITE_QUEUE_SIZE)
+        batch_size: Maximum writes per transaction (defaults to WRITE_BATCH_SIZE)
+        batch_seconds: How long to gather writes for one transaction (defaults to WRITE_BATCH_SECONDS)
+        name: Name of the writer thread
+    """
+
+    def __init__(self, apply, session_factory, queue_size=None, batch_size=None,
+                 batch_seconds=None, name="db-writer"):
+        self._apply = apply
+        self._session_factory = session_factory
+        self._queue = queue.Queue(maxsize=queue_size or WRITE_QUEUE_SIZE)
+        self.batch_size = batch_size or WRITE_BATCH_SIZE
+        self.batch_seconds = WRITE_BATCH_SECONDS if batch_seconds is None else batch_seconds
+        self._name = name
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+    def submit(self, *args):
+        """
+        Queue a write, blocking while the queue is full.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the apply function's return
+            value once the write has been committed
+        """
+        self._ensure_started()
+        future = concurrent.futures.Future()
+        self._queue.put((args, future))
+        return future
+
+    def _ensure_started(self):
+        """Start the writer thread on first use (or if it has died)."""
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        """Write batches forever."""
+        while True:
+            batch = self._next_batch()
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                print(f"Error in database writer: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _next_batch(self):
+        """Block for the next write, then gather more until the batch is full or the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch):
+        """Apply a batch in one transaction, falling back to one transaction per write on failure."""
+        error = None
+        session = self._session_factory()
+        try:
+            results = [self._apply(session, *args) for args, _ in batch]
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            error = e
+        finally:
+            session.close()
+
+        if error is None:
+            # Only report back once the writes are durable
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        elif len(batch) == 1:
+            batch[0][1].set_exception(error)
+        else:
+            print(f"Grouped write of {len(batch)} items failed, retrying individually: {error}")
+            for item in batch:
+                self._write_batch([item])
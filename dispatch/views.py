@@ -22,7 +22,6 @@ from services.feed_service import (
     remove_feed,
     get_all_feeds,
     get_feed_by_id,
-    get_favicon_url,
     toggle_feed_pin,
     get_feed_sort_preference,
     set_feed_sort_preference
@@ -54,6 +53,8 @@ from services.theme_service import (
     get_all_themes
 )
 
+from services.favicon_service import get_favicon_url
+
 from services.content_service import (
     article_date_format,
     article_long_date_format,
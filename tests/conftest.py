@@ -11,6 +11,7 @@ import sys
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'dispatch'))
 
 from models import Base, RssFeed, RssEntry, Settings
+from models.storage_profile import apply_storage_profile
 from app import app as flask_app
 from views import Session
 
@@ -30,8 +31,9 @@ def temp_db():
 
 @pytest.fixture(scope='function')
 def test_engine(temp_db):
-    """Create a test database engine."""
+    """Create a test database engine with the production storage profile."""
     engine = create_engine(temp_db)
+    apply_storage_profile(engine)
     Base.metadata.create_all(engine)
     yield engine
     Base.metadata.drop_all(engine)
@@ -63,15 +65,32 @@ def app(test_engine, monkeypatch):
     import services.feed_service as feed_service
     import services.entry_service as entry_service  
     import services.theme_service as theme_service
+    import services.health_service as health_service
+    import services.opml_service as opml_service
+    import services.favicon_service as favicon_service
+    import services.stats_service as stats_service
+    import services.read_state_service as read_state_service
+    import services.search_service as search_service
     
     monkeypatch.setattr(feed_service, 'Session', TestSession)
     monkeypatch.setattr(entry_service, 'Session', TestSession)
     monkeypatch.setattr(theme_service, 'Session', TestSession)
+    monkeypatch.setattr(health_service, 'Session', TestSession)
+    monkeypatch.setattr(opml_service, 'Session', TestSession)
+    monkeypatch.setattr(favicon_service, 'Session', TestSession)
+    monkeypatch.setattr(stats_service, 'Session', TestSession)
+    monkeypatch.setattr(read_state_service, 'Session', TestSession)
+    monkeypatch.setattr(search_service, 'Session', TestSession)
     
     # Also patch the Session in the services module paths for any tests that import directly
     monkeypatch.setattr('services.feed_service.Session', TestSession)
     monkeypatch.setattr('services.entry_service.Session', TestSession)
     monkeypatch.setattr('services.theme_service.Session', TestSession)
+    monkeypatch.setattr('services.health_service.Session', TestSession)
+    monkeypatch.setattr('services.opml_service.Session', TestSession)
+    monkeypatch.setattr('services.favicon_service.Session', TestSession)
+    monkeypatch.setattr('services.stats_service.Session', TestSession)
+    monkeypatch.setattr('services.read_state_service.Session', TestSession)
     
     flask_app.config['TESTING'] = True
     flask_app.config['WTF_CSRF_ENABLED'] = False
@@ -242,6 +261,14 @@ def mock_opml_content():
 </opml>'''
 
 
+@pytest.fixture(autouse=True)
+def favicon_store(tmp_path, monkeypatch):
+    """Keep stored favicons in a temporary directory."""
+    favicon_dir = tmp_path / 'favicons'
+    monkeypatch.setattr('services.favicon_service.FAVICON_DIR', str(favicon_dir))
+    return favicon_dir
+
+
 @pytest.fixture(autouse=True)
 def cleanup_static_files():
     """Cleanup static files created during testing."""
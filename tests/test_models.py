@@ -1,8 +1,10 @@
 import pytest
 from datetime import datetime, timedelta
+from sqlalchemy import create_engine
 from sqlalchemy.exc import IntegrityError
 
 from models import RssFeed, RssEntry, Settings
+from models.storage_profile import STORAGE_PROFILES, apply_storage_profile, read_pragmas
 
 
 @pytest.mark.unit
@@ -149,12 +151,10 @@ class TestRssEntry:
         )
         
         test_session.add(entry)
-        # SQLite doesn't enforce foreign key constraints by default in testing
-        # but the relationship should still work properly
-        test_session.commit()
-        
-        # Verify the entry was created but has no valid feed relationship
-        assert entry.feed is None
+        # The storage profile turns on SQLite's foreign key enforcement
+        with pytest.raises(IntegrityError):
+            test_session.commit()
+        test_session.rollback()
     
     def test_entry_feed_relationship(self, test_session, sample_feed):
         """Test the relationship between entry and feed."""
@@ -260,4 +260,60 @@ class TestSettings:
         
         # Verify there's only one setting with this key
         all_settings = test_session.query(Settings).filter_by(key='multi_key').all()
-        assert len(all_settings) == 1
\ No newline at end of file
+        assert len(all_settings) == 1
+
+
+@pytest.mark.unit
+class TestMissingTables:
+    """Test creating tables added to the models after a database was initialised."""
+
+    @pytest.mark.parametrize('table_name', ['feed_fetch_log', 'favicon_hosts'])
+    def test_missing_tables_are_created(self, test_engine, monkeypatch, table_name):
+        """Test that an upgraded database gets tables it didn't have, without touching the others."""
+        from sqlalchemy import inspect, text
+        from migrations import create_missing_tables
+
+        with test_engine.begin() as conn:
+            conn.execute(text(f'DROP TABLE {table_name}'))
+        monkeypatch.setattr('models.engine', test_engine)
+
+        assert create_missing_tables() is True
+        assert table_name in inspect(test_engine).get_table_names()
+
+
+@pytest.mark.unit
+class TestStorageProfile:
+    """Test the SQLite pragmas applied to new connections."""
+
+    def test_tuned_profile_sets_pragmas(self, tmp_path):
+        """Test that the tuned profile switches to WAL and sets every pragma."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+        pragmas = apply_storage_profile(engine, "tuned")
+
+        with engine.connect() as connection:
+            current = read_pragmas(connection)
+        engine.dispose()
+
+        assert pragmas == STORAGE_PROFILES["tuned"]
+        assert current['journal_mode'] == 'wal'
+        assert current['synchronous'] == 1  # NORMAL
+        assert current['busy_timeout'] == STORAGE_PROFILES["tuned"]['busy_timeout']
+        assert current['cache_size'] == STORAGE_PROFILES["tuned"]['cache_size']
+        assert current['temp_store'] == 2  # MEMORY
+        assert current['foreign_keys'] == 1
+
+    def test_default_profile_leaves_sqlite_defaults(self, tmp_path):
+        """Test that the default profile applies nothing."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'default.db'}")
+        assert apply_storage_profile(engine, "default") == {}
+
+        with engine.connect() as connection:
+            assert read_pragmas(connection, ['journal_mode'])['journal_mode'] == 'delete'
+        engine.dispose()
+
+    def test_unknown_profile_falls_back_to_defaults(self, tmp_path):
+        """Test that a misspelled profile name does not break the engine."""
+        engine = create_engine(f"sqlite:///{tmp_path / 'unknown.db'}")
+
+        assert apply_storage_profile(engine, "fastest") == {}
+        engine.dispose()
@@ -2,7 +2,7 @@ import pytest
 import os
 import tempfile
 from io import BytesIO
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 from xml.etree import ElementTree as ET
 
 from models import RssFeed, Settings
@@ -16,16 +16,13 @@ class TestOPMLOperations:
         """Test parsing a valid OPML file."""
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = mock_opml_content.encode('utf-8')
+        mock_file = BytesIO(mock_opml_content.encode('utf-8'))
         
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             add_feeds_from_opml(mock_file)
         
-        # Should call add_feed for each feed in OPML
-        assert mock_add_feed.call_count == 2
-        mock_add_feed.assert_any_call('https://test1.com/feed.xml')
-        mock_add_feed.assert_any_call('https://test2.com/feed.xml')
+        # Should import every feed in the OPML in one batch
+        mock_import.assert_called_once_with(['https://test1.com/feed.xml', 'https://test2.com/feed.xml'])
     
     def test_opml_parsing_nested_structure(self):
         """Test parsing OPML with nested folder structure."""
@@ -48,14 +45,14 @@ class TestOPMLOperations:
         
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = nested_opml.encode('utf-8')
+        mock_file = BytesIO(nested_opml.encode('utf-8'))
         
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             add_feeds_from_opml(mock_file)
         
         # Should find all feeds regardless of nesting
-        assert mock_add_feed.call_count == 4
+        called_urls = mock_import.call_args[0][0]
+        assert len(called_urls) == 4
         expected_urls = [
             'https://tech1.com/feed.xml',
             'https://tech2.com/feed.xml', 
@@ -63,7 +60,6 @@ class TestOPMLOperations:
             'https://direct.com/feed.xml'
         ]
         
-        called_urls = [call[0][0] for call in mock_add_feed.call_args_list]
         for url in expected_urls:
             assert url in called_urls
     
@@ -82,15 +78,14 @@ class TestOPMLOperations:
         
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = malformed_opml.encode('utf-8')
+        mock_file = BytesIO(malformed_opml.encode('utf-8'))
         
         # Should handle parsing errors gracefully
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             # The function should handle the error internally and not crash
             add_feeds_from_opml(mock_file)
             # Since the XML is malformed, no feeds should be added
-            mock_add_feed.assert_not_called()
+            mock_import.assert_not_called()
     
     def test_opml_parsing_empty_file(self):
         """Test parsing empty OPML file."""
@@ -105,14 +100,13 @@ class TestOPMLOperations:
         
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = empty_opml.encode('utf-8')
+        mock_file = BytesIO(empty_opml.encode('utf-8'))
         
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             add_feeds_from_opml(mock_file)
         
-        # Should not call add_feed for empty file
-        mock_add_feed.assert_not_called()
+        # Should not import anything for an empty file
+        mock_import.assert_not_called()
     
     def test_opml_parsing_missing_xmlurl(self):
         """Test parsing OPML with missing xmlUrl attributes."""
@@ -130,16 +124,13 @@ class TestOPMLOperations:
         
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = missing_url_opml.encode('utf-8')
+        mock_file = BytesIO(missing_url_opml.encode('utf-8'))
         
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             add_feeds_from_opml(mock_file)
         
-        # Should only call add_feed for valid feeds
-        assert mock_add_feed.call_count == 2
-        mock_add_feed.assert_any_call('https://valid.com/feed.xml')
-        mock_add_feed.assert_any_call('https://valid2.com/feed.xml')
+        # Should only import valid feeds
+        mock_import.assert_called_once_with(['https://valid.com/feed.xml', 'https://valid2.com/feed.xml'])
     
     def test_opml_parsing_with_special_characters(self):
         """Test parsing OPML with special characters and encoding."""
@@ -158,16 +149,14 @@ class TestOPMLOperations:
         
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = special_char_opml.encode('utf-8')
+        mock_file = BytesIO(special_char_opml.encode('utf-8'))
         
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             add_feeds_from_opml(mock_file)
         
         # Should handle special characters correctly
-        assert mock_add_feed.call_count == 4
-        
-        called_urls = [call[0][0] for call in mock_add_feed.call_args_list]
+        called_urls = mock_import.call_args[0][0]
+        assert len(called_urls) == 4
         assert 'https://example.com/feed&test.xml' in called_urls
         assert 'https://example.com/quotes.xml' in called_urls
         assert 'https://unicode.com/中文.xml' in called_urls
@@ -193,14 +182,13 @@ class TestOPMLOperations:
         
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = large_opml.encode('utf-8')
+        mock_file = BytesIO(large_opml.encode('utf-8'))
         
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             add_feeds_from_opml(mock_file)
         
         # Should handle large files
-        assert mock_add_feed.call_count == 1000
+        assert len(mock_import.call_args[0][0]) == 1000
     
     def test_opml_file_encoding_variations(self):
         """Test OPML files with different encodings."""
@@ -209,13 +197,66 @@ class TestOPMLOperations:
         
         from views import add_feeds_from_opml
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = utf8_bom_opml.encode('utf-8-sig')
+        mock_file = BytesIO(utf8_bom_opml.encode('utf-8-sig'))
         
-        with patch('services.opml_service.add_feed') as mock_add_feed:
+        with patch('services.opml_service.import_feed_urls', return_value=(0, 0, [])) as mock_import:
             add_feeds_from_opml(mock_file)
         
-        mock_add_feed.assert_called_once_with('https://test.com/feed.xml')
+        mock_import.assert_called_once_with(['https://test.com/feed.xml'])
+
+    def test_iter_opml_feeds_yields_category_paths(self):
+        """Test that feed records carry the folders they are nested in."""
+        nested_opml = b'''<?xml version="1.0" encoding="UTF-8"?>
+        <opml version="2.0">
+            <head><title>Folders</title></head>
+            <body>
+                <outline text="Tech">
+                    <outline text="Python">
+                        <outline text="Feed 1" title="Feed One" xmlUrl="https://py.example/feed" />
+                    </outline>
+                    <outline text="Feed 2" xmlUrl="https://tech.example/feed" />
+                </outline>
+                <outline text="Top" xmlUrl="https://top.example/feed" />
+            </body>
+        </opml>'''
+        from services.opml_service import iter_opml_feeds
+
+        feeds = list(iter_opml_feeds(BytesIO(nested_opml)))
+
+        assert feeds == [
+            {'url': 'https://py.example/feed', 'title': 'Feed One', 'category': ('Tech', 'Python')},
+            {'url': 'https://tech.example/feed', 'title': 'Feed 2', 'category': ('Tech',)},
+            {'url': 'https://top.example/feed', 'title': 'Top', 'category': ()},
+        ]
+
+    def test_iter_opml_feeds_streams_in_chunks(self):
+        """Test that the reader consumes the upload in small reads and yields as it goes."""
+        parts = ['<?xml version="1.0" encoding="UTF-8"?><opml version="1.0"><body>']
+        parts += [f'<outline text="Feed {i}" xmlUrl="https://example{i}.com/feed.xml" />' for i in range(2000)]
+        parts.append('</body></opml>')
+        stream = BytesIO('\n'.join(parts).encode('utf-8'))
+        from services import opml_service
+
+        with patch.object(opml_service, 'OPML_READ_CHUNK_SIZE', 1024):
+            feeds = opml_service.iter_opml_feeds(stream)
+            first = next(feeds)
+            # The first record arrives long before the whole file has been read
+            assert first['url'] == 'https://example0.com/feed.xml'
+            assert stream.tell() < len(stream.getvalue()) // 10
+            remaining = list(feeds)
+
+        assert len(remaining) == 1999
+
+    def test_iter_opml_feeds_reads_file_path(self):
+        """Test that a path on disk can be read directly."""
+        from services.opml_service import iter_opml_feeds
+
+        with tempfile.NamedTemporaryFile(suffix='.opml', delete=False) as opml_file:
+            opml_file.write(b'<opml version="1.0"><body><outline xmlUrl="https://path.example/feed" /></body></opml>')
+        try:
+            assert [feed['url'] for feed in iter_opml_feeds(opml_file.name)] == ['https://path.example/feed']
+        finally:
+            os.unlink(opml_file.name)
 
 
 @pytest.mark.unit
@@ -304,7 +345,9 @@ class TestConfigurationManagement:
         with patch('services.entry_service.Session') as mock_session:
             # Create mock query chain that matches actual implementation
             mock_query = mock_session.return_value.query.return_value
-            mock_query.filter_by.return_value = mock_query
+            mock_query.join.return_value = mock_query
+            mock_query.outerjoin.return_value = mock_query
+            mock_query.filter.return_value = mock_query
             mock_query.order_by.return_value = mock_query
             mock_query.limit.return_value = mock_query
             mock_query.offset.return_value = mock_query
@@ -377,7 +420,10 @@ class TestConfigurationIntegration:
         
         opml_file = (BytesIO(opml_with_existing.encode()), 'mixed.opml')
         
-        response = client.post('/upload_opml', data={'opml_file': opml_file})
+        # Imports run one at a time, so keep the real background import out of the way
+        with patch('app.executor.submit_stored') as mock_submit:
+            response = client.post('/upload_opml', data={'opml_file': opml_file})
+        mock_submit.assert_called_once()
         
         assert response.status_code == 200
         assert b'Processing OPML file' in response.data
@@ -451,7 +497,9 @@ class TestConfigurationIntegration:
         opml_file = (BytesIO(large_opml.encode()), 'large.opml')
         
         start_time = time.time()
-        response = client.post('/upload_opml', data={'opml_file': opml_file})
+        with patch('app.executor.submit_stored') as mock_submit:
+            response = client.post('/upload_opml', data={'opml_file': opml_file})
+        mock_submit.assert_called_once()
         end_time = time.time()
         
         assert response.status_code == 200
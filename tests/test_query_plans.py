@@ -0,0 +1,116 @@
+import pytest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from models import RssFeed, RssEntry
+from services.entry_service import (
+    get_feed_entries_by_feed_id, get_feed_entries_page, get_existing_entry_links, mark_entry_as_read, mark_feed_entries_as_read
+)
+from services.feed_service import get_all_feeds, get_feed_by_id, remove_feed
+from services.scheduler_service import compute_next_fetch_at
+from services.stats_service import ensure_feed_stats
+from services.read_state_service import mark_entries_read, mark_entries_read_before, mark_entries_read_through
+from services.search_service import search_entries
+
+
+@contextmanager
+def recorded_statements(engine):
+    """Collect (statement, parameters) for every single-row statement run on the engine."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def entry_table_scans(engine, statements):
+    """
+    Run EXPLAIN QUERY PLAN on every statement that touches rss_entries.
+
+    Returns:
+        list: (statement, plan line) for each full scan of rss_entries and
+        each ORDER BY that needs a temporary sort
+    """
+    problems = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if 'rss_entries' not in statement:
+                continue
+            plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+            for row in plan:
+                detail = row[-1]
+                full_scan = detail.startswith('SCAN rss_entries') and 'INDEX' not in detail
+                if full_scan or 'TEMP B-TREE FOR ORDER BY' in detail:
+                    problems.append((statement, detail))
+    return problems
+
+
+@pytest.fixture
+def populated_feeds(test_session):
+    """Two feeds with a mix of read and unread entries."""
+    now = datetime.now()
+    feeds = [RssFeed(url=f'https://feed{i}.example/rss', title=f'Feed {i}') for i in range(2)]
+    test_session.add_all(feeds)
+    test_session.commit()
+    test_session.add_all([
+        RssEntry(feed_id=feed.id, title=f'Entry {n}', link=f'{feed.url}/{n}',
+                 published=now - timedelta(hours=n), read=n % 2 == 0)
+        for feed in feeds for n in range(20)
+    ])
+    test_session.commit()
+    return [feed.id for feed in feeds]
+
+
+@pytest.mark.unit
+class TestEntryQueryPlans:
+    """Check that the hot entry queries are answered from indexes."""
+
+    def test_hot_queries_use_indexes(self, test_session, test_engine, populated_feeds):
+        """Test that no service query over rss_entries falls back to a full scan."""
+        feed_id, other_feed_id = populated_feeds
+        entry_id = test_session.query(RssEntry.id).filter_by(feed_id=feed_id).first()[0]
+
+        with recorded_statements(test_engine) as statements, \
+             patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.read_state_service.Session', return_value=test_session), \
+             patch('services.search_service.Session', return_value=test_session), \
+             patch('services.feed_service.Session', return_value=test_session):
+            get_feed_entries_by_feed_id(feed_id, page=2)
+            get_feed_entries_by_feed_id("all", page=2)
+            for list_id in (feed_id, "all"):
+                _, cursor = get_feed_entries_page(list_id, entries_per_page=5)
+                get_feed_entries_page(list_id, cursor, entries_per_page=30)
+            get_existing_entry_links(test_session, feed_id, [f'https://feed0.example/rss/{n}' for n in range(5)])
+            compute_next_fetch_at(test_session, feed_id)
+            ensure_feed_stats(test_session, [feed_id])
+            get_all_feeds("last_updated")
+            get_feed_by_id(feed_id)
+            mark_entry_as_read(entry_id, True)
+            mark_entries_read([entry_id, entry_id + 1])
+            mark_entries_read_before(datetime.now() - timedelta(hours=15), feed_id)
+            mark_entries_read_through(entry_id + 5, feed_id)
+            mark_feed_entries_as_read(feed_id, True)
+            mark_feed_entries_as_read("all", True)
+            search_entries("entry")
+            search_entries("entry 1", feed_id)
+            remove_feed(other_feed_id)
+
+        assert any('rss_entries' in statement for statement, _ in statements)
+        assert entry_table_scans(test_engine, statements) == []
+
+    def test_check_reports_a_full_scan(self, test_engine, populated_feeds):
+        """Test that a query no index can serve is reported."""
+        statement = "SELECT id FROM rss_entries WHERE title = ?"
+
+        problems = entry_table_scans(test_engine, [(statement, ('Entry 3',))])
+
+        assert problems == [(statement, 'SCAN rss_entries')]
@@ -0,0 +1,949 @@
+import io
+import pytest
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+
+import httpx
+import responses
+
+from models import RssFeed, RssEntry, FeedFetchLog, FeedStats, FaviconHost
+from services.fetch_service import fetch_feeds
+from services import entry_service
+from services.entry_service import add_rss_entries, add_rss_entries_for_all_feeds
+from services.writer_service import BatchWriter
+from services.http_service import http_get, ResponseTooLarge, USER_AGENT
+from services.parse_service import parse_feed_body, fingerprint_body
+from services.feed_service import get_paused_feeds, unpause_feed, remove_feed
+from services.entry_service import mark_entry_as_read, mark_feed_entries_as_read
+from services.stats_service import rebuild_feed_stats
+from services.favicon_service import (
+    refresh_favicons_for_feeds, get_favicon_refresh_progress, favicon_file_path, normalize_favicon, letter_tile
+)
+from services.health_service import get_feed_health, percentile, prune_fetch_log, FETCH_LOG_RETENTION
+from services.scheduler_service import (
+    compute_next_fetch_at, get_server_refresh_hint,
+    DEFAULT_REFRESH_INTERVAL, MIN_REFRESH_INTERVAL, MAX_REFRESH_INTERVAL, AUTO_PAUSE_AFTER
+)
+
+
+SAMPLE_RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0">
+  <channel>
+    <title>Sample</title>
+    <link>https://example.com</link>
+    <item>
+      <title>First</title>
+      <link>https://example.com/first</link>
+      <pubDate>Wed, 01 Jan 2020 13:00:00 GMT</pubDate>
+    </item>
+    <item>
+      <title>Second</title>
+      <link>https://example.com/second</link>
+      <pubDate>Wed, 01 Jan 2020 14:00:00 GMT</pubDate>
+    </item>
+  </channel>
+</rss>"""
+
+
+def make_rss(item_count, newest_first=True, prefix='item'):
+    base = datetime(2020, 1, 1, 12, 0)
+    hours = range(item_count - 1, -1, -1) if newest_first else range(item_count)
+    items = ''.join(
+        f"<item><title>{prefix} {hour}</title><link>https://example.com/{prefix}/{hour}</link>"
+        f"<pubDate>{(base + timedelta(hours=hour)).strftime('%a, %d %b %Y %H:%M:%S GMT')}</pubDate></item>"
+        for hour in hours
+    )
+    return f'<rss version="2.0"><channel><title>Big</title>{items}</channel></rss>'.encode()
+
+
+def make_fetch_result(feed_id, status=200, body=SAMPLE_RSS, headers=None, error=None):
+    return {
+        'feed_id': feed_id,
+        'url': 'https://example.com/feed.xml',
+        'status': status,
+        'headers': headers or {},
+        'body': body,
+        'error': error,
+    }
+
+
+@pytest.mark.unit
+class TestFetchEngine:
+    """Test the asynchronous feed download engine."""
+
+    def test_fetch_feeds_downloads_every_feed(self):
+        """Test that every feed is downloaded and reported."""
+        def handler(request):
+            return httpx.Response(200, content=SAMPLE_RSS, headers={'ETag': '"v1"'})
+
+        feeds = [{'id': i, 'url': f'https://host{i}.example/feed.xml'} for i in range(5)]
+        results = fetch_feeds(feeds, transport=httpx.MockTransport(handler))
+
+        assert sorted(r['feed_id'] for r in results) == list(range(5))
+        for result in results:
+            assert result['status'] == 200
+            assert result['body'] == SAMPLE_RSS
+            assert result['headers']['etag'] == '"v1"'
+            assert result['error'] is None
+
+    def test_fetch_feeds_sends_validators(self):
+        """Test that stored validators are sent as conditional headers."""
+        seen_headers = {}
+
+        def handler(request):
+            seen_headers.update(request.headers)
+            return httpx.Response(304)
+
+        feeds = [{'id': 1, 'url': 'https://example.com/feed.xml',
+                  'etag': '"v1"', 'modified': 'Wed, 01 Jan 2020 12:00:00 GMT'}]
+        results = fetch_feeds(feeds, transport=httpx.MockTransport(handler))
+
+        assert results[0]['status'] == 304
+        assert seen_headers['if-none-match'] == '"v1"'
+        assert seen_headers['if-modified-since'] == 'Wed, 01 Jan 2020 12:00:00 GMT'
+
+    def test_fetch_feeds_respects_per_host_limit(self):
+        """Test that no more than max_per_host downloads run against one host."""
+        in_flight = {'current': 0, 'peak': 0}
+
+        async def handler(request):
+            in_flight['current'] += 1
+            in_flight['peak'] = max(in_flight['peak'], in_flight['current'])
+            await asyncio.sleep(0.01)
+            in_flight['current'] -= 1
+            return httpx.Response(200, content=SAMPLE_RSS)
+
+        feeds = [{'id': i, 'url': f'https://same-host.example/feed{i}.xml'} for i in range(10)]
+        results = fetch_feeds(feeds, max_per_host=2, transport=httpx.MockTransport(handler))
+
+        assert len(results) == 10
+        assert in_flight['peak'] == 2
+
+    def test_fetch_feeds_reports_errors(self):
+        """Test that transport errors are reported instead of raised."""
+        def handler(request):
+            raise httpx.ConnectError("connection refused")
+
+        feeds = [{'id': 1, 'url': 'https://down.example/feed.xml'}]
+        with patch('services.fetch_service.RETRY_BACKOFF', 0):
+            results = fetch_feeds(feeds, transport=httpx.MockTransport(handler))
+
+        assert results[0]['status'] is None
+        assert 'ConnectError' in results[0]['error']
+
+    def test_fetch_feeds_retries_transient_failures(self):
+        """Test that 5xx responses are retried before giving up."""
+        statuses = iter([503, 200])
+
+        def handler(request):
+            return httpx.Response(next(statuses), content=SAMPLE_RSS)
+
+        feeds = [{'id': 1, 'url': 'https://flaky.example/feed.xml'}]
+        with patch('services.fetch_service.RETRY_BACKOFF', 0):
+            results = fetch_feeds(feeds, transport=httpx.MockTransport(handler))
+
+        assert results[0]['status'] == 200
+        assert results[0]['error'] is None
+
+    def test_fetch_feeds_enforces_size_limit_and_user_agent(self):
+        """Test that oversized bodies are rejected and requests identify Dispatch."""
+        seen_agents = []
+
+        def handler(request):
+            seen_agents.append(request.headers['user-agent'])
+            return httpx.Response(200, content=SAMPLE_RSS)
+
+        feeds = [{'id': 1, 'url': 'https://big.example/feed.xml'}]
+        with patch('services.fetch_service.FEED_MAX_BYTES', 100):
+            results = fetch_feeds(feeds, transport=httpx.MockTransport(handler))
+
+        assert results[0]['body'] is None
+        assert 'ResponseTooLarge' in results[0]['error']
+        assert seen_agents == [USER_AGENT]
+
+    def test_fetch_feeds_streams_results_to_callback(self):
+        """Test that results are handed to the callback instead of being collected."""
+        def handler(request):
+            return httpx.Response(200, content=SAMPLE_RSS)
+
+        received = []
+        feeds = [{'id': i, 'url': f'https://host{i}.example/feed.xml'} for i in range(3)]
+        results = fetch_feeds(feeds, on_result=received.append, transport=httpx.MockTransport(handler))
+
+        assert results == []
+        assert len(received) == 3
+
+
+@pytest.mark.unit
+class TestHttpClient:
+    """Test the shared HTTP client used for one-off requests."""
+
+    @responses.activate
+    def test_http_get_sends_user_agent(self):
+        """Test that requests carry the Dispatch User-Agent."""
+        responses.add(responses.GET, 'https://example.com/page', body='ok')
+
+        response = http_get('https://example.com/page')
+
+        assert response.text == 'ok'
+        assert responses.calls[0].request.headers['User-Agent'] == USER_AGENT
+
+    @responses.activate
+    def test_http_get_rejects_oversized_body(self):
+        """Test that bodies larger than the limit are abandoned."""
+        responses.add(responses.GET, 'https://example.com/huge', body=b'x' * 2048)
+
+        with pytest.raises(ResponseTooLarge):
+            http_get('https://example.com/huge', max_bytes=1024)
+
+
+@pytest.mark.unit
+class TestBatchWriter:
+    """Test the single database writer thread."""
+
+    def test_writes_are_committed_in_groups(self):
+        """Test that writes arriving together share one transaction."""
+        session = MagicMock()
+        writer = BatchWriter(lambda session, value: value * 2, lambda: session, batch_seconds=0.5)
+
+        futures = [writer.submit(i) for i in range(10)]
+
+        assert [future.result(timeout=5) for future in futures] == [i * 2 for i in range(10)]
+        assert session.commit.call_count == 1
+
+    def test_batch_is_capped_at_batch_size(self):
+        """Test that a batch never holds more than batch_size writes."""
+        session = MagicMock()
+        writer = BatchWriter(lambda session, value: value, lambda: session, batch_size=4, batch_seconds=0.5)
+
+        futures = [writer.submit(i) for i in range(10)]
+        for future in futures:
+            future.result(timeout=5)
+
+        assert session.commit.call_count == 3
+
+    def test_failed_write_does_not_sink_the_batch(self):
+        """Test that a failing write is isolated and the rest still commit."""
+        session = MagicMock()
+
+        def apply(session, value):
+            if value == 'bad':
+                raise ValueError("bad row")
+            return value
+
+        writer = BatchWriter(apply, lambda: session, batch_seconds=0.5)
+        futures = [writer.submit(value) for value in ('a', 'bad', 'b')]
+
+        assert futures[0].result(timeout=5) == 'a'
+        assert futures[2].result(timeout=5) == 'b'
+        with pytest.raises(ValueError):
+            futures[1].result(timeout=5)
+
+
+@pytest.mark.unit
+class TestFetchResultIngestion:
+    """Test ingesting responses downloaded by the fetch engine."""
+
+    def test_parse_feed_body_returns_compact_records(self):
+        """Test that parsing yields picklable entry rows plus status and validators."""
+        import pickle
+
+        parsed = parse_feed_body(make_fetch_result(
+            1, headers={'etag': '"v2"', 'last-modified': 'Thu, 02 Jan 2020 12:00:00 GMT'}
+        ))
+
+        assert parsed['status'] == 200
+        assert parsed['etag'] == '"v2"'
+        assert parsed['modified'] == 'Thu, 02 Jan 2020 12:00:00 GMT'
+        assert parsed['error'] is None
+        assert [row['link'] for row in parsed['entries']] == [
+            'https://example.com/first', 'https://example.com/second'
+        ]
+        assert pickle.loads(pickle.dumps(parsed)) == parsed
+
+    def test_parse_feed_body_reports_fetch_errors(self):
+        """Test that fetch errors pass through the parser stage."""
+        parsed = parse_feed_body(make_fetch_result(1, status=None, body=None, error="ReadTimeout"))
+
+        assert parsed['entries'] == []
+        assert parsed['error'] == "Fetch error: ReadTimeout"
+
+    def test_add_rss_entries_from_fetch_result(self, test_session, sample_feed):
+        """Test that a downloaded body is parsed and stored without refetching."""
+        feed_id = sample_feed.id
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('feedparser.http.get') as mock_http_get:
+            success, message = add_rss_entries(feed_id, make_fetch_result(feed_id, headers={'etag': '"v2"'}))
+
+        mock_http_get.assert_not_called()
+        assert success is True
+        assert message == "Added 2 entries"
+        assert test_session.query(RssEntry).filter_by(feed_id=feed_id).count() == 2
+        assert test_session.query(RssFeed).filter_by(id=feed_id).first().etag == '"v2"'
+
+    def test_added_entries_are_searchable(self, test_session, sample_feed):
+        """Test that entries are indexed for search in the same transaction they are stored."""
+        from services.search_service import search_entries
+
+        feed_id = sample_feed.id
+        with patch('services.entry_service.Session', return_value=test_session):
+            add_rss_entries(feed_id, make_fetch_result(feed_id))
+
+        with patch('services.search_service.Session', return_value=test_session):
+            results = search_entries('second')
+        assert [result.title for result in results] == ['Second']
+
+    def test_add_rss_entries_from_not_modified_result(self, test_session, sample_feed):
+        """Test that a 304 from the fetch engine skips all entry work."""
+        feed_id = sample_feed.id
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            success, message = add_rss_entries(feed_id, make_fetch_result(feed_id, status=304, body=None))
+
+        assert success is True
+        assert message == "Not modified"
+        assert test_session.query(RssEntry).filter_by(feed_id=feed_id).count() == 0
+
+    def test_add_rss_entries_from_failed_fetch(self, test_session, sample_feed):
+        """Test that a transport error is reported as a failure."""
+        feed_id = sample_feed.id
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            success, message = add_rss_entries(
+                feed_id, make_fetch_result(feed_id, status=None, body=None, error="ConnectError: refused")
+            )
+
+        assert success is False
+        assert "ConnectError" in message
+
+
+@pytest.mark.unit
+class TestContentFingerprint:
+    """Test skipping the parse when a feed body has not changed."""
+
+    def test_parse_skipped_for_known_body(self):
+        """Test that a body matching the stored fingerprint is not parsed."""
+        first = parse_feed_body(make_fetch_result(1))
+
+        with patch('feedparser.parse') as mock_parse:
+            second = parse_feed_body(make_fetch_result(1), known_hash=first['content_hash'])
+
+        mock_parse.assert_not_called()
+        assert first['content_hash'] == fingerprint_body(SAMPLE_RSS)
+        assert first['unchanged'] is False
+        assert second['unchanged'] is True
+        assert second['entries'] == []
+
+    @responses.activate
+    def test_refresh_with_identical_body_skips_entry_work(self, test_session, sample_feed):
+        """Test that a server repeating the same 200 response is treated as not modified."""
+        feed_id = sample_feed.id
+        responses.add(responses.GET, sample_feed.url, body=SAMPLE_RSS, status=200)
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            first = add_rss_entries(feed_id)
+            with patch('services.entry_service.get_existing_entry_links') as mock_lookup:
+                second = add_rss_entries(feed_id)
+
+        assert first == (True, "Added 2 entries")
+        assert second == (True, "Not modified (same content)")
+        mock_lookup.assert_not_called()
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert feed.content_hash == fingerprint_body(SAMPLE_RSS)
+
+    @responses.activate
+    def test_identical_body_keeps_ttl_from_last_parse(self, test_session, sample_feed):
+        """Test that skipping the parse still schedules with the feed's last <ttl>."""
+        feed_id = sample_feed.id
+        body = SAMPLE_RSS.replace(b'<channel>', b'<channel><ttl>600</ttl>', 1)
+        responses.add(responses.GET, sample_feed.url, body=body, status=200)
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            add_rss_entries(feed_id)
+            second = add_rss_entries(feed_id)
+
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert second == (True, "Not modified (same content)")
+        assert feed.ttl == 600
+        assert feed.next_fetch_at - datetime.now() >= timedelta(hours=10) * 0.85
+
+
+@pytest.mark.unit
+class TestLargeFeedLimits:
+    """Test item caps and early termination for very large feeds."""
+
+    def test_newest_first_feed_is_capped_in_document_order(self):
+        """Test that a newest-first feed keeps its first max_items entries."""
+        parsed = parse_feed_body(make_fetch_result(1, body=make_rss(50)), max_items=5)
+
+        assert parsed['newest_first'] is True
+        assert [row['title'] for row in parsed['entries']] == [f'item {h}' for h in range(49, 44, -1)]
+
+    def test_oldest_first_feed_keeps_newest_entries(self):
+        """Test that capping an oldest-first feed keeps the most recent entries."""
+        parsed = parse_feed_body(make_fetch_result(1, body=make_rss(50, newest_first=False)), max_items=5)
+
+        assert parsed['newest_first'] is False
+        assert [row['title'] for row in parsed['entries']] == [f'item {h}' for h in range(49, 44, -1)]
+
+    def test_per_feed_cap_applies_on_refresh(self, test_session, sample_feed):
+        """Test that the feed's own max_items overrides the global cap."""
+        feed_id = sample_feed.id
+        sample_feed.max_items = 3
+        test_session.commit()
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.entry_service.fetch_feed', return_value=make_fetch_result(feed_id, body=make_rss(20))):
+            success, message = add_rss_entries(feed_id)
+
+        assert message == "Added 3 entries"
+
+    def test_ingestion_stops_after_run_of_known_items(self, test_session, sample_feed):
+        """Test that a newest-first feed stops being scanned once known items repeat."""
+        feed_id = sample_feed.id
+        # Hours 0-29 are already stored; only hours 30-32 are new
+        for hour in range(30):
+            test_session.add(RssEntry(feed_id=feed_id, title=f'item {hour}',
+                                      link=f'https://example.com/item/{hour}'))
+        test_session.commit()
+        body = make_rss(33)
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.entry_service.STOP_AFTER_KNOWN_ITEMS', 5), \
+             patch('services.entry_service.KNOWN_SCAN_CHUNK_SIZE', 4), \
+             patch('services.entry_service.get_existing_entry_links',
+                   wraps=entry_service.get_existing_entry_links) as mock_lookup:
+            success, message = add_rss_entries(feed_id, make_fetch_result(feed_id, body=body))
+
+        assert message == "Added 3 entries"
+        # 3 new + 5 known rows fit in two chunks of 4, so the other 25 known rows are never checked
+        assert mock_lookup.call_count == 2
+
+
+@pytest.mark.unit
+class TestSetBasedIngestion:
+    """Test that new entries are found and inserted in bulk."""
+
+    def test_existing_and_duplicate_links_are_skipped(self, test_session, sample_feed, test_engine):
+        """Test insert counts with known links and duplicates inside one fetch."""
+        feed_id = sample_feed.id
+        test_session.add(RssEntry(feed_id=feed_id, title='First', link='https://example.com/first'))
+        test_session.commit()
+
+        body = SAMPLE_RSS.replace(
+            b"</channel>",
+            b"<item><title>Second again</title><link>https://example.com/second</link></item></channel>"
+        )
+
+        entry_selects = []
+
+        def count_selects(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT rss_entries.link"):
+                entry_selects.append(statement)
+
+        from sqlalchemy import event
+        event.listen(test_engine, "before_cursor_execute", count_selects)
+        try:
+            with patch('services.entry_service.Session', return_value=test_session):
+                success, message = add_rss_entries(feed_id, make_fetch_result(feed_id, body=body))
+        finally:
+            event.remove(test_engine, "before_cursor_execute", count_selects)
+
+        assert success is True
+        assert message == "Added 1 entries"
+        assert len(entry_selects) == 1
+        titles = [e.title for e in test_session.query(RssEntry).filter_by(feed_id=feed_id).order_by(RssEntry.id)]
+        assert titles == ['First', 'Second']
+
+
+@pytest.mark.integration
+class TestRefreshPipeline:
+    """Test the fetch, parse and write pipeline used by refresh-all."""
+
+    def test_refresh_all_parses_in_worker_processes(self, test_session, sample_feed):
+        """Test that bodies are parsed by the process pool and stored by the writer."""
+        feed_id = sample_feed.id
+
+        def fake_fetch(feeds, on_result=None):
+            for feed in feeds:
+                on_result(make_fetch_result(feed['id']))
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.entry_service.fetch_feeds', side_effect=fake_fetch):
+            results = add_rss_entries_for_all_feeds(parse_workers=2)
+
+        assert results == [{'feed_id': feed_id, 'success': True, 'message': 'Added 2 entries'}]
+        assert test_session.query(RssEntry).filter_by(feed_id=feed_id).count() == 2
+
+
+@pytest.mark.unit
+class TestRefreshScheduler:
+    """Test adaptive per-feed refresh scheduling."""
+
+    def _add_entries(self, session, feed_id, gap, count=6):
+        now = datetime.now()
+        for i in range(count):
+            session.add(RssEntry(feed_id=feed_id, title=f'Entry {i}',
+                                 link=f'https://example.com/cadence/{i}', published=now - gap * i))
+        session.commit()
+
+    def test_interval_follows_posting_cadence(self, test_session, sample_feed):
+        """Test that a feed posting every 4 hours is refreshed about every 2 hours."""
+        self._add_entries(test_session, sample_feed.id, timedelta(hours=4))
+        now = datetime.now()
+
+        next_fetch_at = compute_next_fetch_at(test_session, sample_feed.id, now=now)
+
+        assert timedelta(hours=1.8) <= next_fetch_at - now <= timedelta(hours=2.2)
+
+    def test_interval_defaults_without_history(self, test_session, sample_feed):
+        """Test that feeds without entries use the default interval."""
+        now = datetime.now()
+
+        next_fetch_at = compute_next_fetch_at(test_session, sample_feed.id, now=now)
+
+        assert DEFAULT_REFRESH_INTERVAL * 0.9 <= next_fetch_at - now <= DEFAULT_REFRESH_INTERVAL * 1.1
+
+    def test_interval_honors_server_hints(self, test_session, sample_feed):
+        """Test that Cache-Control and <ttl> are never undercut."""
+        self._add_entries(test_session, sample_feed.id, timedelta(minutes=40))
+        now = datetime.now()
+
+        from_cache_control = compute_next_fetch_at(
+            test_session, sample_feed.id, {'cache-control': 'public, max-age=10800'}, now=now
+        )
+        from_ttl = compute_next_fetch_at(test_session, sample_feed.id, ttl='300', now=now)
+
+        assert from_cache_control - now >= timedelta(hours=3) * 0.9
+        assert from_ttl - now >= timedelta(hours=5) * 0.9
+
+    def test_server_hint_from_expires(self):
+        """Test that Expires is measured against the response Date."""
+        hint = get_server_refresh_hint({
+            'expires': 'Wed, 01 Jan 2020 14:00:00 GMT',
+            'date': 'Wed, 01 Jan 2020 12:00:00 GMT',
+        })
+
+        assert hint == timedelta(hours=2)
+
+    def test_interval_is_clamped(self, test_session, sample_feed):
+        """Test that intervals stay between the configured minimum and maximum."""
+        now = datetime.now()
+
+        too_soon = compute_next_fetch_at(test_session, sample_feed.id, {'cache-control': 'max-age=1'}, now=now)
+        too_late = compute_next_fetch_at(test_session, sample_feed.id, ttl='100000', now=now)
+
+        assert too_soon - now >= MIN_REFRESH_INTERVAL * 0.9
+        assert too_late - now <= MAX_REFRESH_INTERVAL * 1.1
+
+    def test_refresh_all_only_fetches_due_feeds(self, test_session, multiple_feeds):
+        """Test that refresh-all skips feeds that are not due yet."""
+        feed_ids = [feed.id for feed in multiple_feeds]
+        multiple_feeds[0].next_fetch_at = datetime.now() + timedelta(hours=1)
+        multiple_feeds[1].next_fetch_at = datetime.now() - timedelta(minutes=1)
+        test_session.commit()
+        fetched_ids = []
+
+        def fake_fetch(feeds, on_result=None):
+            for feed in feeds:
+                fetched_ids.append(feed['id'])
+                on_result(make_fetch_result(feed['id'], status=304, body=None))
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.entry_service.fetch_feeds', side_effect=fake_fetch):
+            add_rss_entries_for_all_feeds(parse_workers=0)
+
+        assert sorted(fetched_ids) == sorted(feed_ids[1:])
+        for feed in test_session.query(RssFeed).filter(RssFeed.id.in_(feed_ids)):
+            assert feed.next_fetch_at > datetime.now()
+
+
+@pytest.mark.unit
+class TestFeedFailureTracking:
+    """Test failure backoff and auto-pausing of dead feeds."""
+
+    def _store(self, test_session, feed_id, fetch_result):
+        with patch('services.entry_service.Session', return_value=test_session):
+            return add_rss_entries(feed_id, fetch_result=fetch_result)
+
+    def test_failures_back_off_exponentially(self, test_session, sample_feed):
+        """Test that each consecutive failure doubles the retry interval."""
+        feed_id = sample_feed.id
+        delays = []
+        for _ in range(3):
+            before = datetime.now()
+            self._store(test_session, feed_id, make_fetch_result(feed_id, status=503, body=None))
+            feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+            delays.append(feed.next_fetch_at - before)
+
+        assert feed.consecutive_failures == 3
+        assert feed.last_error == "HTTP error 503"
+        assert feed.failing_since is not None
+        assert MIN_REFRESH_INTERVAL * 0.9 <= delays[0] <= MIN_REFRESH_INTERVAL * 1.1
+        assert MIN_REFRESH_INTERVAL * 4 * 0.9 <= delays[2] <= MIN_REFRESH_INTERVAL * 4 * 1.1
+
+    def test_success_clears_failure_state(self, test_session, sample_feed):
+        """Test that a successful refresh resets the failure counters."""
+        feed_id = sample_feed.id
+        self._store(test_session, feed_id, make_fetch_result(feed_id, error="ConnectError: refused"))
+        self._store(test_session, feed_id, make_fetch_result(feed_id))
+
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert feed.consecutive_failures == 0
+        assert feed.last_error is None
+        assert feed.failing_since is None
+        assert feed.last_success_at is not None
+
+    def test_feed_is_paused_after_failing_for_too_long(self, test_session, sample_feed):
+        """Test that a feed failing for longer than the pause window is paused."""
+        feed_id = sample_feed.id
+        sample_feed.consecutive_failures = 20
+        sample_feed.failing_since = datetime.now() - AUTO_PAUSE_AFTER - timedelta(hours=1)
+        test_session.commit()
+
+        self._store(test_session, feed_id, make_fetch_result(feed_id, status=404, body=None))
+
+        with patch('services.feed_service.Session', return_value=test_session):
+            paused_ids = [feed.id for feed in get_paused_feeds()]
+        assert paused_ids == [feed_id]
+
+    def test_refresh_all_skips_paused_and_backing_off_feeds(self, test_session, multiple_feeds):
+        """Test that a full refresh leaves paused feeds and feeds in backoff alone."""
+        feed_ids = [feed.id for feed in multiple_feeds]
+        multiple_feeds[0].paused = True
+        multiple_feeds[1].consecutive_failures = 2
+        multiple_feeds[1].next_fetch_at = datetime.now() + timedelta(hours=1)
+        multiple_feeds[2].next_fetch_at = datetime.now() + timedelta(hours=1)
+        test_session.commit()
+        fetched_ids = []
+
+        def fake_fetch(feeds, on_result=None):
+            for feed in feeds:
+                fetched_ids.append(feed['id'])
+                on_result(make_fetch_result(feed['id'], status=304, body=None))
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.entry_service.fetch_feeds', side_effect=fake_fetch):
+            add_rss_entries_for_all_feeds(parse_workers=0, due_only=False)
+
+        assert sorted(fetched_ids) == sorted(feed_ids[2:])
+
+    def test_unpause_feed_makes_it_due(self, test_session, sample_feed):
+        """Test that unpausing clears the failure history and schedules the feed."""
+        feed_id = sample_feed.id
+        sample_feed.paused = True
+        sample_feed.consecutive_failures = 30
+        sample_feed.next_fetch_at = datetime.now() + timedelta(days=1)
+        test_session.commit()
+
+        with patch('services.feed_service.Session', return_value=test_session):
+            assert unpause_feed(feed_id) is True
+
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert feed.paused is False
+        assert feed.consecutive_failures == 0
+        assert feed.next_fetch_at is None
+
+
+@pytest.mark.unit
+class TestFetchLog:
+    """Test the per-fetch refresh log and the health summaries built from it."""
+
+    def test_fetch_engine_reports_timings(self):
+        """Test that fetch results carry download timings and size."""
+        def handler(request):
+            return httpx.Response(200, content=SAMPLE_RSS)
+
+        results = fetch_feeds([{'id': 1, 'url': 'https://example.com/feed.xml'}],
+                              transport=httpx.MockTransport(handler))
+
+        metrics = results[0]['metrics']
+        assert metrics['started_at'] is not None
+        assert metrics['download_ms'] >= 0
+        assert metrics['bytes'] == len(SAMPLE_RSS)
+
+    def test_each_refresh_writes_a_log_row(self, test_session, sample_feed):
+        """Test that storing a refresh records its outcome and timings."""
+        feed_id = sample_feed.id
+        fetch_result = make_fetch_result(feed_id)
+        fetch_result['metrics'] = {'started_at': datetime.now(), 'connect_ms': 12.0,
+                                   'download_ms': 80.0, 'bytes': len(SAMPLE_RSS)}
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            add_rss_entries(feed_id, fetch_result)
+            add_rss_entries(feed_id, make_fetch_result(feed_id, status=500, body=None))
+
+        logs = test_session.query(FeedFetchLog).filter_by(feed_id=feed_id).order_by(FeedFetchLog.id).all()
+        assert len(logs) == 2
+        assert logs[0].status == 200
+        assert logs[0].bytes == len(SAMPLE_RSS)
+        assert logs[0].download_ms == 80.0
+        assert logs[0].parse_ms >= 0
+        assert logs[0].db_ms >= 0
+        assert (logs[0].entries_seen, logs[0].entries_added) == (2, 2)
+        assert logs[0].error is None
+        assert logs[1].error == "HTTP error 500"
+
+    def test_feed_health_ranks_feeds_by_refresh_time(self, test_session, multiple_feeds):
+        """Test percentiles, error rate and share of refresh time per feed."""
+        slow, fast = multiple_feeds[0].id, multiple_feeds[1].id
+        now = datetime.now()
+        for ms in range(100, 1100, 100):
+            test_session.add(FeedFetchLog(feed_id=slow, started_at=now, download_ms=ms, bytes=1000))
+        for i in range(4):
+            test_session.add(FeedFetchLog(feed_id=fast, started_at=now, download_ms=10,
+                                          error="HTTP error 503" if i == 0 else None))
+        test_session.commit()
+
+        with patch('services.health_service.Session', return_value=test_session):
+            health = get_feed_health(days=7)
+
+        assert [item['feed_id'] for item in health] == [slow, fast]
+        assert health[0]['p50_ms'] == 500
+        assert health[0]['p95_ms'] == 1000
+        assert health[0]['bytes'] == 10000
+        assert health[1]['error_rate'] == 0.25
+        assert health[1]['last_error'] == "HTTP error 503"
+        assert health[0]['share'] == pytest.approx(5500 / 5540)
+
+    def test_percentile_uses_nearest_rank(self):
+        """Test the nearest-rank percentile helper."""
+        assert percentile([], 0.5) is None
+        assert percentile([3, 1, 2], 0.5) == 2
+        assert percentile(list(range(1, 21)), 0.95) == 19
+
+    def test_old_log_rows_are_pruned(self, test_session, sample_feed):
+        """Test that rows older than the retention window are deleted."""
+        now = datetime.now()
+        test_session.add(FeedFetchLog(feed_id=sample_feed.id, started_at=now - FETCH_LOG_RETENTION - timedelta(days=1)))
+        test_session.add(FeedFetchLog(feed_id=sample_feed.id, started_at=now))
+        test_session.commit()
+
+        with patch('services.health_service.Session', return_value=test_session):
+            assert prune_fetch_log(now) == 1
+        assert test_session.query(FeedFetchLog).count() == 1
+
+
+@pytest.mark.unit
+class TestFeedStats:
+    """Test the per-feed counters kept alongside entry changes."""
+
+    def stats(self, test_session, feed_id):
+        test_session.expire_all()
+        row = test_session.query(FeedStats).filter_by(feed_id=feed_id).first()
+        return row and (row.total_count, row.unread_count, row.read_count, row.latest_published)
+
+    def test_counters_follow_inserts_and_read_changes(self, test_session, sample_feed):
+        """Test that ingesting, marking read and unread and removing a feed keep the counters exact."""
+        feed_id = sample_feed.id
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.read_state_service.Session', return_value=test_session), \
+             patch('services.feed_service.Session', return_value=test_session):
+            add_rss_entries(feed_id, make_fetch_result(feed_id))
+            assert self.stats(test_session, feed_id) == (2, 2, 0, datetime(2020, 1, 1, 14, 0))
+
+            add_rss_entries(feed_id, make_fetch_result(feed_id, body=make_rss(3)))
+            assert self.stats(test_session, feed_id) == (5, 5, 0, datetime(2020, 1, 1, 14, 0))
+
+            entry_id = test_session.query(RssEntry.id).filter_by(feed_id=feed_id).first()[0]
+            mark_entry_as_read(entry_id, True)
+            mark_entry_as_read(entry_id, True)
+            assert self.stats(test_session, feed_id)[:3] == (5, 4, 1)
+
+            mark_feed_entries_as_read(feed_id, True)
+            assert self.stats(test_session, feed_id)[:3] == (5, 0, 5)
+
+            mark_entry_as_read(entry_id, False)
+            assert self.stats(test_session, feed_id)[:3] == (5, 1, 4)
+
+            mark_feed_entries_as_read("all", False)
+            assert self.stats(test_session, feed_id)[:3] == (5, 5, 0)
+            assert test_session.query(RssEntry).filter_by(read=True).count() == 0
+
+            remove_feed(feed_id)
+            assert self.stats(test_session, feed_id) is None
+
+    def test_refresh_after_marking_feed_read_with_zoned_dates(self, test_session, sample_feed):
+        """Test that new entries with offset dates are checked against the read watermark."""
+        feed_id = sample_feed.id
+        body = b"""<rss version="2.0"><channel><title>Sample</title>
+          <item><title>Older</title><link>https://example.com/older</link>
+            <pubDate>Wed, 01 Jan 2020 12:00:00 +0000</pubDate></item>
+          <item><title>Newer</title><link>https://example.com/newer</link>
+            <pubDate>Thu, 02 Jan 2020 09:00:00 GMT</pubDate></item>
+        </channel></rss>"""
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.read_state_service.Session', return_value=test_session):
+            add_rss_entries(feed_id, make_fetch_result(feed_id))
+            mark_feed_entries_as_read(feed_id, True)
+            result = add_rss_entries(feed_id, make_fetch_result(feed_id, body=body))
+
+        assert result == (True, "Added 2 entries")
+        # The older entry is below the watermark, so only the newer one is unread
+        assert self.stats(test_session, feed_id) == (4, 1, 3, datetime(2020, 1, 2, 9, 0))
+
+    def test_counters_with_dated_and_undated_items(self, test_session, sample_feed):
+        """Test that a refresh mixing dated and undated items is counted rather than rolled back."""
+        feed_id = sample_feed.id
+        body = b"""<rss version="2.0"><channel><title>Sample</title>
+          <item><title>Dated</title><link>https://example.com/dated</link>
+            <pubDate>Wed, 01 Jan 2020 12:00:00 +0000</pubDate></item>
+          <item><title>Undated</title><link>https://example.com/undated</link></item>
+        </channel></rss>"""
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            add_rss_entries(feed_id, make_fetch_result(feed_id))
+            started = datetime.now()
+            result = add_rss_entries(feed_id, make_fetch_result(feed_id, body=body))
+
+        assert result == (True, "Added 2 entries")
+        total, unread, read, latest = self.stats(test_session, feed_id)
+        assert (total, unread, read) == (4, 4, 0)
+        # The undated item is stamped with the time it was ingested
+        assert latest >= started
+
+    def test_missing_counters_are_computed_from_entries(self, test_session, sample_feed):
+        """Test that a feed without a stats row gets one before a change is counted."""
+        feed_id = sample_feed.id
+        test_session.add_all([
+            RssEntry(feed_id=feed_id, link='https://example.com/a', read=True),
+            RssEntry(feed_id=feed_id, link='https://example.com/b', read=False),
+        ])
+        test_session.commit()
+        entry_id = test_session.query(RssEntry.id).filter_by(link='https://example.com/b').first()[0]
+
+        with patch('services.read_state_service.Session', return_value=test_session):
+            mark_entry_as_read(entry_id, True)
+
+        assert self.stats(test_session, feed_id)[:3] == (2, 0, 2)
+
+    def test_rebuild_repairs_drifted_counters(self, test_session, sample_feed, sample_entry):
+        """Test that rebuilding recomputes every row from the entries."""
+        feed_id, published = sample_feed.id, sample_entry.published
+        test_session.add(FeedStats(feed_id=feed_id, total_count=40, unread_count=30, read_count=10))
+        test_session.commit()
+
+        with patch('services.stats_service.Session', return_value=test_session):
+            assert rebuild_feed_stats() == 1
+
+        assert self.stats(test_session, feed_id) == (1, 1, 0, published)
+
+
+@pytest.mark.unit
+class TestFaviconRefresh:
+    """Test the host-grouped favicon refresh."""
+
+    def make_feeds(self, test_session):
+        feeds = [
+            RssFeed(url='https://example.com/a.xml', title='A', link='https://example.com/a'),
+            RssFeed(url='https://example.com/b.xml', title='B', link='https://Example.com/b'),
+            RssFeed(url='https://other.org/feed.xml', title='C', link='https://other.org/'),
+        ]
+        test_session.add_all(feeds)
+        test_session.commit()
+        return feeds
+
+    @responses.activate
+    def test_each_host_is_resolved_once(self, test_session):
+        """Test that feeds sharing a host share one homepage lookup and download."""
+        self.make_feeds(test_session)
+        responses.add(responses.GET, 'https://example.com/favicon.ico', body=b'ICON',
+                      headers={'ETag': '"v1"', 'Content-Type': 'image/x-icon'})
+        responses.add(responses.GET, 'https://other.org/favicon.ico', status=404)
+
+        with patch('services.favicon_service.Session', return_value=test_session), \
+             patch('services.favicon_service.get_favicon_url',
+                   side_effect=lambda url: f"https://{url.split('/')[2].lower()}/favicon.ico") as mock_lookup:
+            assert refresh_favicons_for_feeds() == (2, 3)
+
+        assert mock_lookup.call_count == 2
+        assert len(responses.calls) == 2
+        icon_hash = hashlib.sha256(b'ICON').hexdigest()
+        icons = {feed.url: feed.favicon_hash for feed in test_session.query(RssFeed)}
+        assert icons['https://example.com/a.xml'] == icon_hash
+        assert icons['https://example.com/b.xml'] == icon_hash
+        assert icons['https://other.org/feed.xml'] is None
+        with open(favicon_file_path(icon_hash), 'rb') as icon_file:
+            assert icon_file.read() == b'ICON'
+
+        host = test_session.get(FaviconHost, 'example.com')
+        assert host.icon_url == 'https://example.com/favicon.ico'
+        assert host.etag == '"v1"'
+        assert test_session.get(FaviconHost, 'other.org') is None
+
+        progress = get_favicon_refresh_progress()
+        assert progress['state'] == 'done'
+        assert (progress['total'], progress['done'], progress['updated'], progress['failed']) == (2, 2, 1, 1)
+
+    @responses.activate
+    def test_known_icons_are_revalidated_conditionally(self, test_session):
+        """Test that a remembered icon skips the homepage and sends its validators."""
+        feeds = self.make_feeds(test_session)
+        for feed in feeds[:2]:
+            feed.favicon_hash = 'a' * 64
+        test_session.add(FaviconHost(host='example.com', icon_url='https://example.com/icon.png', etag='"v1"'))
+        test_session.commit()
+        feed_ids = [feeds[0].id, feeds[1].id]
+        responses.add(responses.GET, 'https://example.com/icon.png', status=304)
+
+        with patch('services.favicon_service.Session', return_value=test_session), \
+             patch('services.favicon_service.get_favicon_url', return_value=None) as mock_lookup:
+            assert refresh_favicons_for_feeds(feed_ids) == (2, 2)
+
+        mock_lookup.assert_not_called()
+        assert responses.calls[0].request.headers['If-None-Match'] == '"v1"'
+        assert get_favicon_refresh_progress()['unchanged'] == 1
+
+
+@pytest.mark.unit
+class TestFaviconNormalization:
+    """Test resizing and transcoding favicons at ingest."""
+
+    @pytest.fixture(autouse=True)
+    def pillow(self):
+        return pytest.importorskip('PIL.Image')
+
+    def encode(self, image, image_format, **options):
+        output = io.BytesIO()
+        image.save(output, format=image_format, **options)
+        return output.getvalue()
+
+    def test_large_png_is_shrunk(self, pillow):
+        """Test that a big icon becomes a small square PNG."""
+        source = self.encode(pillow.new('RGB', (512, 512), 'blue'), 'PNG')
+
+        result = normalize_favicon(source, 32)
+
+        image = pillow.open(io.BytesIO(result))
+        assert (image.format, image.size) == ('PNG', (32, 32))
+        assert len(result) < len(source)
+
+    def test_ico_uses_smallest_sufficient_frame(self, pillow):
+        """Test that multi-resolution .ico files are read at a useful size."""
+        source = self.encode(pillow.new('RGBA', (256, 256), 'green'), 'ICO',
+                             sizes=[(16, 16), (48, 48), (256, 256)])
+
+        with patch.object(pillow.Image, 'resize', autospec=True, side_effect=pillow.Image.resize) as mock_resize:
+            result = normalize_favicon(source, 32)
+
+        assert mock_resize.call_args[0][0].size == (48, 48)
+        assert pillow.open(io.BytesIO(result)).size == (32, 32)
+
+    def test_non_square_icon_is_centred(self, pillow):
+        """Test that wide icons are padded with transparency rather than stretched."""
+        source = self.encode(pillow.new('RGBA', (64, 32), 'red'), 'PNG')
+
+        image = pillow.open(io.BytesIO(normalize_favicon(source, 32))).convert('RGBA')
+
+        assert image.getpixel((16, 0))[3] == 0
+        assert image.getpixel((16, 16)) == (255, 0, 0, 255)
+
+    def test_undecodable_icon(self):
+        """Test that broken icons are reported and letter tiles are generated instead."""
+        assert normalize_favicon(b'<html>not an icon</html>', 32) is None
+        assert letter_tile('Example News', 32).startswith(b'\x89PNG')
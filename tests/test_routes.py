@@ -1,10 +1,12 @@
+import re
 import pytest
 import json
 from unittest.mock import patch, MagicMock
 from datetime import datetime, timedelta
 from io import BytesIO
 
-from models import RssFeed, RssEntry, Settings
+from models import RssFeed, RssEntry, FeedFetchLog, Settings
+from services.entry_service import get_feed_entries_page
 
 
 @pytest.mark.integration
@@ -46,10 +48,29 @@ class TestEntriesRoute:
         assert b'Test Entry' in response.data
     
     def test_entries_route_with_pagination(self, client, sample_feed, multiple_entries):
-        """Test entries page with pagination."""
-        response = client.get(f'/entries/{sample_feed.id}?page=2')
-        
+        """Test that the cursor parameter is handed to the keyset query."""
+        with patch('app.get_feed_entries_page', wraps=get_feed_entries_page) as mock_page:
+            response = client.get(f'/entries/{sample_feed.id}?cursor=abc')
+
         assert response.status_code == 200
+        mock_page.assert_called_once_with(str(sample_feed.id), 'abc', 20)
+
+    def test_entries_route_links_next_cursor(self, client, test_session, sample_feed):
+        """Test that infinite scroll requests carry a cursor instead of a page number."""
+        test_session.add_all([
+            RssEntry(feed_id=sample_feed.id, title=f'Entry {n}', link=f'https://example.com/{n}',
+                     published=datetime(2024, 1, 1) - timedelta(hours=n))
+            for n in range(25)
+        ])
+        test_session.commit()
+
+        response = client.get(f'/entries/{sample_feed.id}')
+        next_url = re.search(r'hx-get="([^"]+)"', response.data.decode()).group(1)
+        assert 'cursor=' in next_url and 'page=' not in next_url
+
+        more = client.get(next_url.replace('&amp;', '&'), headers={'HX-Request': 'true'})
+        assert more.data.count(b'class="card"') == 5
+        assert b'hx-get' not in more.data
     
     def test_entries_route_htmx_request(self, client, sample_feed, multiple_entries):
         """Test entries route with HTMX request."""
@@ -63,7 +84,7 @@ class TestEntriesRoute:
     def test_entries_route_htmx_no_more_entries(self, client, sample_feed):
         """Test HTMX request when no more entries exist."""
         response = client.get(
-            f'/entries/{sample_feed.id}?page=999',
+            f'/entries/{sample_feed.id}',
             headers={'HX-Request': 'true'}
         )
         
@@ -191,6 +212,65 @@ class TestSettingsRoute:
         assert response.status_code == 200
         assert b'Test Feed' in response.data
 
+    def test_settings_lists_and_unpauses_paused_feeds(self, client, test_session, sample_feed):
+        """Test that paused feeds are listed and can be unpaused."""
+        feed_id = sample_feed.id
+        sample_feed.paused = True
+        sample_feed.last_error = 'HTTP error 410'
+        test_session.commit()
+
+        response = client.get('/settings')
+        assert b'Paused Feeds' in response.data
+        assert b'HTTP error 410' in response.data
+
+        response = client.post(f'/unpause_feed/{feed_id}')
+        assert response.status_code == 200
+        assert test_session.query(RssFeed).filter_by(id=feed_id).first().paused is False
+
+    def test_set_feed_max_items(self, client, test_session, sample_feed):
+        """Test that a feed's item cap can be set, rejected when invalid and cleared."""
+        feed_id = sample_feed.id
+
+        response = client.get('/settings')
+        assert f'/set_feed_max_items/{feed_id}'.encode() in response.data
+
+        response = client.post(f'/set_feed_max_items/{feed_id}', data={'max_items': '25'})
+        assert response.status_code == 200
+        test_session.expire_all()
+        assert test_session.query(RssFeed).filter_by(id=feed_id).first().max_items == 25
+
+        response = client.post(f'/set_feed_max_items/{feed_id}', data={'max_items': '-3'})
+        assert response.status_code == 400
+        test_session.expire_all()
+        assert test_session.query(RssFeed).filter_by(id=feed_id).first().max_items == 25
+
+        response = client.post(f'/set_feed_max_items/{feed_id}', data={'max_items': ''})
+        assert response.status_code == 200
+        test_session.expire_all()
+        assert test_session.query(RssFeed).filter_by(id=feed_id).first().max_items is None
+
+
+    def test_feed_health_page(self, client, test_session, sample_feed):
+        """Test that the feed health page lists feeds from the refresh log."""
+        test_session.add(FeedFetchLog(feed_id=sample_feed.id, started_at=datetime.now(),
+                                      download_ms=250, status=200, bytes=2048))
+        test_session.commit()
+
+        response = client.get('/settings/health')
+
+        assert response.status_code == 200
+        assert b'Feed Health' in response.data
+        assert b'Test Feed' in response.data
+        assert b'250 ms' in response.data
+
+    def test_feed_health_clamps_days(self, client):
+        """Test that out-of-range day counts are clamped instead of overflowing."""
+        response = client.get('/settings/health?days=999999999')
+        assert response.status_code == 200
+        assert b'last 365 days' in response.data
+
+        assert b'last 1 days' in client.get('/settings/health?days=-5').data
+
 
 @pytest.mark.integration
 class TestAddFeedRoute:
@@ -304,6 +384,225 @@ class TestOPMLUploadRoute:
         assert b'Please select an OPML file' in response.data
         assert b'error' in response.data
 
+    @patch('app.executor.submit_stored')
+    def test_upload_opml_reads_feeds_before_importing(self, mock_submit, client, mock_opml_content):
+        """Test that the upload is parsed in the request and the URLs handed to the import."""
+        response = client.post('/upload_opml', data={
+            'opml_file': (BytesIO(mock_opml_content.encode()), 'test.opml')
+        })
+
+        assert b'Processing OPML file' in response.data
+        assert mock_submit.call_args[0][2] == ['https://test1.com/feed.xml', 'https://test2.com/feed.xml']
+
+    @patch('app.executor.submit_stored')
+    def test_upload_opml_malformed(self, mock_submit, client):
+        """Test that a broken OPML file is reported straight away."""
+        response = client.post('/upload_opml', data={
+            'opml_file': (BytesIO(b'<opml><body><outline xmlUrl="https://a.example/feed"'), 'broken.opml')
+        })
+
+        assert b'Error processing OPML file' in response.data
+        mock_submit.assert_not_called()
+
+    def test_upload_opml_while_import_running(self, client, mock_opml_content):
+        """Test that a second import is refused while one is still running."""
+        running = MagicMock()
+        running.done.return_value = False
+        with patch.dict('app.executor.futures._futures', {'opml_import': running}), \
+             patch('app.executor.submit_stored') as mock_submit:
+            response = client.post('/upload_opml', data={
+                'opml_file': (BytesIO(mock_opml_content.encode()), 'test.opml')
+            })
+
+        assert b'already running' in response.data
+        mock_submit.assert_not_called()
+
+    def test_opml_import_status_reports_progress(self, client):
+        """Test the import status fragment polls while running and stops when done."""
+        running = {'state': 'running', 'phase': 'fetching', 'total': 10, 'done': 4,
+                   'failed': 1, 'added': 0, 'skipped': 2, 'errors': []}
+        with patch('app.get_opml_import_progress', return_value=running):
+            response = client.get('/opml_import_status')
+        assert response.status_code == 200
+        assert b'4 of 10 feeds checked, 1 failed' in response.data
+        assert b'every 1s' in response.data
+
+        finished = dict(running, state='done', phase=None, done=10, added=7)
+        with patch('app.get_opml_import_progress', return_value=finished):
+            response = client.get('/opml_import_status')
+        assert b'7 feeds added' in response.data
+        assert b'every 1s' not in response.data
+
+
+@pytest.mark.integration
+class TestFaviconRoute:
+    """Test serving favicons from the favicon store."""
+
+    def test_serve_favicon_with_hash_version(self, client, test_session, sample_feed):
+        """Test strong ETags, immutable versioned URLs and conditional requests."""
+        Image = pytest.importorskip('PIL.Image')
+        from services.favicon_service import store_favicon
+
+        source = BytesIO()
+        Image.new('RGBA', (256, 256), 'red').save(source, format='PNG')
+        favicon_hash = store_favicon(source.getvalue())
+        assert store_favicon(source.getvalue()) == favicon_hash
+        sample_feed.favicon_hash = favicon_hash
+        sample_feed.favicon_mime_type = 'image/png'
+        test_session.commit()
+
+        response = client.get(f'/favicon/{sample_feed.id}?v={favicon_hash}')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/png'
+        assert Image.open(BytesIO(response.data)).size == (32, 32)
+        assert response.headers['ETag'] == f'"{favicon_hash}-32"'
+        assert 'immutable' in response.headers['Cache-Control']
+
+        response = client.get(f'/favicon/{sample_feed.id}?v={favicon_hash}&size=64')
+        assert Image.open(BytesIO(response.data)).size == (64, 64)
+
+        response = client.get(f'/favicon/{sample_feed.id}', headers={'If-None-Match': f'"{favicon_hash}-32"'})
+        assert response.status_code == 304
+        assert 'immutable' not in response.headers['Cache-Control']
+
+    def test_serve_undecodable_favicon_as_letter_tile(self, client, test_session, sample_feed):
+        """Test that icons that cannot be decoded are replaced by a letter tile."""
+        Image = pytest.importorskip('PIL.Image')
+        from services.favicon_service import store_favicon
+
+        sample_feed.favicon_hash = store_favicon(b'not an image')
+        sample_feed.favicon_mime_type = 'image/x-icon'
+        test_session.commit()
+
+        response = client.get(f'/favicon/{sample_feed.id}')
+        assert response.status_code == 200
+        assert response.mimetype == 'image/png'
+        assert Image.open(BytesIO(response.data)).size == (32, 32)
+
+    def test_letter_tiles_for_shared_icon_follow_each_feed(self, client, test_session):
+        """Test that feeds sharing an undecodable icon each get a tile of their own title."""
+        pytest.importorskip('PIL.Image')
+        from services.favicon_service import store_favicon
+
+        favicon_hash = store_favicon(b'not an image either')
+        feeds = [RssFeed(url=f'https://{title}.example.com/rss', title=title,
+                         favicon_hash=favicon_hash, favicon_mime_type='image/x-icon')
+                 for title in ('Alpha', 'Beta')]
+        test_session.add_all(feeds)
+        test_session.commit()
+
+        tiles = [client.get(f'/favicon/{feed.id}').data for feed in feeds]
+        assert tiles[0] != tiles[1]
+        assert client.get(f'/favicon/{feeds[0].id}').data == tiles[0]
+
+    def test_serve_favicon_missing(self, client, sample_feed):
+        """Test feeds without a stored favicon return 404."""
+        assert client.get(f'/favicon/{sample_feed.id}').status_code == 404
+        assert client.get('/favicon/9999').status_code == 404
+
+
+@pytest.mark.integration
+class TestReadStateRoutes:
+    """Test the bulk mark-read routes."""
+
+    def unread_ids(self, test_session):
+        test_session.expire_all()
+        return {entry_id for (entry_id,) in test_session.query(RssEntry.id).filter_by(read=False)}
+
+    def test_mark_read_batch_of_ids(self, client, test_session, multiple_entries):
+        """Test that the visible cards are marked in one request and the count is returned."""
+        unread = sorted(self.unread_ids(test_session))
+
+        response = client.post('/mark_read', data={'entry_id': unread + [multiple_entries[0].id]})
+
+        assert response.status_code == 200
+        assert response.get_json() == {'updated': len(unread)}
+        assert self.unread_ids(test_session) == set()
+
+    def test_mark_read_htmx_reports_count(self, client, test_session, multiple_entries):
+        """Test that HTMX requests get a status message, and read=false marks unread."""
+        response = client.post('/mark_read', data={'entry_id': [multiple_entries[0].id], 'read': 'false'},
+                               headers={'HX-Request': 'true'})
+
+        assert b'1 entries marked as unread' in response.data
+        assert multiple_entries[0].id in self.unread_ids(test_session)
+
+    def test_mark_read_rejects_bad_ids(self, client):
+        """Test that non-numeric ids are refused."""
+        assert client.post('/mark_read', data={'entry_id': ['abc']}).status_code == 400
+
+    def test_mark_read_before_days(self, client, test_session, sample_feed, multiple_entries):
+        """Test marking entries older than a number of days."""
+        test_session.add(RssEntry(feed_id=sample_feed.id, link='https://example.com/old',
+                                  published=datetime.now() - timedelta(days=30), read=False))
+        test_session.commit()
+
+        response = client.post(f'/mark_read/{sample_feed.id}/before', data={'days': '7'})
+
+        assert response.get_json() == {'updated': 1}
+        assert client.post('/mark_read/all/before', data={'before': 'yesterday'}).status_code == 400
+        assert client.post('/mark_read/all/before', data={'days': 'inf'}).status_code == 400
+        assert client.post('/mark_read/all/before', data={'days': 'nan'}).status_code == 400
+
+    def test_mark_read_through_entry(self, client, test_session, sample_feed, multiple_entries):
+        """Test marking everything down to the entry being read."""
+        # multiple_entries are an hour apart, newest first; 1 and 3 start unread
+        response = client.post(f'/mark_read/{sample_feed.id}/through/{multiple_entries[2].id}')
+
+        assert response.get_json() == {'updated': 1}
+        assert self.unread_ids(test_session) == {multiple_entries[3].id}
+
+    def test_entries_page_lists_card_ids(self, client, multiple_entries):
+        """Test that cards carry their ids for the mark-shown-read button."""
+        response = client.get('/entries/all')
+
+        assert b'hx-include=".card input[name=\'entry_id\']"' in response.data
+        assert response.data.count(b'name="entry_id"') == len(multiple_entries)
+
+
+@pytest.mark.integration
+class TestSearchRoute:
+    """Test the search page and its search-as-you-type results."""
+
+    @pytest.fixture
+    def searchable_entry(self, test_session, sample_feed):
+        from services.parse_service import search_text
+        from services.search_service import index_entries
+
+        entry = RssEntry(feed_id=sample_feed.id, title='Bread baking basics', link='https://example.com/bread',
+                         description='<p>Flour, water, salt and <em>patience</em>.</p>')
+        test_session.add(entry)
+        test_session.commit()
+        index_entries(test_session, [{'id': entry.id, 'search_text': search_text(entry.title, entry.description)}])
+        test_session.commit()
+        return entry.id
+
+    def test_search_page(self, client, searchable_entry):
+        """Test that a full page load renders the search box and any results."""
+        response = client.get('/search?q=patien')
+
+        assert response.status_code == 200
+        assert b'hx-trigger="input changed delay:300ms, search"' in response.data
+        assert f'/entry/{searchable_entry}'.encode() in response.data
+        assert '<mark>patience</mark>'.encode() in response.data
+
+    def test_search_htmx_returns_results_only(self, client, searchable_entry):
+        """Test that typing in the box swaps in just the result cards."""
+        response = client.get('/search?q=bread', headers={'HX-Request': 'true'})
+
+        assert b'<input type="search"' not in response.data
+        assert b'Bread baking basics' in response.data
+
+        response = client.get('/search?q=sourdough', headers={'HX-Request': 'true'})
+        assert b'No articles match' in response.data
+
+    def test_search_history_restore_returns_full_page(self, client, searchable_entry):
+        """Test that restoring a pushed search URL from history gets the whole page."""
+        response = client.get('/search?q=bread', headers={'HX-Request': 'true', 'HX-History-Restore-Request': 'true'})
+
+        assert b'<input type="search"' in response.data
+        assert b'Bread baking basics' in response.data
+
 
 @pytest.mark.integration
 class TestThemeRoutes:
@@ -2,13 +2,15 @@ import pytest
 import os
 import tempfile
 import shutil
+import concurrent.futures
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime, timedelta
 import responses
 import feedparser
 from io import BytesIO
 
-from models import RssFeed, RssEntry, Settings
+from models import RssFeed, RssEntry, FeedStats, Settings
+from services.stats_service import ensure_feed_stats
 from views import (
     add_feed, remove_feed, add_rss_entries, add_rss_entries_for_feed,
     add_rss_entries_for_all_feeds, get_all_feeds, get_feed_by_id,
@@ -35,7 +37,7 @@ class TestUtilityFunctions:
         result = article_long_date_format(test_date_str)
         assert result == "Monday, December 25, 2023"
     
-    @patch('requests.get')
+    @patch('services.favicon_service.http_get')
     def test_get_favicon_url_with_base_url(self, mock_get):
         """Test getting favicon URL from base URL."""
         mock_get.return_value.status_code = 200
@@ -44,7 +46,7 @@ class TestUtilityFunctions:
         result = get_favicon_url(base_url)
         assert result == "https://example.com/favicon.ico"
     
-    @patch('requests.get')
+    @patch('services.favicon_service.http_get')
     def test_get_favicon_url_with_root_url(self, mock_get):
         """Test getting favicon URL from root URL."""
         mock_get.return_value.status_code = 200
@@ -53,7 +55,7 @@ class TestUtilityFunctions:
         result = get_favicon_url(base_url)
         assert result == "https://example.com/favicon.ico"
     
-    @patch('requests.get')
+    @patch('services.favicon_service.http_get')
     def test_get_favicon_url_with_subdomain(self, mock_get):
         """Test getting favicon URL from subdomain."""
         mock_get.return_value.status_code = 200
@@ -104,6 +106,14 @@ class TestFeedManagement:
             status=200
         )
         
+        # Mock the feed download
+        responses.add(
+            responses.GET,
+            'https://example.com/feed.xml',
+            body=b'<rss version="2.0"><channel></channel></rss>',
+            status=200
+        )
+        
         # Mock the base URL request for favicon detection
         responses.add(
             responses.GET,
@@ -127,6 +137,9 @@ class TestFeedManagement:
         assert feed.title == 'Test Feed'
         assert feed.link == 'https://example.com'
         assert feed.description == 'Test Description'
+        # The feed starts with zeroed counters, so listing feeds never has to create them
+        stats = test_session.query(FeedStats).filter_by(feed_id=feed.id).one()
+        assert (stats.total_count, stats.unread_count, stats.read_count) == (0, 0, 0)
     
     @patch('feedparser.parse')
     def test_add_feed_existing_feed(self, mock_feedparser, test_session, sample_feed):
@@ -183,8 +196,10 @@ class TestRssEntries:
             def get(self, key, default=None):
                 return self._data.get(key, default)
         
+        responses.add(responses.GET, sample_feed.url, body=b'<rss/>', status=200)
+        
         # Create mock feedparser object with proper attributes
-        mock_feed_data = Mock()
+        mock_feed_data = MagicMock()
         mock_feed_data.status = 200  # HTTP OK status
         mock_feed_data.bozo = False  # No parse errors
         mock_feed_data.entries = [
@@ -207,16 +222,53 @@ class TestRssEntries:
             )
         ]
         mock_feed_data.bozo_exception = None
+        mock_feed_data.get.return_value = None  # No validators returned
         mock_feedparser.return_value = mock_feed_data
         
         with patch('services.entry_service.Session', return_value=test_session):
             add_rss_entries(feed_id)
 
         # Verify entries were added
-        entries = test_session.query(RssEntry).filter_by(feed_id=feed_id).all()
+        entries = test_session.query(RssEntry).filter_by(feed_id=feed_id).order_by(RssEntry.id).all()
         assert len(entries) == 2
         assert entries[0].title == 'New Entry 1'
         assert entries[1].title == 'New Entry 2'
+
+    @responses.activate
+    def test_add_rss_entries_stores_and_sends_validators(self, test_session, sample_feed):
+        """Test that ETag/Last-Modified are persisted and sent on the next refresh."""
+        feed_id = sample_feed.id
+        responses.add(
+            responses.GET,
+            sample_feed.url,
+            body=b'<rss version="2.0"><channel></channel></rss>',
+            status=200,
+            headers={'ETag': '"abc123"', 'Last-Modified': 'Wed, 01 Jan 2020 12:00:00 GMT'},
+        )
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            add_rss_entries(feed_id)
+            add_rss_entries(feed_id)
+
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert feed.etag == '"abc123"'
+        assert feed.modified == 'Wed, 01 Jan 2020 12:00:00 GMT'
+        second_request = responses.calls[1].request
+        assert second_request.headers['If-None-Match'] == '"abc123"'
+        assert second_request.headers['If-Modified-Since'] == 'Wed, 01 Jan 2020 12:00:00 GMT'
+
+    @responses.activate
+    def test_add_rss_entries_not_modified(self, test_session, sample_feed):
+        """Test that a 304 response skips entry processing."""
+        feed_id = sample_feed.id
+        responses.add(responses.GET, sample_feed.url, status=304)
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            success, message = add_rss_entries(feed_id)
+
+        assert success is True
+        assert message == "Not modified"
+        assert test_session.query(RssEntry).filter_by(feed_id=feed_id).count() == 0
     
     @patch('services.entry_service.add_rss_entries')
     def test_add_rss_entries_for_feed(self, mock_add_rss_entries, test_session, sample_feed):
@@ -227,21 +279,35 @@ class TestRssEntries:
         
         mock_add_rss_entries.assert_called_once_with(feed_id_str)
     
-    @patch('services.entry_service.add_rss_entries')
-    def test_add_rss_entries_for_all_feeds(self, mock_add_rss_entries, test_session, multiple_feeds):
+    @patch('services.entry_service.fetch_feeds')
+    @patch('services.entry_service.submit_parsed_feed')
+    def test_add_rss_entries_for_all_feeds(self, mock_submit_parsed_feed, mock_fetch_feeds, test_session, multiple_feeds):
         """Test adding RSS entries for all feeds."""
+        def fake_fetch(feeds, on_result=None):
+            for feed in feeds:
+                on_result({'feed_id': feed['id'], 'url': feed['url'], 'status': 304,
+                           'headers': {}, 'body': None, 'error': None})
+
+        def fake_submit(feed_id, parsed):
+            future = concurrent.futures.Future()
+            future.set_result((True, "Not modified"))
+            return future
+
+        mock_fetch_feeds.side_effect = fake_fetch
+        mock_submit_parsed_feed.side_effect = fake_submit
+
         with patch('services.entry_service.Session', return_value=test_session):
-            add_rss_entries_for_all_feeds()
+            add_rss_entries_for_all_feeds(parse_workers=0)
         
-        # Should call add_rss_entries for each feed
-        assert mock_add_rss_entries.call_count == len(multiple_feeds)
+        # Should queue a parsed result for each feed
+        assert mock_submit_parsed_feed.call_count == len(multiple_feeds)
     
     def test_mark_entry_as_read(self, test_session, sample_entry):
         """Test marking an entry as read."""
         entry_id = sample_entry.id
         assert sample_entry.read is False
         
-        with patch('services.entry_service.Session', return_value=test_session):
+        with patch('services.read_state_service.Session', return_value=test_session):
             mark_entry_as_read(sample_entry.id, True)
         
         # Query the updated entry from the test session
@@ -254,7 +320,7 @@ class TestRssEntries:
         sample_entry.read = True
         test_session.commit()
         
-        with patch('services.entry_service.Session', return_value=test_session):
+        with patch('services.read_state_service.Session', return_value=test_session):
             mark_entry_as_read(sample_entry.id, False)
         
         # Query the updated entry from the test session
@@ -271,14 +337,306 @@ class TestRssEntries:
         ).count()
         assert unread_count > 0
         
-        with patch('services.entry_service.Session', return_value=test_session):
+        with patch('services.read_state_service.Session', return_value=test_session):
             mark_feed_entries_as_read(feed_id, True)
         
         # Verify all entries are now read
-        unread_count = test_session.query(RssEntry).filter_by(
-            feed_id=feed_id, read=False
-        ).count()
-        assert unread_count == 0
+        test_session.expire_all()
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert feed.get_unread_count(test_session) == 0
+
+
+@pytest.mark.unit
+class TestReadState:
+    """Test marking entries read in bulk with single UPDATE statements."""
+
+    @pytest.fixture
+    def dated_entries(self, test_session, sample_feed, multiple_feeds):
+        """Four unread entries an hour apart in sample_feed plus one in another feed."""
+        base = datetime(2024, 1, 1, 12, 0)
+        entries = [
+            RssEntry(feed_id=sample_feed.id, title=f'Entry {n}', link=f'https://example.com/{n}',
+                     published=base - timedelta(hours=n), read=False)
+            for n in range(4)
+        ]
+        entries.append(RssEntry(feed_id=multiple_feeds[0].id, title='Elsewhere', link='https://other.example/1',
+                                published=base - timedelta(hours=10), read=False))
+        test_session.add_all(entries)
+        test_session.commit()
+        return base, sample_feed.id, [entry.id for entry in entries]
+
+    def read_titles(self, test_session):
+        test_session.expire_all()
+        return sorted(title for (title,) in test_session.query(RssEntry.title).filter_by(read=True))
+
+    def unread_count(self, test_session, feed_id):
+        from models import FeedStats
+        test_session.expire_all()
+        return test_session.query(FeedStats.unread_count).filter_by(feed_id=feed_id).scalar()
+
+    def test_mark_entries_read_by_ids(self, test_session, dated_entries):
+        """Test that a batch of ids is marked in one go and only changes are counted."""
+        from services.read_state_service import mark_entries_read
+
+        _, feed_id, entry_ids = dated_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_entries_read(entry_ids[:2]) == 2
+            assert mark_entries_read(entry_ids[:3]) == 1
+            assert mark_entries_read([]) == 0
+
+        assert self.read_titles(test_session) == ['Entry 0', 'Entry 1', 'Entry 2']
+        assert self.unread_count(test_session, feed_id) == 1
+
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_entries_read([entry_ids[0]], read_status=False) == 1
+        assert self.unread_count(test_session, feed_id) == 2
+
+    def test_mark_entries_read_only_creates_counters_for_affected_feeds(self, test_session, dated_entries,
+                                                                         multiple_feeds):
+        """Test that marking entries leaves the counters of unrelated feeds alone."""
+        from services.read_state_service import mark_entries_read
+
+        _, feed_id, entry_ids = dated_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_entries_read(entry_ids[:1]) == 1
+
+        test_session.expire_all()
+        assert [row.feed_id for row in test_session.query(FeedStats)] == [feed_id]
+
+    def test_mark_entries_read_before(self, test_session, dated_entries):
+        """Test that only entries older than the timestamp in the chosen feed are marked."""
+        from services.read_state_service import mark_entries_read_before
+
+        base, feed_id, _ = dated_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_entries_read_before(base - timedelta(minutes=90), feed_id) == 2
+
+        assert self.read_titles(test_session) == ['Entry 2', 'Entry 3']
+        assert self.unread_count(test_session, feed_id) == 2
+
+    def test_mark_entries_read_through(self, test_session, dated_entries):
+        """Test that everything above an entry in list order, and the entry itself, is marked."""
+        from services.read_state_service import mark_entries_read_through
+
+        _, feed_id, entry_ids = dated_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_entries_read_through(entry_ids[1], "all") == 2
+            assert mark_entries_read_through(entry_ids[4], feed_id) == 2
+            assert mark_entries_read_through(9999, feed_id) == 0
+
+        assert self.read_titles(test_session) == ['Entry 0', 'Entry 1', 'Entry 2', 'Entry 3']
+
+    def test_mark_feed_read_returns_count(self, test_session, dated_entries):
+        """Test that marking a whole feed reports how many entries changed."""
+        from services.read_state_service import mark_feed_read
+
+        _, feed_id, _ = dated_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_feed_read(feed_id) == 4
+            assert mark_feed_read("all") == 1
+
+        assert self.unread_count(test_session, feed_id) == 0
+
+    def card_read_flags(self, test_session, feed_id):
+        from services.entry_service import get_feed_entries_page
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            entries, _ = get_feed_entries_page(feed_id)
+        return {entry.title: entry.read for entry in entries}
+
+    def test_mark_feed_read_moves_the_watermark_only(self, test_session, test_engine, dated_entries):
+        """Test that marking a feed read writes the feed row and leaves its entries alone."""
+        from sqlalchemy import event
+        from services.read_state_service import mark_feed_read
+
+        _, feed_id, _ = dated_entries
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(test_engine, 'before_cursor_execute', listener)
+        try:
+            with patch('services.read_state_service.Session', return_value=test_session):
+                assert mark_feed_read(feed_id) == 4
+        finally:
+            event.remove(test_engine, 'before_cursor_execute', listener)
+
+        assert not any(statement.startswith('UPDATE rss_entries') for statement in statements)
+        assert self.read_titles(test_session) == []
+        assert set(self.card_read_flags(test_session, feed_id).values()) == {True}
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert feed.get_unread_count(test_session) == 0
+        assert self.unread_count(test_session, feed_id) == 0
+
+    def test_unread_override_below_watermark(self, test_session, dated_entries):
+        """Test that an entry marked unread after its feed was marked read stays unread."""
+        from services.read_state_service import mark_entries_read, mark_feed_read
+        from services.stats_service import rebuild_feed_stats
+
+        _, feed_id, entry_ids = dated_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            mark_feed_read(feed_id)
+            assert mark_entries_read([entry_ids[2]], read_status=False) == 1
+            assert mark_entries_read([entry_ids[2]], read_status=False) == 0
+
+        flags = self.card_read_flags(test_session, feed_id)
+        assert [title for title, read in flags.items() if not read] == ['Entry 2']
+        assert self.unread_count(test_session, feed_id) == 1
+
+        # Counters rebuilt from scratch agree with the ones kept incrementally
+        with patch('services.stats_service.Session', return_value=test_session):
+            rebuild_feed_stats([feed_id])
+        assert self.unread_count(test_session, feed_id) == 1
+
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_entries_read([entry_ids[2]]) == 1
+        assert set(self.card_read_flags(test_session, feed_id).values()) == {True}
+        assert self.unread_count(test_session, feed_id) == 0
+
+    def test_entries_above_watermark_are_unread(self, test_session, dated_entries):
+        """Test that new entries newer than the watermark are unread and older ones arrive read."""
+        from models import watermark_covers_new_entry
+        from services.read_state_service import mark_feed_read
+        from services.stats_service import record_entries_added
+
+        base, feed_id, _ = dated_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            mark_feed_read(feed_id)
+
+        rows = [
+            {'feed_id': feed_id, 'title': 'Newer', 'link': 'https://example.com/newer',
+             'published': base + timedelta(hours=1), 'read': False},
+            {'feed_id': feed_id, 'title': 'Backdated', 'link': 'https://example.com/backdated',
+             'published': base - timedelta(days=1), 'read': False},
+        ]
+        feed = test_session.query(RssFeed).filter_by(id=feed_id).first()
+        assert [watermark_covers_new_entry(feed, row['published']) for row in rows] == [False, True]
+        test_session.add_all([RssEntry(**row) for row in rows])
+        record_entries_added(test_session, feed_id, rows)
+        test_session.commit()
+
+        flags = self.card_read_flags(test_session, feed_id)
+        assert flags['Newer'] is False and flags['Backdated'] is True
+        assert self.unread_count(test_session, feed_id) == 1
+
+        with patch('services.read_state_service.Session', return_value=test_session):
+            assert mark_feed_read(feed_id, read_status=False) == 5
+        assert set(self.card_read_flags(test_session, feed_id).values()) == {False}
+
+
+@pytest.mark.unit
+class TestSearch:
+    """Test full-text search over entries."""
+
+    @pytest.fixture
+    def indexed_entries(self, test_session, sample_feed, multiple_feeds):
+        """Entries in two feeds, indexed for search."""
+        from services.parse_service import search_text
+        from services.search_service import index_entries
+
+        rows = [
+            {'feed_id': sample_feed.id, 'title': 'Gardening in winter', 'link': 'https://example.com/garden',
+             'description': '<p>Protect <b>tomatoes</b> from frost.</p>', 'content': None},
+            {'feed_id': sample_feed.id, 'title': 'Weekly links', 'link': 'https://example.com/links',
+             'description': '<p>A note on gardening & <script>x</script> soil.</p>', 'content': None},
+            {'feed_id': multiple_feeds[0].id, 'title': 'Cooking', 'link': 'https://other.example/cook',
+             'description': None, 'content': '<div>Roast the tomatoes slowly.</div>'},
+        ]
+        entries = [RssEntry(**row) for row in rows]
+        test_session.add_all(entries)
+        test_session.commit()
+        index_entries(test_session, [
+            {'id': entry.id, 'search_text': search_text(row['title'], row['description'], row['content'])}
+            for row, entry in zip(rows, entries)
+        ])
+        test_session.commit()
+        return sample_feed.id, [entry.id for entry in entries]
+
+    def search(self, test_session, query, **kwargs):
+        from services.search_service import search_entries
+
+        with patch('services.search_service.Session', return_value=test_session):
+            return search_entries(query, **kwargs)
+
+    def test_build_match_query(self):
+        """Test that typed text becomes quoted terms, with the word being typed as a prefix."""
+        from services.search_service import build_match_query
+
+        assert build_match_query('garden tom') == '"garden" "tom"*'
+        assert build_match_query('garden ') == '"garden"'
+        assert build_match_query('NOT "(x') == '"NOT" "x"*'
+        assert build_match_query(' -"* ') is None
+
+    def test_title_matches_rank_first(self, test_session, indexed_entries):
+        """Test that results are ranked with title matches above body matches."""
+        _, entry_ids = indexed_entries
+
+        results = self.search(test_session, 'gardening')
+
+        assert [result.id for result in results] == [entry_ids[0], entry_ids[1]]
+
+    def test_prefix_stemming_and_feed_filter(self, test_session, indexed_entries):
+        """Test search-as-you-type prefixes, stemmed matches and limiting to one feed."""
+        feed_id, entry_ids = indexed_entries
+
+        assert {result.id for result in self.search(test_session, 'tomat')} == {entry_ids[0], entry_ids[2]}
+        assert [result.id for result in self.search(test_session, 'tomato ')] == [entry_ids[0], entry_ids[2]]
+        assert [result.id for result in self.search(test_session, 'tomat', feed_id=feed_id)] == [entry_ids[0]]
+        assert self.search(test_session, '') == []
+
+    def test_snippets_are_plain_text_and_escaped(self, test_session, indexed_entries):
+        """Test that snippets come from the text, not the markup, and only matches are marked up."""
+        results = self.search(test_session, 'soil')
+
+        assert len(results) == 1
+        assert '<mark>soil</mark>' in results[0].snippet
+        assert '<p>' not in results[0].snippet and '&amp;' in results[0].snippet
+        assert self.search(test_session, 'x ') == []
+
+    def test_results_carry_read_state(self, test_session, indexed_entries):
+        """Test that results show the read state resolved through the feed's watermark."""
+        from services.read_state_service import mark_feed_read
+
+        feed_id, _ = indexed_entries
+        with patch('services.read_state_service.Session', return_value=test_session):
+            mark_feed_read(feed_id)
+
+        read = {result.feed_id: result.read for result in self.search(test_session, 'tomat')}
+        assert read[feed_id] is True and False in read.values()
+
+    def test_index_follows_updates_and_deletes(self, test_session, indexed_entries):
+        """Test that fetched article content is indexed and deleted entries drop out."""
+        from services.search_service import rebuild_search_index
+
+        _, entry_ids = indexed_entries
+        with patch('services.entry_service.Session', return_value=test_session):
+            update_entry(entry_ids[1], {'content': '<p>Compost and mulch.</p>'})
+        assert [result.id for result in self.search(test_session, 'mulch')] == [entry_ids[1]]
+
+        test_session.query(RssEntry).filter_by(id=entry_ids[1]).delete()
+        test_session.commit()
+        assert self.search(test_session, 'mulch') == []
+
+        with patch('services.search_service.Session', return_value=test_session):
+            assert rebuild_search_index(chunk_size=1) == 2
+        assert len(self.search(test_session, 'tomat')) == 2
+
+    def test_refresh_indexes_text_extracted_by_the_parser(self, test_session, sample_feed):
+        """Test that new entries are indexed without parsing their HTML on the writer."""
+        from services.entry_service import store_parsed_feed
+        from services.parse_service import parse_feed_body
+
+        body = b"""<rss version="2.0"><channel><title>Sample</title>
+          <item><title>Bread</title><link>https://example.com/bread</link>
+            <description>&lt;p&gt;Knead the &lt;b&gt;dough&lt;/b&gt;.&lt;/p&gt;</description></item>
+        </channel></rss>"""
+        parsed = parse_feed_body({'feed_id': sample_feed.id, 'url': sample_feed.url, 'status': 200,
+                                  'headers': {}, 'body': body, 'error': None})
+        assert parsed['entries'][0]['search_text']['description'] == 'Knead the dough .'
+
+        with patch('services.entry_service.Session', return_value=test_session), \
+             patch('services.parse_service.BeautifulSoup', side_effect=AssertionError('parsed on the writer')):
+            assert store_parsed_feed(sample_feed.id, parsed) == (True, "Added 1 entries")
+
+        assert [result.title for result in self.search(test_session, 'dough')] == ['Bread']
 
 
 @pytest.mark.unit
@@ -304,6 +662,52 @@ class TestDataRetrieval:
         for title in expected_titles:
             assert title in feed_titles
     
+    def test_get_all_feeds_uses_one_query_and_sorts_in_sql(self, test_session, test_engine):
+        """Test the aggregated feed list: counts, sort modes and a fixed query count."""
+        from sqlalchemy import event
+
+        now = datetime.now()
+        feeds = [RssFeed(url=f'https://feed{i}.example/rss', title=f'Feed {i}') for i in range(3)]
+        feeds[2].pinned = True
+        test_session.add_all(feeds)
+        test_session.commit()
+        # Feed 0: old articles, all read; feed 1: recent articles, half read; feed 2: none
+        test_session.add_all([
+            RssEntry(feed_id=feeds[0].id, link='https://feed0.example/1', published=now - timedelta(days=3), read=True),
+            RssEntry(feed_id=feeds[0].id, link='https://feed0.example/2', published=now - timedelta(days=2), read=True),
+            RssEntry(feed_id=feeds[1].id, link='https://feed1.example/1', published=now - timedelta(hours=1), read=True),
+            RssEntry(feed_id=feeds[1].id, link='https://feed1.example/2', published=now, read=False),
+        ])
+        # Entries added here bypass the ingest path that keeps the counters
+        ensure_feed_stats(test_session)
+        test_session.commit()
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(test_engine, 'before_cursor_execute', listener)
+        try:
+            with patch('services.feed_service.Session', return_value=test_session):
+                by_title = get_all_feeds("title")
+                by_updated = get_all_feeds("last_updated")
+                by_frequency = get_all_feeds("frequency_read")
+        finally:
+            event.remove(test_engine, 'before_cursor_execute', listener)
+
+        # Each call is one read-only query that never touches the entries
+        assert len(statements) == 3
+        assert all(statement.lstrip().upper().startswith('SELECT') for statement in statements)
+        assert not any('rss_entries' in statement for statement in statements)
+        # Pinned feeds always come first
+        assert [feed.title for feed in by_title] == ['All Feeds', 'Feed 2', 'Feed 0', 'Feed 1']
+        assert [feed.title for feed in by_updated] == ['All Feeds', 'Feed 2', 'Feed 1', 'Feed 0']
+        assert [feed.title for feed in by_frequency] == ['All Feeds', 'Feed 2', 'Feed 0', 'Feed 1']
+
+        assert by_title[0].unread_count == 1
+        counts = {feed.title: (feed.unread_count, feed.read_frequency) for feed in by_title[1:]}
+        assert counts == {'Feed 0': (0, 1.0), 'Feed 1': (1, 0.5), 'Feed 2': (0, 0.0)}
+        assert by_updated[2].last_new_article_found == now
+        assert by_title[1].last_new_article_found is None
+
     def test_get_feed_by_id_exists(self, test_session, sample_feed):
         """Test getting a feed by ID when it exists."""
         with patch('services.feed_service.Session', return_value=test_session):
@@ -371,6 +775,85 @@ class TestDataRetrieval:
         page2_ids = [e.id for e in page2_entries]
         assert not set(page1_ids).intersection(set(page2_ids))
 
+    def test_get_feed_entries_page_walks_every_entry_once(self, test_session, sample_feed):
+        """Test that cursor pages cover dated and undated entries in order, with no repeats."""
+        from services.entry_service import get_feed_entries_page
+
+        feed_id = sample_feed.id
+        base = datetime(2024, 1, 1)
+        # Two entries share a timestamp and two have no date at all
+        published = [base, base, base - timedelta(hours=1), None, base - timedelta(hours=2), None]
+        test_session.add_all([
+            RssEntry(feed_id=feed_id, title=f'Entry {n}', link=f'https://example.com/{n}', published=when)
+            for n, when in enumerate(published)
+        ])
+        test_session.commit()
+        expected = [row.id for row in test_session.query(RssEntry.id).filter(RssEntry.published.isnot(None))
+                    .order_by(RssEntry.published.desc(), RssEntry.id)]
+        expected += [row.id for row in test_session.query(RssEntry.id).filter(RssEntry.published.is_(None))
+                     .order_by(RssEntry.id)]
+
+        seen, cursor, pages = [], None, 0
+        with patch('services.entry_service.Session', return_value=test_session):
+            while True:
+                entries, cursor = get_feed_entries_page(feed_id, cursor, entries_per_page=2)
+                seen += [entry.id for entry in entries]
+                pages += 1
+                if cursor is None:
+                    break
+
+        assert seen == expected
+        assert pages == 3
+
+    def test_get_feed_entries_page_is_stable_under_inserts(self, test_session, sample_feed):
+        """Test that entries added mid-scroll do not shift or repeat later pages."""
+        from services.entry_service import get_feed_entries_page
+
+        feed_id = sample_feed.id
+        base = datetime(2024, 1, 1)
+        test_session.add_all([
+            RssEntry(feed_id=feed_id, title=f'Entry {n}', link=f'https://example.com/{n}',
+                     published=base - timedelta(hours=n))
+            for n in range(4)
+        ])
+        test_session.commit()
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            first, cursor = get_feed_entries_page(feed_id, entries_per_page=2)
+            test_session.add(RssEntry(feed_id=feed_id, title='New', link='https://example.com/new',
+                                      published=base + timedelta(hours=1)))
+            test_session.commit()
+            second, last_cursor = get_feed_entries_page(feed_id, cursor, entries_per_page=2)
+
+        assert [entry.title for entry in first + second] == [f'Entry {n}' for n in range(4)]
+        assert last_cursor is None
+
+    def test_get_feed_entries_page_rejects_bad_cursor(self, test_session, multiple_entries):
+        """Test that a malformed cursor returns no entries rather than restarting the list."""
+        from services.entry_service import get_feed_entries_page
+
+        with patch('services.entry_service.Session', return_value=test_session):
+            assert get_feed_entries_page('all', 'not-a-cursor') == ([], None)
+
+    def test_entry_lists_load_only_card_columns(self, test_session, multiple_entries, test_engine):
+        """Test that list queries skip the article bodies and return plain rows."""
+        from sqlalchemy import event
+        from services.entry_service import get_feed_entries_page, EntryCard
+
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(test_engine, 'before_cursor_execute', listener)
+        try:
+            with patch('services.entry_service.Session', return_value=test_session):
+                entries, _ = get_feed_entries_page('all')
+                paged = get_feed_entries_by_feed_id('all', 1, 10)
+        finally:
+            event.remove(test_engine, 'before_cursor_execute', listener)
+
+        assert entries and all(type(entry) is EntryCard for entry in entries + paged)
+        assert {entry.title for entry in entries} == {entry.title for entry in paged}
+        assert not any('content' in statement or 'description' in statement for statement in statements)
+
 
 @pytest.mark.unit
 class TestThemeManagement:
@@ -422,22 +905,19 @@ class TestThemeManagement:
 class TestOPMLImport:
     """Test OPML import functionality."""
     
-    @patch('services.opml_service.add_feed')
-    def test_add_feeds_from_opml_success(self, mock_add_feed, mock_opml_content):
+    @patch('services.opml_service.import_feed_urls', return_value=(2, 2, []))
+    def test_add_feeds_from_opml_success(self, mock_import, mock_opml_content):
         """Test successfully importing feeds from OPML."""
         # Create a mock file object
-        mock_file = MagicMock()
-        mock_file.read.return_value = mock_opml_content.encode('utf-8')
+        mock_file = BytesIO(mock_opml_content.encode('utf-8'))
         
-        add_feeds_from_opml(mock_file)
+        assert add_feeds_from_opml(mock_file) == (2, 2, [])
         
-        # Should call add_feed for each feed in the OPML
-        assert mock_add_feed.call_count == 2
-        mock_add_feed.assert_any_call('https://test1.com/feed.xml')
-        mock_add_feed.assert_any_call('https://test2.com/feed.xml')
+        # Should import every feed in the OPML in one batch
+        mock_import.assert_called_once_with(['https://test1.com/feed.xml', 'https://test2.com/feed.xml'])
     
-    @patch('services.opml_service.add_feed')
-    def test_add_feeds_from_opml_empty(self, mock_add_feed):
+    @patch('services.opml_service.import_feed_urls')
+    def test_add_feeds_from_opml_empty(self, mock_import):
         """Test importing from empty OPML."""
         empty_opml = '''<?xml version="1.0" encoding="UTF-8"?>
         <opml version="1.0">
@@ -445,13 +925,58 @@ class TestOPMLImport:
             <body></body>
         </opml>'''
         
-        mock_file = MagicMock()
-        mock_file.read.return_value = empty_opml.encode('utf-8')
+        mock_file = BytesIO(empty_opml.encode('utf-8'))
         
         add_feeds_from_opml(mock_file)
         
-        # Should not call add_feed
-        mock_add_feed.assert_not_called()
+        # Should not start an import
+        mock_import.assert_not_called()
+
+    def test_import_feed_urls_bulk_inserts_new_feeds(self, test_session, sample_feed):
+        """Test that new feeds are fetched concurrently and inserted together."""
+        from services.opml_service import import_feed_urls, get_opml_import_progress
+
+        def fake_fetch_feeds(feeds, on_result=None):
+            for feed in feeds:
+                if 'broken' in feed['url']:
+                    result = {'url': feed['url'], 'status': None, 'headers': {}, 'body': None, 'error': 'ConnectError: refused'}
+                else:
+                    body = f'<rss><channel><title>{feed["url"]}</title><link>https://example.org</link></channel></rss>'
+                    result = {'url': feed['url'], 'status': 200, 'headers': {}, 'body': body.encode(), 'error': None}
+                on_result(result)
+
+        urls = [sample_feed.url, 'https://one.example/feed', 'https://two.example/feed',
+                'https://broken.example/feed', 'https://one.example/feed']
+
+        with patch('services.opml_service.Session', return_value=test_session), \
+             patch('services.opml_service.fetch_feeds', side_effect=fake_fetch_feeds) as mock_fetch, \
+             patch('services.opml_service.create_parse_executor',
+                   return_value=concurrent.futures.ThreadPoolExecutor(max_workers=2)), \
+             patch('services.opml_service.refresh_favicons_for_feeds') as mock_favicons:
+            success, total, errors = import_feed_urls(urls)
+
+        # Existing and duplicate URLs are never fetched
+        fetched = [feed['url'] for feed in mock_fetch.call_args[0][0]]
+        assert sorted(fetched) == ['https://broken.example/feed', 'https://one.example/feed', 'https://two.example/feed']
+
+        assert (success, total) == (2, 4)
+        assert len(errors) == 1 and 'broken.example' in errors[0]
+        titles = {feed.url: feed.title for feed in test_session.query(RssFeed).all()}
+        assert titles['https://one.example/feed'] == 'https://one.example/feed'
+        assert 'https://two.example/feed' in titles
+        assert 'https://broken.example/feed' not in titles
+
+        # Favicons are only fetched for the newly added feeds
+        assert len(mock_favicons.call_args[0][0]) == 2
+
+        progress = get_opml_import_progress()
+        assert progress['state'] == 'done'
+        assert (progress['total'], progress['done'], progress['failed']) == (4, 4, 1)
+        assert (progress['added'], progress['skipped']) == (2, 1)
+
+        # The new feeds get their counters in the import transaction
+        new_ids = [feed.id for feed in test_session.query(RssFeed).filter(RssFeed.url.like('https://%.example/feed'))]
+        assert test_session.query(FeedStats).filter(FeedStats.feed_id.in_(new_ids)).count() == 2
 
 
 @pytest.mark.unit
@@ -501,7 +1026,7 @@ class TestContentRetrieval:
         }
         
         mock_session = MagicMock()
-        mock_entry = MagicMock()
+        mock_entry = MagicMock(title='Test Entry', description='<p>Summary</p>')
         mock_session.query.return_value.filter_by.return_value.first.return_value = mock_entry
         
         with patch('services.entry_service.Session', return_value=mock_session):
@@ -517,7 +1042,7 @@ class TestContentRetrieval:
         empty_article = {'content': ''}
         
         mock_session = MagicMock()
-        mock_entry = MagicMock()
+        mock_entry = MagicMock(title='Test Entry', description='<p>Summary</p>')
         mock_session.query.return_value.filter_by.return_value.first.return_value = mock_entry
         
         with patch('services.entry_service.Session', return_value=mock_session):
@@ -534,6 +1059,9 @@ class TestLatestArticleFunctionality:
     
     def test_get_all_feeds_with_latest_article_dates(self, test_session, multiple_feeds, multiple_entries):
         """Test that get_all_feeds calculates latest article dates correctly."""
+        entry_feed_id = multiple_entries[0].feed_id
+        ensure_feed_stats(test_session)
+        test_session.commit()
         with patch('services.feed_service.Session', return_value=test_session):
             feeds = get_all_feeds()
         
@@ -543,7 +1071,7 @@ class TestLatestArticleFunctionality:
         for feed in real_feeds:
             assert hasattr(feed, 'last_new_article_found')
             # Should have a latest article date since we have entries
-            if feed.id == multiple_entries[0].feed_id:
+            if feed.id == entry_feed_id:
                 assert feed.last_new_article_found is not None
     
     def test_get_feed_by_id_with_latest_article_date(self, test_session, sample_feed, sample_entry):
@@ -646,7 +1174,9 @@ class TestLatestArticleFunctionality:
         )
         
         test_session.add_all([feed1_entry, feed2_entry])
+        ensure_feed_stats(test_session)
         test_session.commit()
+        feed1_published, feed2_published = feed1_entry.published, feed2_entry.published
         
         with patch('services.feed_service.Session', return_value=test_session):
             feeds = get_all_feeds()
@@ -662,8 +1192,8 @@ class TestLatestArticleFunctionality:
         
         assert retrieved_feed1 is not None
         assert retrieved_feed2 is not None
-        assert retrieved_feed1.last_new_article_found == feed1_entry.published
-        assert retrieved_feed2.last_new_article_found == feed2_entry.published
+        assert retrieved_feed1.last_new_article_found == feed1_published
+        assert retrieved_feed2.last_new_article_found == feed2_published
         # Verify they are different
         assert retrieved_feed1.last_new_article_found != retrieved_feed2.last_new_article_found
     